@@ -0,0 +1,84 @@
+"""Measures throughput and fairness when several threads share one binhoComms connection.
+
+Each thread issues +PING round trips for a fixed time. The total rate shows how well the transport overlaps the
+threads' commands, and the ratio between the slowest and the fastest thread shows how evenly the device is shared.
+
+usage: python benchmarks/comms_contention.py [--port /dev/ttyACM0] [--threads 1 2 4 8] [--duration 2]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Benchmark the checkout this script is in, whether or not binho is installed.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from binho.comms.comms import binhoComms
+from binho.comms.manager import binhoDeviceManager
+
+
+def measure(port, direct, threads, duration):
+
+    comms = binhoComms(port, direct=direct)
+    comms.start()
+
+    counts = [0] * threads
+    errors = []
+    stop = threading.Event()
+
+    def worker(index):
+        while not stop.is_set():
+            comms.sendCommand("+PING")
+            result = comms.readResponse()
+            if result != "-OK":
+                errors.append(result)
+                return
+            counts[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+
+    try:
+        for thread in workers:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in workers:
+            thread.join()
+    finally:
+        comms.close()
+
+    if errors:
+        raise RuntimeError(f"Unexpected response to +PING: {errors[0]}")
+
+    return sum(counts) / duration, min(counts) / max(counts) if max(counts) else 0.0
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Throughput of one binhoComms connection shared by several threads")
+    parser.add_argument("--port", default=None, help="Serial port of the device (default: first Nova found)")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8], help="Thread counts to measure")
+    parser.add_argument("--duration", type=float, default=2.0, help="Seconds to run each measurement")
+    args = parser.parse_args()
+
+    port = args.port
+    if port is None:
+        ports = binhoDeviceManager.listAvailablePorts()
+        if not ports:
+            print("No Binho host adapter found!", file=sys.stderr)
+            sys.exit(1)
+        port = ports[0]
+
+    print("{:<10} {:>8} {:>12} {:>10}".format("mode", "threads", "cmds/s", "fairness"))
+
+    for name, direct in (("threaded", False), ("direct", True)):
+        for threads in args.threads:
+            rate, fairness = measure(port, direct, threads, args.duration)
+            print("{:<10} {:>8} {:>12.0f} {:>10.2f}".format(name, threads, rate, fairness))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compares single-command latency of the threaded and direct (threadless) binhoComms transports.
+
+Each mode is timed for back-to-back +PING round trips and for a pipelined burst of the same command.
+
+usage: python benchmarks/comms_direct_latency.py [--port /dev/ttyACM0] [--pings 1000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Benchmark the checkout this script is in, whether or not binho is installed.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from binho.comms.comms import binhoComms
+from binho.comms.manager import binhoDeviceManager
+
+
+def measure(port, direct, pings):
+
+    comms = binhoComms(port, direct=direct)
+    comms.start()
+
+    try:
+        latencies = []
+        for _ in range(pings):
+            start = time.perf_counter()
+            comms.sendCommand("+PING")
+            result = comms.readResponse()
+            latencies.append(time.perf_counter() - start)
+
+            if result != "-OK":
+                raise RuntimeError(f"Unexpected response to +PING: {result}")
+
+        start = time.perf_counter()
+        comms.pipeline(["+PING"] * pings)
+        pipelined = (time.perf_counter() - start) / pings
+
+    finally:
+        comms.close()
+
+    latencies.sort()
+    return {
+        "rtt_median_us": statistics.median(latencies) * 1e6,
+        "rtt_p99_us": latencies[int(len(latencies) * 0.99) - 1] * 1e6,
+        "pipelined_us_per_cmd": pipelined * 1e6,
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Latency of the threaded and direct binhoComms transports")
+    parser.add_argument("--port", default=None, help="Serial port of the device (default: first Nova found)")
+    parser.add_argument("--pings", type=int, default=1000, help="Number of +PING round trips to time")
+    args = parser.parse_args()
+
+    port = args.port
+    if port is None:
+        ports = binhoDeviceManager.listAvailablePorts()
+        if not ports:
+            print("No Binho host adapter found!", file=sys.stderr)
+            sys.exit(1)
+        port = ports[0]
+
+    print("{:<10} {:>14} {:>14} {:>20}".format("mode", "RTT p50 (us)", "RTT p99 (us)", "pipelined (us/cmd)"))
+
+    for name, direct in (("threaded", False), ("direct", True)):
+        result = measure(port, direct, args.pings)
+        print(
+            "{:<10} {:>14.1f} {:>14.1f} {:>20.1f}".format(
+                name, result["rtt_median_us"], result["rtt_p99_us"], result["pipelined_us_per_cmd"]
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Measures the host-side cost of an open binhoComms connection.
+
+Reports the CPU consumed while the connection sits idle and the round-trip latency of +PING, once with the
+polling transport loop used before the event-driven rewrite and once with the select()-based loop.
+
+usage: python benchmarks/comms_idle_cpu.py [--port /dev/ttyACM0] [--idle 5] [--pings 500]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Benchmark the checkout this script is in, whether or not binho is installed.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from binho.comms.comms import binhoComms, SerialPortManager
+from binho.comms.manager import binhoDeviceManager
+
+
+def measure(port, useSelect, idleSeconds, pings):
+
+    SerialPortManager.USE_SELECT = useSelect
+
+    comms = binhoComms(port)
+    comms.start()
+
+    try:
+        # Let the transport thread settle before sampling.
+        time.sleep(0.2)
+
+        cpuStart = time.process_time()
+        wallStart = time.monotonic()
+        time.sleep(idleSeconds)
+        idleCpu = (time.process_time() - cpuStart) / (time.monotonic() - wallStart)
+
+        latencies = []
+        for _ in range(pings):
+            start = time.perf_counter()
+            comms.sendCommand("+PING")
+            result = comms.readResponse()
+            latencies.append(time.perf_counter() - start)
+
+            if result != "-OK":
+                raise RuntimeError(f"Unexpected response to +PING: {result}")
+
+    finally:
+        comms.close()
+
+    latencies.sort()
+    return {
+        "idle_cpu_percent": idleCpu * 100,
+        "rtt_median_ms": statistics.median(latencies) * 1000,
+        "rtt_p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Idle CPU and round-trip latency of the binhoComms transport")
+    parser.add_argument("--port", default=None, help="Serial port of the device (default: first Nova found)")
+    parser.add_argument("--idle", type=float, default=5.0, help="Seconds to sample idle CPU usage")
+    parser.add_argument("--pings", type=int, default=500, help="Number of +PING round trips to time")
+    args = parser.parse_args()
+
+    port = args.port
+    if port is None:
+        ports = binhoDeviceManager.listAvailablePorts()
+        if not ports:
+            print("No Binho host adapter found!", file=sys.stderr)
+            sys.exit(1)
+        port = ports[0]
+
+    print("{:<14} {:>14} {:>14} {:>14}".format("transport", "idle CPU (%)", "RTT p50 (ms)", "RTT p99 (ms)"))
+
+    for name, useSelect in (("polling", False), ("select", True)):
+        result = measure(port, useSelect, args.idle, args.pings)
+        print(
+            "{:<14} {:>14.1f} {:>14.3f} {:>14.3f}".format(
+                name, result["idle_cpu_percent"], result["rtt_median_ms"], result["rtt_p99_ms"]
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measures how well the serial thread coalesces queued commands into shared writes.
+
+A pipelined burst of +PING commands is sent from one thread, then from several threads at once, for each flush
+deadline. The commands-per-write counter shows how many commands shared each USB transaction.
+
+usage: python benchmarks/comms_write_coalescing.py [--port /dev/ttyACM0] [--commands 1000] [--threads 4]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Benchmark the checkout this script is in, whether or not binho is installed.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from binho.comms.comms import binhoComms
+from binho.comms.manager import binhoDeviceManager
+
+
+def measure(port, flushDeadline, commands, threads):
+
+    comms = binhoComms(port)
+    comms.setWriteCoalescing(flushDeadline=flushDeadline)
+    comms.start()
+
+    def worker():
+        for _ in range(commands // threads):
+            comms.collect(comms.submit("+PING"))
+
+    try:
+        start = time.perf_counter()
+        comms.pipeline(["+PING"] * commands)
+        pipelined = (time.perf_counter() - start) / commands
+        pipelinedRatio = comms.commandsPerWrite
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        contended = (time.perf_counter() - start) / commands
+
+        # The counters are cumulative, so back out the pipelined burst.
+        manager = comms.manager
+        pipelinedWrites = commands / pipelinedRatio
+        contendedRatio = (manager.commandsWritten - commands) / (manager.writeCount - pipelinedWrites)
+
+    finally:
+        comms.close()
+
+    return pipelined * 1e6, pipelinedRatio, contended * 1e6, contendedRatio
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Write coalescing in the binhoComms serial thread")
+    parser.add_argument("--port", default=None, help="Serial port of the device (default: first Nova found)")
+    parser.add_argument("--commands", type=int, default=1000, help="Number of commands per measurement")
+    parser.add_argument("--threads", type=int, default=4, help="Number of threads submitting at once")
+    args = parser.parse_args()
+
+    port = args.port
+    if port is None:
+        ports = binhoDeviceManager.listAvailablePorts()
+        if not ports:
+            print("No Binho host adapter found!", file=sys.stderr)
+            sys.exit(1)
+        port = ports[0]
+
+    print(
+        "{:<14} {:>16} {:>12} {:>16} {:>12}".format(
+            "deadline (ms)", "pipelined us/cmd", "cmds/write", "threaded us/cmd", "cmds/write"
+        )
+    )
+
+    for flushDeadline in (0.0, 0.0005, 0.002):
+        result = measure(port, flushDeadline, args.commands, args.threads)
+        print("{:<14.1f} {:>16.1f} {:>12.1f} {:>16.1f} {:>12.1f}".format(flushDeadline * 1e3, *result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compares the shared hex codec with the per-byte formatting the drivers used before it.
+
+Encoding and decoding are timed for 1 KB and 64 KB payloads. No device is needed.
+
+usage: python benchmarks/hex_codec.py [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+# Benchmark the checkout this script is in, whether or not binho is installed.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from binho.comms.hexcodec import decimalEncode, hexDecode, hexEncode
+
+
+def perByteHex(data):
+
+    dataPacket = ""
+    for i in range(len(data)):
+        dataPacket += "{:02x}".format(data[i])
+    return dataPacket
+
+
+def perByteDecimal(data):
+
+    bufferData = ""
+    for x in data:
+        bufferData += " " + str(x)
+    return bufferData
+
+
+def best(statement, repeat):
+    return min(timeit.repeat(statement, number=1, repeat=repeat))
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Speed of hex encoding and decoding of payloads")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of timings to take the best of")
+    args = parser.parse_args()
+
+    print("{:<10} {:<16} {:>14} {:>14} {:>9}".format("payload", "operation", "per-byte (us)", "codec (us)", "speedup"))
+
+    for size in (1024, 65536):
+        data = os.urandom(size)
+        response = b"-SPI0 RXD " + data.hex().upper().encode()
+
+        cases = (
+            ("hex encode", lambda: perByteHex(data), lambda: hexEncode(data)),
+            ("hex decode", lambda: bytearray.fromhex(response.decode()[9:]), lambda: hexDecode(response, 10)),
+            ("decimal encode", lambda: perByteDecimal(data), lambda: decimalEncode(data)),
+        )
+
+        for name, before, after in cases:
+            old = best(before, args.repeat)
+            new = best(after, args.repeat)
+            print(
+                "{:<10} {:<16} {:>14.1f} {:>14.1f} {:>8.1f}x".format(
+                    "{} KB".format(size // 1024), name, old * 1e6, new * 1e6, old / new
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""Benchmarks the host side of the stack against a simulated Nova, and checks the results against a baseline.
+
+A virtualNova on a pseudo-terminal (Linux and macOS only) answers every command at once, so the timings measure this
+library, the transport and the pty, not the adapter or its buses:
+
+- command round trips (+PING), with the threaded and the direct transport;
+- SPI, I2C and 1-Wire transfers through the bus interfaces, at several payload sizes, and SPI transfers in a session;
+- SPIFlash.readBytes and EEPROMDevice.readBytes, end to end;
+- `import binho` in a fresh interpreter.
+
+Every result is the best per-call time in microseconds over several rounds, except the import time, which is the median
+of IMPORT_ROUNDS runs, so lower is better. They are written to a JSON file and compared with a baseline, scaled by how
+much slower a pure-Python workload timed alongside them runs than when the baseline was recorded; any that is
+more than --tolerance slower than its baseline in each of --retries further measurements, or has no baseline at all,
+fails the run with exit status 1. Baselines only compare well on the machine that recorded them; record one with
+--update-baseline.
+
+usage: python benchmarks/host_stack.py [--output results.json] [--baseline FILE] [--tolerance 0.5] [--retries 2]
+                                      [--update-baseline]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# Benchmark the checkout this script is in, whether or not binho is installed.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position
+from binho.comms.comms import binhoComms
+from binho.comms.virtual import virtualNova
+from binho.devices.nova import binhoNova
+from binho.programmers.eeprom import EEPROMDevice
+from binho.programmers.spiFlash import SPIFlash
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "host_stack_baseline.json")
+
+SPI_SIZES = (16, 256, 1024)
+I2C_SIZES = (16, 64, 256)
+ONEWIRE_SIZES = (8, 64)
+
+# Times `import binho` is run. Starting an interpreter varies by tens of milliseconds from one run to the next, so the
+# import time is taken as a median over many runs rather than the best of a few.
+IMPORT_ROUNDS = 21
+
+# The result that measures the host rather than binho. The baseline is scaled by how much faster or slower it is now
+# than when the baseline was recorded, since a shared or throttled host slows every benchmark alike, by more than the
+# tolerance.
+CALIBRATION = "host_calibration"
+
+
+def best(function, number, rounds):
+    """The fastest per-call time of function over several rounds of number calls, in microseconds."""
+
+    times = []
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number)
+
+    return min(times) * 1e6
+
+
+def measureRoundTrips(port, rounds):
+
+    results = {}
+
+    for name, direct in (("threaded", False), ("direct", True)):
+        comms = binhoComms(port, direct=direct)
+        comms.start()
+
+        def ping(comms=comms):
+            comms.sendCommand("+PING")
+            comms.readResponse()
+
+        try:
+            results["rtt_" + name] = best(ping, 200, rounds)
+        finally:
+            comms.close()
+
+    return results
+
+
+def measureBuses(board, rounds):
+
+    results = {}
+
+    board.operationMode = "SPI"
+    for size in SPI_SIZES:
+        data = os.urandom(size)
+        results[f"spi_transfer_{size}"] = best(lambda data=data: board.spi.transfer(data), 50, rounds)
+
+    # The same small transfers inside a session, which sends only their data commands.
+    with board.spi.session() as session:
+        data = os.urandom(SPI_SIZES[0])
+        results[f"spi_session_transfer_{SPI_SIZES[0]}"] = best(lambda: session.transfer(data), 50, rounds)
+
+    board.operationMode = "I2C"
+    for size in I2C_SIZES:
+        data = os.urandom(size)
+        results[f"i2c_write_{size}"] = best(lambda data=data: board.i2c.write(0x50, data), 50, rounds)
+        results[f"i2c_read_{size}"] = best(lambda size=size: board.i2c.read(0x50, size), 50, rounds)
+
+    board.operationMode = "1WIRE"
+    for size in ONEWIRE_SIZES:
+        results[f"onewire_read_{size}"] = best(lambda size=size: board.oneWire.read(size), 50, rounds)
+
+    return results
+
+
+def measurePrograms(board, rounds):
+
+    results = {}
+
+    board.operationMode = "SPI"
+    flash = SPIFlash(board, autodetect=False, chip_select_pin=board.gpio.getPin("IO0"))
+    results["spiflash_read_64k"] = best(lambda: flash.readBytes(0, 65536), 1, rounds)
+
+    board.operationMode = "I2C"
+    eeprom = EEPROMDevice(board.i2c, 256, 16)
+    results["eeprom_read_256"] = best(lambda: eeprom.readBytes(0, 255), 20, rounds)
+
+    return results
+
+
+def measureImport(rounds):
+    # The interpreters import the same checkout as this script.
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+
+    def run(statement):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True, env=environment)
+        return time.perf_counter() - start
+
+    # Each import is timed against an interpreter started just before it, whose start-up is taken off.
+    differences = []
+
+    for _ in range(max(rounds, IMPORT_ROUNDS)):
+        interpreter = run("pass")
+        differences.append(run("import binho") - interpreter)
+
+    return {"import_binho": statistics.median(differences) * 1e6}
+
+
+def compare(results, baseline, tolerance):
+    """Prints each result next to its baseline, and returns the names of those that regressed or have no baseline."""
+
+    regressions = []
+
+    print("{:<22} {:>14} {:>14} {:>9}".format("benchmark", "baseline (us)", "now (us)", "change"))
+
+    for name, value in results.items():
+        reference = baseline.get(name)
+
+        if reference is None:
+            regressions.append(name)
+            print("{:<22} {:>14} {:>14.1f} {:>9}  NO BASELINE".format(name, "-", value, "new"))
+            continue
+
+        change = value / reference - 1
+        flag = ""
+
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+
+        print("{:<22} {:>14.1f} {:>14.1f} {:>+8.0%}{}".format(name, reference, value, change, flag))
+
+    return regressions
+
+
+def calibrate(rounds):
+    """The best time of a fixed pure-Python workload, which follows the speed of the host from one run to the next."""
+
+    def work():
+        total = 0
+        for number in range(10000):
+            total += len("%x" % number)
+        return total
+
+    return best(work, 20, rounds)
+
+
+def measure(rounds):
+
+    # Taken on either side of the benchmarks, in case the host speeds up or slows down while they run.
+    results = {CALIBRATION: calibrate(rounds)}
+
+    with virtualNova() as nova:
+        results.update(measureRoundTrips(nova.port, rounds))
+
+        board = binhoNova(port=nova.port)
+        board.initialize_apis()
+
+        try:
+            results.update(measureBuses(board, rounds))
+            results.update(measurePrograms(board, rounds))
+        finally:
+            board.comms.close()
+
+    results.update(measureImport(rounds))
+    results[CALIBRATION] = min(results[CALIBRATION], calibrate(rounds))
+
+    return results
+
+
+def scaled(baseline, results):
+    """The baseline, with each benchmark scaled by how much slower the host is now than when it was recorded."""
+
+    if CALIBRATION not in baseline:
+        return baseline
+
+    # Never scaled down: the benchmarks spend much of their time in the kernel, and don't speed up as much as the
+    # workload does on a host that has sped up.
+    factor = max(1.0, results[CALIBRATION] / baseline[CALIBRATION])
+
+    return {name: value * factor for name, value in baseline.items()}
+
+
+def slower(results, baseline, tolerance):
+    """The names of the results that are more than tolerance slower than their baseline."""
+    return [name for name, value in results.items() if name in baseline and value / baseline[name] - 1 > tolerance]
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Host stack benchmarks against a simulated Nova")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline to compare with (default: %(default)s)")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.5, help="Fraction slower than the baseline that fails (default: 0.5)"
+    )
+    parser.add_argument("--update-baseline", action="store_true", help="Record the results as the new baseline")
+    parser.add_argument("--rounds", type=int, default=5, help="Rounds to take the best of")
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="Times to measure again before reporting a regression, or for a baseline (default: 2)",
+    )
+    args = parser.parse_args()
+
+    results = measure(args.rounds)
+    baseline = {}
+
+    if not args.update_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baselineFile:
+                baseline = json.load(baselineFile)["results"]
+        else:
+            print("No baseline at " + args.baseline + "; record one with --update-baseline")
+
+    # A busy host slows every benchmark at once for seconds at a time, so a slowdown has to persist across several
+    # measurements before it counts, and a baseline is the best of as many; each result is the best seen.
+    for _ in range(args.retries):
+        suspects = list(results) if args.update_baseline else slower(results, scaled(baseline, results), args.tolerance)
+
+        if not suspects:
+            break
+
+        print("Measuring again: " + ", ".join(suspects))
+        again = measure(args.rounds)
+        results = {name: min(value, again[name]) for name, value in results.items()}
+
+    report = {"python": platform.python_version(), "platform": platform.platform(), "results": results}
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as output:
+            json.dump(report, output, indent=2)
+        print("Recorded the baseline in " + args.baseline)
+        return
+
+    if CALIBRATION in baseline:
+        print(f"The host takes {results[CALIBRATION] / baseline[CALIBRATION]:.2f}x the time it did for the baseline")
+
+    regressions = compare(results, scaled(baseline, results), args.tolerance)
+
+    if regressions:
+        print(
+            f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%} or have no baseline: "
+            + ", ".join(regressions)
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
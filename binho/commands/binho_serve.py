@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+from __future__ import print_function
+
+import errno
+import sys
+
+import serial
+from binho.utils import log_silent, log_verbose, binho_error_hander, binhoArgumentParser
+from binho.errors import DeviceNotFoundError
+from binho.comms.comms import binhoException
+from binho.comms.daemon import binhoDaemon
+
+
+def main():
+
+    # Set up a simple argument parser.
+    parser = binhoArgumentParser(
+        description="Daemon that shares a Binho host adapter between several programs. While it is running, any "
+        "program using this package reaches the host adapter through the daemon instead of opening its port."
+    )
+    parser.add_argument(
+        "-s",
+        "--socket",
+        dest="socket",
+        metavar="<path>",
+        default=None,
+        help="Unix socket to listen on (default: the path other programs look for)",
+    )
+
+    args = parser.parse_args()
+
+    log_function = log_verbose if args.verbose else log_silent
+
+    try:
+        log_function("Trying to find a Binho host adapter...")
+        device = parser.find_specified_device()
+
+        if device.inBootloaderMode:
+            print(
+                "{} found on {}, but it cannot be used now because it's in DFU mode".format(
+                    device.productName, device.commPort
+                )
+            )
+            sys.exit(errno.ENODEV)
+
+        elif device.inDAPLinkMode:
+            print(
+                "{} found on {}, but it cannot be used now because it's in DAPlink mode".format(
+                    device.productName, device.commPort
+                )
+            )
+            print("Tip: Exit DAPLink mode using 'binho daplink -q' command")
+            sys.exit(errno.ENODEV)
+
+        else:
+            log_function("{} found on {}. (Device ID: {})".format(device.productName, device.commPort, device.deviceID))
+
+    except serial.SerialException:
+        print(
+            "The target Binho host adapter was found, but failed to connect because another application already has an \
+             open connection to it."
+        )
+        print("Please close the connection in the other application and try again.")
+        sys.exit(errno.ENODEV)
+
+    except DeviceNotFoundError:
+        if args.deviceID:
+            print(
+                "No Binho host adapter found matching Device ID '{}'.".format(args.deviceID),
+                file=sys.stderr,
+            )
+        else:
+            print("No Binho host adapter found!", file=sys.stderr)
+        sys.exit(errno.ENODEV)
+
+    # The daemon opens the port itself, so let go of it first.
+    port = device.commPort
+    device.close()
+
+    daemon = binhoDaemon(port, args.socket)
+
+    try:
+        daemon.start()
+
+    except binhoException as e:
+        print(e, file=sys.stderr)
+        sys.exit(errno.EADDRINUSE)
+
+    print("Sharing {} on {}. Press Ctrl+C to stop.".format(port, daemon.socketPath))
+
+    try:
+        daemon.serveForever()
+
+    except Exception:  # pylint: disable=broad-except
+        # Catch any exception that was raised and display it
+        binho_error_hander()
+
+
+if __name__ == "__main__":
+    main()
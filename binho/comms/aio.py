@@ -0,0 +1,313 @@
+"""
+asyncio-native transport for Binho host adapters.
+
+binhoAsyncComms talks to the device over the serial port's non-blocking file descriptor from within a running event
+loop, so a single loop can drive many adapters concurrently without a transport thread (and three queues) per
+device. It requires an event loop that supports add_reader(), i.e. a POSIX host.
+"""
+
+import asyncio
+import collections
+import os
+
+import serial
+
+from .comms import SERIAL_TIMEOUT, binhoException, _INTERRUPT_PREFIX, _RESPONSE_PREFIX
+from .configuration import configurationStore
+from .events import interruptEvents
+from .framer import lineFramer
+from .timeouts import responseTimeouts
+
+
+class binhoAsyncComms:
+    """Asynchronous counterpart of binhoComms."""
+
+    def __init__(self, serialPort):
+
+        self.serialPort = serialPort
+        self.interrupts = set()
+
+        # Every interrupt notification, timestamped and in order; see binho.comms.events.
+        self.events = interruptEvents()
+
+        # The configuration written through the drivers; see binho.comms.configuration.
+        self.configuration = configurationStore()
+
+        self._comport = None
+        self._fd = None
+        self._loop = None
+        self._framer = lineFramer()
+        self._txBuffer = bytearray()
+        self._writerRegistered = False
+
+        # Futures awaiting a reply, in the order their commands were written. The device answers in order.
+        self._awaiting = collections.deque()
+        self._timeouts = responseTimeouts(SERIAL_TIMEOUT)
+
+        # When the last reply arrived, on the loop's clock: the moment the device moved on to the head of _awaiting.
+        self._lastReplyTime = 0.0
+        self._debug = os.getenv("BINHO_NOVA_DEBUG")
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Communication Management
+
+    async def start(self):
+
+        self._loop = asyncio.get_running_loop()
+
+        # pyserial configures the line and opens the descriptor with O_NONBLOCK; from here on we drive the
+        # descriptor directly from the event loop.
+        self._comport = serial.Serial(self.serialPort, baudrate=1000000, timeout=0, write_timeout=0)
+        self._fd = self._comport.fileno()
+
+        self._loop.add_reader(self._fd, self._onReadable)
+
+    def isConnected(self):
+
+        return self._fd is not None
+
+    def close(self):
+
+        self._shutdown(None)
+
+    def _shutdown(self, error):
+
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            if self._writerRegistered:
+                self._loop.remove_writer(self._fd)
+                self._writerRegistered = False
+            self._fd = None
+
+        if self._comport is not None:
+            self._comport.close()
+            self._comport = None
+
+        if error is None:
+            error = binhoException("Connection with device closed")
+
+        while self._awaiting:
+            future = self._awaiting.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+        self._txBuffer.clear()
+        self._framer.clear()
+
+    # Event loop callbacks
+
+    def _onReadable(self):
+
+        try:
+            count = self._framer.readFrom(self._fd)
+        except OSError as e:
+            self._shutdown(binhoException(f"Connection with device lost: {e}"))
+            return
+
+        if count == 0:
+            self._shutdown(binhoException("Connection with device lost"))
+            return
+
+        for line in self._framer.lines():
+            line = bytes(line).strip()
+
+            if not line:
+                continue
+
+            if line[0] == _INTERRUPT_PREFIX:
+                interrupt = line.decode("utf-8")
+                self.interrupts.add(interrupt)
+                self.events.post(interrupt)
+            elif line[0] == _RESPONSE_PREFIX:
+                self._dispatchResponse(line.decode("utf-8"))
+
+    def _dispatchResponse(self, response):
+
+        if self._debug is not None:
+            print(response)
+
+        if not self._awaiting:
+            return
+
+        future = self._awaiting.popleft()
+        startTime = self._lastReplyTime
+        self._lastReplyTime = self._loop.time()
+
+        # A future given up on is left in line, so that its late reply is dropped here rather than handed to the next.
+        if not future.done():
+            future.startTime = startTime
+            future.set_result(response)
+
+    def _flush(self):
+
+        try:
+            written = os.write(self._fd, self._txBuffer)
+        except BlockingIOError:
+            written = 0
+        except OSError as e:
+            self._shutdown(binhoException(f"Connection with device lost: {e}"))
+            return
+
+        del self._txBuffer[:written]
+
+        # Wait for the descriptor to become writable again rather than spinning on a full output buffer.
+        if self._txBuffer and not self._writerRegistered:
+            self._loop.add_writer(self._fd, self._flush)
+            self._writerRegistered = True
+        elif not self._txBuffer and self._writerRegistered:
+            self._loop.remove_writer(self._fd)
+            self._writerRegistered = False
+
+    # Public functions
+
+    def submit(self, command):
+        """
+        Writes a command to the device without waiting for its reply.
+        :param command: The command to send, without the trailing newline
+        :type command: str
+        :raises binhoException: if the connection is not open
+        :return: A future that resolves to the response string
+        :rtype: asyncio.Future
+        """
+
+        if self._fd is None:
+            raise binhoException("Connection with device is not open")
+
+        if self._debug is not None:
+            print(command)
+
+        future = self._loop.create_future()
+        future.command = command
+        future.sent = self._loop.time()
+        self._awaiting.append(future)
+
+        self._txBuffer += command.encode("utf-8") + b"\n"
+        if not self._writerRegistered:
+            self._flush()
+
+        return future
+
+    @property
+    def timeouts(self):
+        """The model that gives each command its response deadline when no timeout is passed."""
+        return self._timeouts
+
+    async def command(self, command, timeout=None):
+        """
+        Sends a command and waits for the device's response.
+        :param command: The command to send, without the trailing newline
+        :type command: str
+        :param timeout: Seconds to wait for the response, or None to wait as long as the command's payload, the bus
+            clock and the device's past replies to the same verb call for
+        :type timeout: float
+        :raises binhoException: if the device does not answer in time or the connection is lost
+        :return: The response string
+        :rtype: str
+        """
+
+        if timeout is None:
+            timeout = self._timeouts.timeout(command)
+
+        future = self.submit(command)
+
+        try:
+            result = await self._awaitReply(future, timeout)
+        except asyncio.TimeoutError:
+            # Only this command fails; the connection stays up for the commands of other tasks.
+            future.cancel()
+            raise binhoException(f"Timed out waiting for a response to {command}") from None
+
+        self._timeouts.observe(command, result, self._loop.time() - max(future.sent, future.startTime))
+
+        return result
+
+    async def _awaitReply(self, future, timeout):
+
+        # As in binhoComms: the deadline runs from when the device can start on the command, and until then the
+        # command at the head of the queue sets the pace.
+        while True:
+            head = self._awaiting[0] if self._awaiting else None
+            limit = timeout
+
+            if head is not None and head is not future:
+                headCommand = getattr(head, "command", None)
+                limit = max(timeout, self._timeouts.timeout(headCommand) if headCommand else self._timeouts.fallback)
+
+            remaining = max(future.sent, self._lastReplyTime) + limit - self._loop.time()
+
+            if future.done():
+                return future.result()
+
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+
+            await asyncio.wait((future,), timeout=remaining)
+
+    async def pipeline(self, commands, timeout=None):
+        """
+        Writes several commands back-to-back and waits for all of their responses.
+        :param commands: The commands to send
+        :type commands: iterable of str
+        :param timeout: Seconds to wait for the last response, or None to allow for each command as command() does
+        :type timeout: float
+        :return: The response to each command, in order
+        :rtype: list of str
+        """
+
+        commands = list(commands)
+        futures = [self.submit(command) for command in commands]
+
+        if not futures:
+            return []
+
+        try:
+            if timeout is None:
+                results = [await self._awaitReply(future, self._timeouts.timeout(future.command)) for future in futures]
+            else:
+                results = list(await asyncio.wait_for(asyncio.gather(*futures), timeout))
+        except asyncio.TimeoutError:
+            # Only these commands fail, as in command().
+            for future in futures:
+                future.cancel()
+            raise binhoException("Timed out waiting for pipelined responses") from None
+
+        # Replies to pipelined commands queue behind each other, so only their content is learned from.
+        for command, result in zip(commands, results):
+            self._timeouts.observe(command, result)
+
+        return results
+
+    @classmethod
+    def checkDeviceSuccess(cls, ret_str):
+        if ret_str == "-OK":
+            return True
+        if ret_str == "-NG":
+            return False
+
+        raise binhoException(f"Invalid command response: {ret_str}")
+
+    def interruptCount(self):
+
+        return len(self.interrupts)
+
+    def interruptCheck(self, interrupt):
+
+        return interrupt in self.interrupts
+
+    def interruptClear(self, interrupt):
+
+        self.interrupts.discard(interrupt)
+
+    def interruptClearAll(self):
+
+        self.interrupts.clear()
+
+    def getInterrupts(self):
+
+        return self.interrupts.copy()
@@ -0,0 +1,730 @@
+"""
+Declarative table of the device's commands, and the machinery that turns it into driver methods.
+
+Each entry describes a command's request, with its arguments as named fields, and the grammar of its reply: the prefix
+the reply starts with and how the value after it is converted. Entries are compiled once, at import: the request
+becomes a %-format string filled positionally, the reply prefix a template whose filled-in forms are cached per
+index, and the value's offset the prefix's length. Sending a command and checking its reply therefore costs one
+format, one dict lookup and one startswith(), instead of the concatenation, magic offsets and slicing each driver
+method used to spell out.
+
+The uniform members of the sync and async drivers (setting getters and setters, queries and actions) are generated
+from the same entries by commandMethods() and asyncCommandMethods(), so that both drivers send the same commands and
+parse the replies the same way. Commands with extra logic are written by hand and use the table's entries directly.
+
+Entries that configure the device are flagged with the part of the request that names what they configure (their
+replay key, e.g. "SPI0 CLK"). Whenever one succeeds, the request is recorded in the connection's configurationStore
+under that key, so that the configuration can be replayed after a reconnect; entries that undo a configuration, such as
+"SPI0 END", name the key they remove instead.
+
+Settings are also shadowed: the value each one was last written with or read back as is kept in the configurationStore,
+so that reading it again, or writing the value it already has, costs no round trip to the device. Settings whose value
+the device changes by itself, such as an input pin's value, are declared with cached=False and always go to the device.
+"""
+
+import re
+
+from .hexcodec import hexDecode
+
+# Fields in request and reply templates, e.g. "{index}".
+_FIELD = re.compile(r"\{(\w+)\}")
+
+# The field filled in from the driver's own index (its spiIndex, ioNumber, ...) by the generated methods.
+INDEX_FIELD = "index"
+
+# Reply of commands that just succeed.
+OK_REPLY = "-OK"
+
+
+def commandVerb(command):
+    """
+    Names the kind of a command line, without its index and arguments, e.g. "SPI0 WHR 0 4 0102" -> "SPI WHR" and
+    "+LED 1 2 3" -> "+LED".
+    :param command: The command line
+    :type command: str
+    :rtype: str
+    """
+
+    words = command.split(" ", 2)
+
+    if command.startswith("+") or len(words) == 1:
+        return words[0].rstrip("0123456789")
+
+    return words[0].rstrip("0123456789") + " " + words[1]
+
+
+# Value grammars: each converts the part of a reply that follows the prefix and its separating space.
+
+
+def text(response, start):
+    """The rest of the reply, as str."""
+
+    payload = response[start:]
+
+    return payload if isinstance(payload, str) else bytes(payload).decode("utf-8")
+
+
+def integer(response, start):
+    """The rest of the reply, as a decimal integer."""
+    return int(response[start:])
+
+
+def hexInteger(response, start):
+    """The rest of the reply, as a hex integer with or without its 0x prefix, e.g. "0xFF"."""
+    return int(text(response, start), 16)
+
+
+# The rest of the reply, as hex encoded binary data.
+hexPayload = hexDecode
+
+
+def hexAddress(response, start):
+    """The rest of the reply, as a 0x-prefixed hex address."""
+    return bytearray.fromhex(text(response, start).replace("0x", ""))
+
+
+def ioValue(response, start):
+    """The value of an IO pin, which is followed by its unit in analog modes."""
+    return int(text(response, start).split(" ", 1)[0])
+
+
+def addressBits(response, start):
+    """The I2C address width, 7BIT or 8BIT."""
+
+    payload = text(response, start)
+
+    if "8BIT" in payload:
+        return 8
+    if "7BIT" in payload:
+        return 7
+
+    raise RuntimeError(f'Error Binho responded with {text(response, 0)}, not the expected "7BIT" or "8BIT"')
+
+
+class binhoCommand:
+    """
+    One command of the device's protocol: how to format its request, and what its reply must look like.
+    """
+
+    def __init__(
+        self, request, reply=OK_REPLY, value=None, replay=None, forgets=None
+    ):  # pylint: disable=too-many-arguments
+        """
+        :param request: The request, with its arguments as named fields, e.g. "SPI{index} CLK {clock}". A field named
+            index is filled in from the driver's own index by the generated methods.
+        :type request: str
+        :param reply: What the reply must start with, e.g. "-SPI{index} RXD", or None to accept and return any reply
+            as it is. It may use the request's leading fields.
+        :type reply: str
+        :param value: Grammar of the value after the reply's prefix, or None for commands that just succeed
+        :type value: callable
+        :param replay: For a command that configures the device, the replay key naming what it configures, e.g.
+            "SPI{index} CLK". It may use the request's leading fields.
+        :type replay: str
+        :param forgets: For a command that undoes a configuration, the replay key of the command it undoes, e.g.
+            "SPI{index} BEGIN". It may use the request's leading fields.
+        :type forgets: str
+        """
+
+        self.request = request
+        self.reply = reply
+        self.value = value
+        self.fields = tuple(_FIELD.findall(request))
+        self.indexed = self.fields[:1] == (INDEX_FIELD,)
+        self.verb = commandVerb(_FIELD.sub("0", request))
+
+        # Values that the drivers decode straight from the raw bytes of the reply.
+        self.binary = value is hexPayload
+
+        self._template = _FIELD.sub("%s", request.replace("%", "%%"))
+
+        replyFields = tuple(_FIELD.findall(reply)) if reply is not None else ()
+
+        if replyFields != self.fields[: len(replyFields)]:
+            raise ValueError(f'The reply "{reply}" of "{request}" may only use the leading fields of the request')
+
+        self._replyArity = len(replyFields)
+        self._replyTemplate = _FIELD.sub("%s", reply.replace("%", "%%")) if reply is not None else None
+
+        # The replay key this command records its request under, or removes, filled in from its leading arguments.
+        self.replay = replay
+        self.forgets = forgets
+        self._keyTemplate = None
+        self._keyArity = 0
+
+        for key in (replay, forgets):
+            if key is not None:
+                keyFields = tuple(_FIELD.findall(key))
+
+                if keyFields != self.fields[: len(keyFields)]:
+                    raise ValueError(f'The key "{key}" of "{request}" may only use the leading fields of the request')
+
+                self._keyTemplate = _FIELD.sub("%s", key.replace("%", "%%"))
+                self._keyArity = len(keyFields)
+
+        # Filled-in reply prefixes, per leading arguments, for str and for raw replies.
+        self._prefixes = {}
+        self._bytePrefixes = {}
+
+    def __repr__(self):
+        return f"binhoCommand({self.request!r}, {self.reply!r})"
+
+    def format(self, args=()):
+        """
+        :param args: The values of the request's fields, in order
+        :type args: tuple
+        :return: The request line
+        :rtype: str
+        """
+        return self._template % args
+
+    def expectedPrefix(self, args=(), binary=False):
+        """
+        :return: What the reply to the command with these arguments must start with
+        :rtype: str or bytes
+        """
+
+        prefixes = self._bytePrefixes if binary else self._prefixes
+        key = args[: self._replyArity]
+        prefix = prefixes.get(key)
+
+        if prefix is None:
+            prefix = self._replyTemplate % key
+            prefix = prefix.encode("utf-8") if binary else prefix
+            prefixes[key] = prefix
+
+        return prefix
+
+    def parse(self, response, args=()):
+        """
+        Checks the reply to the command with the given arguments and extracts its value.
+        :param response: The reply
+        :type response: str or bytes
+        :param args: The arguments the command was sent with
+        :type args: tuple
+        :raises RuntimeError: if the reply doesn't start with the expected prefix
+        :return: The value, True if the command has none, or the reply itself if it has no grammar
+        """
+
+        if self._replyTemplate is None:
+            return response
+
+        binary = not isinstance(response, str)
+        prefix = (self._bytePrefixes if binary else self._prefixes).get(args[: self._replyArity])
+
+        if prefix is None:
+            prefix = self.expectedPrefix(args, binary)
+
+        if not response.startswith(prefix):
+            _fail(response, prefix)
+
+        if self.value is None:
+            return True
+
+        return self.value(response, len(prefix) + 1)
+
+    @property
+    def configures(self):
+        """True if the command records or removes a replay key when it succeeds."""
+        return self._keyTemplate is not None
+
+    def remember(self, configuration, args, response=OK_REPLY):
+        """
+        Records or removes the command's replay key in a configurationStore, if the device accepted the command.
+        :param configuration: The store
+        :type configuration: configurationStore
+        :param args: The arguments the command was sent with
+        :type args: tuple
+        :param response: The reply, for commands whose reply isn't checked by parse()
+        :type response: str
+        """
+
+        if self._keyTemplate is None or response != OK_REPLY:
+            return
+
+        key = self._keyTemplate % args[: self._keyArity]
+
+        if self.replay is not None:
+            configuration.record(key, self._template % args)
+        else:
+            configuration.forget(key)
+
+    def execute(self, usb, args=()):
+        """
+        Sends the command through a binhoComms and parses its reply.
+        :param usb: The connection
+        :type usb: binhoComms
+        :param args: The values of the request's fields
+        :type args: tuple
+        """
+
+        usb.sendCommand(self._template % args)
+
+        if self.binary:
+            return self.parse(usb.readResponseBytes(), args)
+
+        result = self.parse(usb.readResponse(), args)
+
+        if self._keyTemplate is not None:
+            self.remember(usb.configuration, args, result if self._replyTemplate is None else OK_REPLY)
+
+        return result
+
+    async def executeAsync(self, usb, args=()):
+        """
+        Sends the command through a binhoAsyncComms and parses its reply.
+        :param usb: The connection
+        :type usb: binhoAsyncComms
+        :param args: The values of the request's fields
+        :type args: tuple
+        """
+
+        result = self.parse(await usb.command(self._template % args), args)
+
+        if self._keyTemplate is not None:
+            self.remember(usb.configuration, args, result if self._replyTemplate is None else OK_REPLY)
+
+        return result
+
+
+class binhoSetting:
+    """
+    A setting of the device, read with "<base> ?" and written with "<base> <value>".
+    """
+
+    def __init__(self, base, value=text, replay=True, cached=True):
+        """
+        :param base: The command without its value, e.g. "SPI{index} CLK"
+        :type base: str
+        :param value: Grammar of the value
+        :type value: callable
+        :param replay: Whether the setting is part of the configuration replayed after a reconnect; its replay key is
+            its base
+        :type replay: bool
+        :param cached: Whether the value last written or read is kept and returned in place of asking the device. Its
+            key is also its base.
+        :type cached: bool
+        """
+
+        self.base = base
+        self.value = value
+        self.cached = cached
+        self.query = binhoCommand(base + " ?", "-" + base.lstrip("+"), value)
+        self.assign = binhoCommand(base + " {value}", replay=base if replay else None)
+
+        # The key the value is shadowed under, filled in from the base's fields.
+        self._keyTemplate = _FIELD.sub("%s", base.replace("%", "%%"))
+
+    def __repr__(self):
+        return f"binhoSetting({self.base!r})"
+
+    def key(self, args=()):
+        """
+        :param args: The values of the base's fields
+        :type args: tuple
+        :return: The key the setting's value is shadowed and replayed under, e.g. "SPI0 CLK"
+        :rtype: str
+        """
+        return self._keyTemplate % args
+
+    def cachedValue(self, configuration, args=()):
+        """
+        :param configuration: The connection's configurationStore
+        :type configuration: configurationStore
+        :param args: The values of the base's fields
+        :type args: tuple
+        :return: The value the setting was last written with or read back as, or None if it isn't known
+        """
+        return configuration.values.get(self._keyTemplate % args)
+
+    def cacheValue(self, configuration, args, value):
+        """
+        Shadows the setting's value, as its getter returns it.
+        :param configuration: The connection's configurationStore
+        :type configuration: configurationStore
+        :param args: The values of the base's fields
+        :type args: tuple
+        :param value: The value
+        """
+
+        if self.cached:
+            configuration.values[self._keyTemplate % args] = value
+
+    def cacheWrite(self, configuration, args, value):
+        """
+        Shadows the value the setting has just been written with, converted the way a reply carrying it would be. A
+        value that doesn't convert leaves the setting's value unknown.
+        :param configuration: The connection's configurationStore
+        :type configuration: configurationStore
+        :param args: The values of the base's fields
+        :type args: tuple
+        :param value: The value, as passed to the setter
+        """
+
+        if self.cached:
+            self._shadowWrite(configuration.values, self._keyTemplate % args, value)
+
+    def _shadowWrite(self, values, key, value):
+
+        try:
+            values[key] = self.value("%s" % (value,), 0)
+        except (ValueError, RuntimeError):
+            values.pop(key, None)
+
+
+def query(request, reply, value=text):
+    """A command that reads a value."""
+    return binhoCommand(request, reply, value)
+
+
+def action(request, reply=OK_REPLY, replay=None, forgets=None):
+    """A command that just succeeds, or returns its reply as it is if reply is None."""
+    return binhoCommand(request, reply, replay=replay, forgets=forgets)
+
+
+def setting(base, value=text, replay=True, cached=True):
+    """A setting that can be read and written."""
+    return binhoSetting(base, value, replay, cached)
+
+
+CORE_COMMANDS = {
+    "deviceID": query("+ID", "-ID"),
+    "firmwareVersion": query("+FWVER", "-FWVER"),
+    "hardwareVersion": query("+HWVER", "-HWVER"),
+    "commandVersion": query("+CMDVER", "-CMDVER"),
+    "resetToBtldr": action("+BTLDR"),
+    "reset": action("+RESET"),
+    "ping": action("+PING"),
+    "operationMode": setting("+MODE {index}"),
+    "numericalBase": setting("+BASE"),
+    "setLEDRGB": action("+LED {red} {green} {blue}"),
+    "setLEDColor": action("+LED {color}"),
+}
+
+IO_COMMANDS = {
+    "mode": setting("IO{index} MODE"),
+    "pwmFrequency": setting("IO{index} PWMFREQ", integer),
+    "interruptSource": setting("IO{index} INT"),
+    # An input's value changes by itself, so it is always read from the device.
+    "value": setting("IO{index} VALUE", ioValue, cached=False),
+}
+
+SPI_COMMANDS = {
+    "clockFrequency": setting("SPI{index} CLK", integer),
+    "bitOrder": setting("SPI{index} ORDER"),
+    "mode": setting("SPI{index} MODE", integer),
+    "bitsPerTransfer": setting("SPI{index} TXBITS", integer),
+    "begin": action("SPI{index} BEGIN", replay="SPI{index} BEGIN"),
+    "transfer": query("SPI{index} TXRX {data}", "-SPI{index} RXD", hexPayload),
+    "writeToReadFrom": query("SPI{index} WHR 0 {count} {data}", "-SPI{index} RXD", hexPayload),
+    "_writeOnly": action("SPI{index} WHR 1 {count} {data}"),
+    "end": action("SPI{index} END", forgets="SPI{index} BEGIN"),
+}
+
+I2C_COMMANDS = {
+    "clockFrequency": setting("I2C{index} CLK", integer),
+    "usePullups": setting("I2C{index} PULL"),
+    "addressBits": setting("I2C{index} ADDR", addressBits),
+    "scanAddress": action("I2C{i2cIndex} SCAN {address}", None),
+    "write": action("I2C{index} WRITE {address} {register}{data}"),
+    "writeByte": action("I2C{index} WRITE {data}"),
+    "readByte": query("I2C{index} REQ {address} 1", "-I2C{index} RXD", hexInteger),
+    "readBytes": query("I2C{index} REQ {address} {numBytes}", "-I2C{index} RXD", hexPayload),
+    "writeToReadFrom": query(
+        "I2C{index} WHR {address} {stop} {readCount} {writeCount} {data}", "-I2C{index} RXD", hexPayload
+    ),
+    "_writeOnly": action("I2C{index} WHR {address} {stop} 0 {writeCount} {data}"),
+    "start": action("I2C{index} START {address}"),
+    "end": action("I2C{index} END"),
+    "_endRepeat": action("I2C{index} END R"),
+    # The target mode commands address the I2C peripheral explicitly and return the device's reply as it is.
+    "setSlaveAddressI2C": action("I2C{i2cIndex} SLAVE {address}", None),
+    "getSlaveAddressI2C": action("I2C{i2cIndex} SLAVE ?", None),
+    "setSlaveRegisterI2C": action("I2C{i2cIndex} SLAVE REG {register} {value}", None),
+    "getSlaveRegisterI2C": action("I2C{i2cIndex} SLAVE REG {register} ?", None),
+    "setSlaveReadMaskI2C": action("I2C{i2cIndex} SLAVE READMASK {register} {value}", None),
+    "getSlaveReadMaskI2C": action("I2C{i2cIndex} SLAVE READMASK {register} ?", None),
+    "setSlaveWriteMaskI2C": action("I2C{i2cIndex} SLAVE WRITEMASK {register} {value}", None),
+    "getSlaveWriteMaskI2C": action("I2C{i2cIndex} SLAVE WRITEMASK {register} ?", None),
+    "setSlaveModeI2C": action("I2C{i2cIndex} SLAVE MODE {mode}", None),
+    "getSlaveModeI2C": action("I2C{i2cIndex} SLAVE MODE ?", None),
+    "setSlaveRegisterCount": action("I2C{i2cIndex} SLAVE REGCNT {registerCount}", None),
+    "getSlaveRegisterCount": action("I2C{i2cIndex} SLAVE REGCNT ?", None),
+}
+
+# The 1-Wire driver takes its index per call, so all of its methods are written by hand.
+ONEWIRE_COMMANDS = {
+    "begin": action("1WIRE{index} BEGIN {pin}", None, replay="1WIRE{index} BEGIN"),
+    "_beginPullup": action("1WIRE{index} BEGIN {pin} PULL", None, replay="1WIRE{index} BEGIN"),
+    "reset": action("1WIRE{index} RESET", None),
+    "writeByte": action("1WIRE{index} WRITE {data}", None),
+    "_writeBytePowered": action("1WIRE{index} WRITE {data} POWER", None),
+    "readByte": query("1WIRE{index} READ", "-1WIRE{index} READ", hexInteger),
+    "exchangeBytes": query(
+        "1WIRE{index} WHR {command} {readCount} {writeCount} {data}", "-1WIRE{index} RXD", hexPayload
+    ),
+    "_exchangeWriteOnly": action("1WIRE{index} WHR {command} 0 {writeCount} {data}"),
+    "select": action("1WIRE{index} SELECT", None),
+    "skip": action("1WIRE{index} SKIP", None),
+    "depower": action("1WIRE{index} DEPOWER", None),
+    "getAddress": query("1WIRE{index} ADDR ?", "-1WIRE{index} ADDR", hexAddress),
+    "search": action("1WIRE{index} SEARCH", None),
+    "_searchAlarming": action("1WIRE{index} SEARCH COND", None),
+    "resetSearch": action("1WIRE{index} SEARCH RESET", None),
+    "targetSearch": action("1WIRE{index} SEARCH {target}", None),
+}
+
+
+# Patterns matching the request lines of the commands whose replies are just an acknowledgement, and of those whose
+# replies carry something the caller reads, compiled on first use by answersWithValue().
+_ACKNOWLEDGED = None
+_ANSWERED = None
+
+
+def _requestPattern(command):
+    parts = _FIELD.split(command.request)
+    # split() leaves the literal text at the even positions and the field names at the odd ones.
+    return "".join(re.escape(part) if number % 2 == 0 else ".*?" for number, part in enumerate(parts))
+
+
+def _compileReplyPatterns():
+
+    acknowledged = []
+    answered = []
+
+    for table in (CORE_COMMANDS, IO_COMMANDS, SPI_COMMANDS, I2C_COMMANDS, ONEWIRE_COMMANDS):
+        for entry in table.values():
+            for command in (entry.query, entry.assign) if isinstance(entry, binhoSetting) else (entry,):
+                # Commands that configure the device are acknowledged, even those whose reply is returned as it is.
+                if command.reply == OK_REPLY or command.replay is not None:
+                    acknowledged.append(_requestPattern(command))
+                else:
+                    answered.append(_requestPattern(command))
+
+    return re.compile(r"(?:%s)\Z" % "|".join(acknowledged)), re.compile(r"(?:%s)\Z" % "|".join(answered))
+
+
+def answersWithValue(command):
+    """
+    :param command: A request line, e.g. "SPI0 CLK ?"
+    :type command: str
+    :return: True if the reply to the command carries a value the caller reads, rather than just acknowledging it.
+        Commands not in the tables are taken to be acknowledged.
+    :rtype: bool
+    """
+
+    global _ACKNOWLEDGED, _ANSWERED  # pylint: disable=global-statement
+
+    if command.endswith(" ?"):
+        return True
+
+    if _ACKNOWLEDGED is None:
+        _ACKNOWLEDGED, _ANSWERED = _compileReplyPatterns()
+
+    if _ACKNOWLEDGED.match(command):
+        return False
+
+    return _ANSWERED.match(command) is not None
+
+
+def _capitalized(name):
+    return name[:1].upper() + name[1:]
+
+
+# Grammars simple enough to be written into the generated methods, for str replies.
+_INLINE_VALUES = {text: "response[{}:]", integer: "int(response[{}:])"}
+
+
+def _fail(response, prefix):
+    raise RuntimeError(f'Error Binho responded with {text(response, 0)}, not the expected "{text(prefix, 0)}"')
+
+
+def _makeMethod(command, index, asynchronous):
+    """
+    Compiles a driver method for a command. Like namedtuple and dataclasses, the method's source is generated and
+    compiled once, with the command's format string, reply prefix and value grammar bound as constants, so that a call
+    does no more work than a hand-written method would: format the request, send it, check the reply's prefix and
+    convert the value that follows it.
+    """
+
+    params = command.fields[1:] if command.indexed else command.fields
+    args = "".join(field + ", " for field in command.fields)
+    binary = command.binary and not asynchronous
+
+    lines = [f"{'async def' if asynchronous else 'def'} method(self, {', '.join(params)}):"]
+
+    if command.indexed:
+        lines.append(f"    {INDEX_FIELD} = self.{index}")
+
+    if asynchronous:
+        lines.append(f"    response = await self.usb.command(_template % ({args}))")
+    else:
+        lines.append(f"    self.usb.sendCommand(_template % ({args}))")
+        lines.append(f"    response = self.usb.{'readResponseBytes' if binary else 'readResponse'}()")
+
+    if command.configures:
+        # Only reached if the reply checks out below; commands returning their reply as it is check it themselves.
+        remember = f"    _remember(self.usb.configuration, ({args}){', response' if command.reply is None else ''})"
+
+    if command.reply is None:
+        if command.configures:
+            lines.append(remember)
+        lines.append("    return response")
+    else:
+        replyArgs = "".join(field + ", " for field in command.fields[: command._replyArity])
+        lines.append(f"    prefix = _prefixes.get(({replyArgs}))")
+        lines.append("    if prefix is None:")
+        lines.append(f"        prefix = _expectedPrefix(({replyArgs}), {binary})")
+        lines.append("    if not response.startswith(prefix):")
+        lines.append("        _fail(response, prefix)")
+        if command.configures:
+            lines.append(remember)
+        if command.value is None:
+            lines.append("    return True")
+        elif command.value in _INLINE_VALUES and not binary:
+            lines.append("    return " + _INLINE_VALUES[command.value].format("len(prefix) + 1"))
+        else:
+            lines.append("    return _value(response, len(prefix) + 1)")
+
+    namespace = {
+        "_template": command._template,
+        "_prefixes": command._bytePrefixes if binary else command._prefixes,
+        "_expectedPrefix": command.expectedPrefix,
+        "_fail": _fail,
+        "_value": command.value,
+        "_remember": command.remember,
+    }
+    exec("\n".join(lines), namespace)  # pylint: disable=exec-used
+
+    method = namespace["method"]
+    method.__doc__ = f'Sends "{command.request}".'
+
+    return method
+
+
+def _cachedAccessors(entry, getter, setter, index, asynchronous):
+    """
+    Wraps a setting's generated getter and setter in its shadow: the getter answers from the shadow when the value is
+    known, and the setter skips writing the value the setting already has.
+    """
+
+    keyTemplate = entry._keyTemplate
+    indexed = entry.query.indexed
+    store = entry._shadowWrite
+
+    def keyOf(driver):
+        return keyTemplate % ((getattr(driver, index),) if indexed else ())
+
+    if asynchronous:
+
+        async def getCached(self):
+            values = self.usb.configuration.values
+            key = keyOf(self)
+            value = values.get(key)
+            if value is None:
+                value = values[key] = await getter(self)
+            return value
+
+        async def setCached(self, value):
+            values = self.usb.configuration.values
+            key = keyOf(self)
+            if key in values and values[key] == value:
+                return True
+            result = await setter(self, value)
+            store(values, key, value)
+            return result
+
+    else:
+
+        def getCached(self):
+            values = self.usb.configuration.values
+            key = keyOf(self)
+            value = values.get(key)
+            if value is None:
+                value = values[key] = getter(self)
+            return value
+
+        def setCached(self, value):
+            values = self.usb.configuration.values
+            key = keyOf(self)
+            if key in values and values[key] == value:
+                return True
+            result = setter(self, value)
+            store(values, key, value)
+            return result
+
+    getCached.__doc__ = getter.__doc__
+    setCached.__doc__ = setter.__doc__
+
+    return getCached, setCached
+
+
+def _generate(cls, table, index, asynchronous):
+
+    # Members the class defines itself take precedence over the generated ones.
+    defined = set(vars(cls))
+
+    def add(name, member):
+
+        if name in defined:
+            return
+
+        for function in (member.fget, member.fset) if isinstance(member, property) else (member,):
+            if function is not None:
+                function.__name__ = name
+                function.__qualname__ = f"{cls.__qualname__}.{name}"
+
+        setattr(cls, name, member)
+
+    for name, entry in table.items():
+
+        if name.startswith("_"):
+            continue
+
+        if isinstance(entry, binhoSetting):
+            getter = _makeMethod(entry.query, index, asynchronous)
+            setter = _makeMethod(entry.assign, index, asynchronous)
+
+            if entry.cached:
+                getter, setter = _cachedAccessors(entry, getter, setter, index, asynchronous)
+
+            if asynchronous:
+                add("get" + _capitalized(name), getter)
+                add("set" + _capitalized(name), setter)
+            else:
+                add(name, property(getter, setter, doc=f'The "{entry.base}" setting.'))
+
+            continue
+
+        # Queries that take no arguments besides the index read like settings.
+        reading = entry.value is not None and len(entry.fields) == int(entry.indexed)
+
+        if reading and asynchronous:
+            add("get" + _capitalized(name), _makeMethod(entry, index, True))
+        elif reading:
+            add(name, property(_makeMethod(entry, index, False), doc=f'Sends "{entry.request}".'))
+        else:
+            add(name, _makeMethod(entry, index, asynchronous))
+
+    return cls
+
+
+def commandMethods(table, index=None):
+    """
+    Class decorator that adds the members of a command table to a sync driver that doesn't define them itself:
+    settings and argument-less queries become properties, and other commands methods taking the values of the
+    command's fields, in order.
+    :param table: The command table
+    :type table: dict
+    :param index: The driver's attribute holding the value of the index field
+    :type index: str
+    """
+    return lambda cls: _generate(cls, table, index, False)
+
+
+def asyncCommandMethods(table, index=None):
+    """
+    Like commandMethods(), but for an async driver: settings become get...() and set...() coroutines, argument-less
+    queries get...() coroutines, and other commands coroutines of the same name.
+    """
+    return lambda cls: _generate(cls, table, index, True)
@@ -1,13 +1,207 @@
 import os
+import codecs
+import re
 import enum
+import collections
+import contextlib
 import threading
 import queue
+import select
 import signal
+import socket
+import stat
+import struct
 import sys
+import tempfile
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
 import serial
 
+from . import trace
+from .commands import CORE_COMMANDS, answersWithValue, commandVerb
+from .configuration import configurationStore
+from .events import interruptEvents
+from .fairqueue import fairQueue
+from .framer import lineFramer
+from .hexcodec import decimalEncode, hexEncode
+from .recording import RX_LINE, sessionRecorder
+from .stats import commsStats
+from .timeouts import responseTimeouts
+
 SERIAL_TIMEOUT = 0.5
 
+# Default number of pipelined commands that may be awaiting a reply at once.
+PIPELINE_DEPTH = 32
+
+# First byte of interrupt notifications and of command responses.
+_INTERRUPT_PREFIX = ord("!")
+_RESPONSE_PREFIX = ord("-")
+
+# Seconds a supervised connection keeps looking for its device after losing it, and the pause between attempts.
+RECONNECT_TIMEOUT = 10.0
+RECONNECT_INTERVAL = 0.5
+
+# Prefix that names a binho serve socket explicitly in place of a serial port, e.g. "unix:/tmp/nova.sock".
+DAEMON_PORT_PREFIX = "unix:"
+
+
+def _ownedByUs(uid):
+    return not hasattr(os, "getuid") or uid == os.getuid()
+
+
+def _isPrivateDirectory(path):
+
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+
+    return stat.S_ISDIR(info.st_mode) and _ownedByUs(info.st_uid) and not info.st_mode & 0o077
+
+
+def daemonSocketDirectory(create=False):
+    """
+    Returns the directory that holds the sockets of `binho serve`: $XDG_RUNTIME_DIR, or else a binho-<uid> directory
+    in the temporary directory, made with mode 0700. Either way only the user can reach the sockets in it, so no other
+    user can put a socket of their own where binhoComms looks for the daemon.
+    :param create: Whether to make the directory if it doesn't exist yet
+    :type create: bool
+    :raises binhoException: if the directory belongs to another user, or other users can get into it
+    :return: The directory, or None if it doesn't exist and create is False
+    :rtype: str
+    """
+
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+
+    if runtime and _isPrivateDirectory(runtime):
+        return runtime
+
+    name = "binho-" + str(os.getuid()) if hasattr(os, "getuid") else "binho"
+    path = os.path.join(tempfile.gettempdir(), name)
+
+    if not os.path.lexists(path):
+        if not create:
+            return None
+
+        try:
+            os.mkdir(path, 0o700)
+        except FileExistsError:
+            pass
+
+    if not _isPrivateDirectory(path):
+        raise binhoException(f"{path} belongs to another user or is open to them; not using it for binho serve")
+
+    return path
+
+
+def daemonSocketPath(serialPort, create=False):
+    """
+    Returns the Unix socket on which `binho serve` shares the given serial port.
+    :param serialPort: The serial port, or a "unix:" socket path
+    :type serialPort: str
+    :param create: Whether to make the directory that holds the socket if it doesn't exist yet
+    :type create: bool
+    :raises binhoException: if the directory that holds the socket isn't private to the user
+    :return: The path of the socket, or None if its directory doesn't exist and create is False
+    :rtype: str
+    """
+
+    if serialPort.startswith(DAEMON_PORT_PREFIX):
+        return serialPort[len(DAEMON_PORT_PREFIX) :]
+
+    directory = daemonSocketDirectory(create)
+
+    if directory is None:
+        return None
+
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", serialPort).strip("_")
+    return os.path.join(directory, "binho-" + name + ".sock")
+
+
+def peerUid(connection):
+    """
+    :param connection: A connected Unix socket
+    :type connection: socket.socket
+    :return: The user ID of the process at the other end, or None if the platform can't tell
+    :rtype: int
+    """
+
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+
+    credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", credentials)[1]
+
+
+def isTrustedDaemon(connection, path):
+    """
+    Checks that a socket connected to a `binho serve` daemon is served by the same user, so that another user can't
+    intercept or forge the traffic to the device.
+    :param connection: The connected socket
+    :type connection: socket.socket
+    :param path: The path it is connected to
+    :type path: str
+    :rtype: bool
+    """
+
+    uid = peerUid(connection)
+
+    if uid is None:
+        # Where the peer can't be asked, the owner of the socket file stands in for it.
+        try:
+            info = os.lstat(path)
+        except OSError:
+            return False
+
+        uid = info.st_uid
+
+    return _ownedByUs(uid)
+
+
+def findDaemon(serialPort):
+    """
+    Checks whether a `binho serve` daemon run by the same user is sharing the given serial port.
+    :param serialPort: The serial port, or a "unix:" socket path
+    :type serialPort: str
+    :return: The path of the daemon's socket, or None if no trusted daemon is listening
+    :rtype: str
+    """
+
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+
+    try:
+        path = daemonSocketPath(serialPort)
+    except binhoException:
+        return None
+
+    if path is None:
+        return None
+
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return None
+
+    if not stat.S_ISSOCK(info.st_mode) or not _ownedByUs(info.st_uid):
+        return None
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        probe.connect(path)
+
+        if not isTrustedDaemon(probe, path):
+            return None
+    except OSError:
+        # A socket left behind by a daemon that is no longer running.
+        return None
+    finally:
+        probe.close()
+
+    return path
+
 
 class SerialPortManager(threading.Thread):
 
@@ -18,6 +212,19 @@ class SerialPortManager(threading.Thread):
     stopper = None
     inBridgeMode = False
 
+    # On POSIX hosts the serial port is a real file descriptor, so the thread can sleep in select() until the
+    # device sends something or a command is queued. Other platforms fall back to polling the port.
+    USE_SELECT = os.name == "posix"
+
+    # Upper bound on how long select() sleeps before re-checking the stopper.
+    IDLE_TIMEOUT = 0.5
+
+    # Queued commands are coalesced into a single write of at most MAX_BATCH commands, so that commands queued
+    # together share one USB transaction. FLUSH_DEADLINE is how long (in seconds) a partial batch may be held back
+    # waiting for more commands; 0 writes as soon as the queue is empty.
+    MAX_BATCH = 64
+    FLUSH_DEADLINE = 0.0
+
     def __init__(self, serialPort, txdQueue, rxdQueue, intQueue, stopper):  # pylint: disable=too-many-arguments
         super().__init__()
         self.serialPort = serialPort
@@ -27,48 +234,296 @@ class SerialPortManager(threading.Thread):
         self.stopper = stopper
         self.exception = None
         self.daemon = True
+        self.maxBatch = self.MAX_BATCH
+        self.flushDeadline = self.FLUSH_DEADLINE
+
+        # Coalescing counters; commandsPerWrite is their ratio.
+        self.writeCount = 0
+        self.commandsWritten = 0
+
+        # One entry per command written to the device, in wire order. The device answers commands strictly in
+        # order, so each '-' response belongs to the oldest entry: either the Future of the command, or None for a
+        # command whose reply nobody owns, which is left on rxdQueue.
+        # Each txdQueue item is a (text, replies) pair, where replies holds one such entry per line of text.
+        self.awaiting = collections.deque()
+
+        # When the last response arrived, on the time.perf_counter() clock: the moment the device moved on to the
+        # command at the head of awaiting.
+        self.lastReplyTime = 0.0
+
+        # Received data is framed into lines as raw bytes; responses are delivered undecoded.
+        self.framer = lineFramer()
+
+        # A sessionRecorder that every line written and received is logged to, if any.
+        self.recorder = None
+
+        # The interruptEvents that interrupt notifications are posted to as they arrive, if any.
+        self.events = None
+
+        self._wakeupReader = None
+        self._wakeupWriter = None
+
+        if self.USE_SELECT:
+            self._wakeupReader, self._wakeupWriter = os.pipe()
+            os.set_blocking(self._wakeupReader, False)
+            os.set_blocking(self._wakeupWriter, False)
+
+    def _openPort(self):
+        return serial.Serial(self.serialPort, baudrate=1000000, timeout=0.025, write_timeout=0.05)
 
     def run(self):
 
         try:
-            comport = serial.Serial(self.serialPort, baudrate=1000000, timeout=0.025, write_timeout=0.05)
-        except BaseException:
+            comport = self._openPort()
+        except BaseException as e:  # pylint: disable=broad-except
             self.stopper.set()
+            self.exception = e
+            self._closeWakeupPipe()
+            return
 
-        while not self.stopper.is_set():  # pylint: disable=too-many-nested-blocks
+        try:
+            if self.USE_SELECT:
+                self._runEventDriven(comport)
+            else:
+                self._runPolling(comport)
+        finally:
+            comport.close()
+            self._closeWakeupPipe()
+            self._failPending()
+
+    def _runEventDriven(self, comport):
+
+        fd = comport.fileno()
+        waitList = [fd, self._wakeupReader]
+
+        while not self.stopper.is_set():
 
             try:
-                if self.inBridgeMode:
+                # Only sleep when there is nothing left to send; select() returns as soon as the device has data
+                # for us or wakeup() has been called by a thread that queued a command.
+                timeout = self.IDLE_TIMEOUT if self.txdQueue.empty() else 0
+                readable, _, _ = select.select(waitList, [], [], timeout)
 
-                    if comport.in_waiting > 0:
-                        receivedData = comport.read().decode("utf-8")
-                        self.rxdQueue.put(receivedData)
+                if self._wakeupReader in readable:
+                    self._drainWakeupPipe()
 
-                    if not self.txdQueue.empty():
-                        serialData = self.txdQueue.get()
-                        comport.write(serialData.encode("utf-8"))
-                else:
+                if fd in readable:
+                    self._receiveFromFd(fd)
 
-                    if comport.in_waiting > 0:
-                        receivedData = comport.readline().strip().decode("utf-8")
+                self._serviceTransmit(comport)
 
-                        if len(receivedData) > 0:
+            except Exception as e:  # pylint: disable=broad-except
+                self.stopper.set()
+                self.exception = e
 
-                            if receivedData[0] == "!":
-                                self.intQueue.put(receivedData)
-                            elif receivedData[0] == "-":
-                                self.rxdQueue.put(receivedData)
+    def _runPolling(self, comport):
 
-                    if not self.txdQueue.empty():
-                        serialCommand = self.txdQueue.get() + "\n"
-                        comport.write(serialCommand.encode("utf-8"))
+        while not self.stopper.is_set():
+
+            try:
+                self._serviceReceive(comport)
+                self._serviceTransmit(comport)
 
             except Exception as e:  # pylint: disable=broad-except
                 self.stopper.set()
                 self.exception = e
                 # print('Comm Error!')
 
-        comport.close()
+    def _receiveFromFd(self, fd):
+
+        # One read takes everything the port has buffered, however many lines that is.
+        if self.inBridgeMode:
+            data = os.read(fd, 65536)
+            count = len(data)
+            if count:
+                self.rxdQueue.put(data)
+        else:
+            count = self.framer.readFrom(fd)
+            self._dispatchLines()
+
+        if count == 0:
+            raise serial.SerialException("device reports readiness to read but returned no data")
+
+    def _serviceReceive(self, comport):
+
+        waiting = comport.in_waiting
+
+        if waiting > 0:
+            self._receive(comport.read(waiting))
+
+    def _receive(self, data):
+
+        if self.inBridgeMode:
+            self.rxdQueue.put(data)
+            return
+
+        self.framer.feed(data)
+        self._dispatchLines()
+
+    def _dispatchLines(self):
+
+        for line in self.framer.lines():
+            self._handleLine(bytes(line).strip())
+
+    def _handleLine(self, receivedData):
+
+        # Lines stay as bytes until someone asks for text; interrupts are rare and compared as strings.
+        if len(receivedData) > 0:
+
+            if self.recorder is not None:
+                self.recorder.record(RX_LINE, receivedData)
+
+            if receivedData[0] == _INTERRUPT_PREFIX:
+                interrupt = receivedData.decode("utf-8")
+                self.intQueue.put(interrupt)
+                if self.events is not None:
+                    self.events.post(interrupt)
+            elif receivedData[0] == _RESPONSE_PREFIX:
+                self._dispatchResponse(receivedData)
+
+    def _dispatchResponse(self, response):
+
+        future = self.awaiting.popleft() if self.awaiting else None
+        startTime = self.lastReplyTime
+        self.lastReplyTime = time.perf_counter()
+
+        if future is None:
+            self.rxdQueue.put(response)
+        else:
+            # The device couldn't start on the command before it had answered the one ahead of it.
+            future.startTime = startTime
+            future.set_result(response)
+
+    def headOfQueue(self):
+        """
+        :return: The entry in awaiting for the command the device is working on, or None if it has answered every
+            command written, and the time it started on that command if it was already written by then
+        :rtype: tuple
+        """
+
+        try:
+            head = self.awaiting[0]
+        except IndexError:
+            head = None
+
+        return head, self.lastReplyTime
+
+    def _serviceTransmit(self, comport):
+
+        if self.inBridgeMode:
+            while not self.txdQueue.empty():
+                serialData, _ = self.txdQueue.get()
+                data = serialData.encode("utf-8")
+                comport.write(data)
+                if self.recorder is not None:
+                    self.recorder.recordWrite(data)
+            return
+
+        while not self.txdQueue.empty():
+
+            chunks = []
+            commands = 0
+            # The Futures written, if their write times are wanted for a trace.
+            written = [] if trace.activeTracer is not None else None
+            deadline = time.monotonic() + self.flushDeadline
+
+            while commands < self.maxBatch:
+
+                remaining = deadline - time.monotonic()
+
+                try:
+                    if remaining > 0:
+                        serialData, replies = self.txdQueue.get(timeout=remaining)
+                    else:
+                        serialData, replies = self.txdQueue.get_nowait()
+                except queue.Empty:
+                    break
+
+                # A sendBatch() entry is never split, so a single entry may take the write past maxBatch.
+                self.awaiting.extend(replies)
+                chunks.append(serialData)
+                commands += len(replies)
+
+                if written is not None:
+                    written.extend(replies)
+
+            if not chunks:
+                break
+
+            chunks.append("")
+            data = "\n".join(chunks).encode("utf-8")
+            comport.write(data)
+
+            if self.recorder is not None:
+                self.recorder.recordWrite(data)
+
+            if written:
+                writeTime = time.perf_counter()
+                for future in written:
+                    future.writeTime = writeTime
+
+            self.writeCount += 1
+            self.commandsWritten += commands
+
+    def _failPending(self):
+
+        error = binhoException("Connection with device lost")
+
+        while self.awaiting:
+            future = self.awaiting.popleft()
+            if future is not None:
+                future.set_exception(error)
+
+        while not self.txdQueue.empty():
+            _, replies = self.txdQueue.get()
+            for future in replies:
+                if future is not None:
+                    future.set_exception(error)
+
+    def _drainWakeupPipe(self):
+
+        try:
+            while os.read(self._wakeupReader, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _closeWakeupPipe(self):
+
+        for fd in (self._wakeupReader, self._wakeupWriter):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+        self._wakeupReader = None
+        self._wakeupWriter = None
+
+    def wakeup(self):
+        """Interrupts the thread's select() so that newly queued data is written immediately."""
+
+        if self._wakeupWriter is None:
+            return
+
+        try:
+            os.write(self._wakeupWriter, b"\x00")
+        except OSError:
+            # A full pipe already guarantees a pending wakeup; a closed one means the thread has exited.
+            pass
+
+    def createFuture(self):
+        """Returns a Future that this manager will resolve with a response."""
+        return Future()
+
+    @property
+    def commandsPerWrite(self):
+        """The average number of commands sent per write to the port."""
+
+        if not self.writeCount:
+            return 0.0
+
+        return self.commandsWritten / self.writeCount
 
     def get_exception(self):
         return self.exception
@@ -80,6 +535,187 @@ class SerialPortManager(threading.Thread):
         self.inBridgeMode = False
 
 
+class DirectPortManager(SerialPortManager):
+    """
+    Threadless alternative to SerialPortManager. Commands are written by the thread that queues them, and responses
+    are read by the thread that waits for them, which removes two thread handoffs per command. Interrupt lines are
+    still routed to the interrupt queue whenever the port is read.
+    """
+
+    # No thread ever blocks in select(), so there is nothing to wake up.
+    USE_SELECT = False
+
+    # The longest a single read of the port blocks. Reads are repeated until the caller's deadline, so the port's
+    # timeout, which costs a system call to change, only has to be changed for the last stretch before a deadline.
+    READ_SLICE = 0.05
+
+    def __init__(self, serialPort, txdQueue, rxdQueue, intQueue, stopper):  # pylint: disable=too-many-arguments
+        super().__init__(serialPort, txdQueue, rxdQueue, intQueue, stopper)
+        self._comport = None
+        self._readTimeout = None
+        self._lock = threading.RLock()
+
+    def start(self):
+
+        try:
+            self._comport = self._openPort()
+            self._readTimeout = self._comport.timeout
+        except BaseException as e:  # pylint: disable=broad-except
+            self.stopper.set()
+            self.exception = e
+
+    def is_alive(self):
+
+        return self._comport is not None and not self.stopper.is_set()
+
+    def join(self, timeout=None):  # pylint: disable=unused-argument
+
+        with self._lock:
+            if self._comport is not None:
+                self._comport.close()
+                self._comport = None
+
+            self._failPending()
+
+    def _fail(self, e):
+
+        self.stopper.set()
+        self.exception = e
+        self.join()
+
+    def wakeup(self):
+        """Writes any queued commands from the calling thread."""
+
+        with self._lock:
+            if not self.is_alive():
+                return
+
+            try:
+                self._serviceTransmit(self._comport)
+            except Exception as e:  # pylint: disable=broad-except
+                self._fail(e)
+
+    def pumpUntil(self, condition, timeout):
+        """
+        Reads from the port on the calling thread, dispatching responses and interrupts, until condition() is true.
+        :param condition: Callable checked after every read
+        :type condition: callable
+        :param timeout: Seconds to keep reading, or None to wait indefinitely
+        :type timeout: float
+        :return: True if the condition was met, False on timeout or if the connection was lost
+        :rtype: bool
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._lock:
+            while not condition():
+
+                if not self.is_alive():
+                    return False
+
+                readTimeout = self.READ_SLICE
+
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    readTimeout = min(readTimeout, remaining)
+
+                try:
+                    # Setting the timeout reconfigures the port, which fails like a read once the device has gone.
+                    if readTimeout != self._readTimeout:
+                        self._comport.timeout = readTimeout
+                        self._readTimeout = readTimeout
+
+                    # Blocks only until the first byte arrives, then takes whatever else is already waiting.
+                    data = self._comport.read(1)
+                    if data and self._comport.in_waiting:
+                        data += self._comport.read(self._comport.in_waiting)
+                except Exception as e:  # pylint: disable=broad-except
+                    self._fail(e)
+                    return False
+
+                if data:
+                    self._receive(data)
+
+            return True
+
+    def poll(self):
+        """Dispatches anything the device has already sent, without waiting."""
+
+        with self._lock:
+            if not self.is_alive():
+                return
+
+            try:
+                waiting = self._comport.in_waiting
+                if waiting:
+                    self._receive(self._comport.read(waiting))
+            except Exception as e:  # pylint: disable=broad-except
+                self._fail(e)
+
+    def createFuture(self):
+        return _directFuture(self)
+
+
+class SocketPortManager(SerialPortManager):
+    """
+    Transport that talks to a `binho serve` daemon over its Unix socket instead of opening the serial port. The
+    daemon speaks the device's own line protocol, so everything but opening the connection is inherited.
+    """
+
+    # Sockets are always selectable, and the polling loop relies on serial-only calls.
+    USE_SELECT = True
+
+    def _openPort(self):
+        return _socketPort(self.serialPort)
+
+    def startUartBridge(self):
+        raise binhoException("The UART bridge is not available through binho serve")
+
+
+class _socketPort:
+    """The part of the serial.Serial interface used by SerialPortManager, backed by a Unix socket."""
+
+    def __init__(self, path):
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            self._socket.connect(path)
+        except OSError:
+            self._socket.close()
+            raise
+
+        if not isTrustedDaemon(self._socket, path):
+            self._socket.close()
+            raise binhoException(f"The binho serve socket {path} is served by another user")
+
+    def fileno(self):
+        return self._socket.fileno()
+
+    def write(self, data):
+        self._socket.sendall(data)
+
+    def close(self):
+        self._socket.close()
+
+
+class _directFuture(Future):
+    """A Future whose result() reads the port itself, for use with DirectPortManager."""
+
+    def __init__(self, manager):
+        super().__init__()
+        self._manager = manager
+
+    def result(self, timeout=None):
+
+        self._manager.pumpUntil(self.done, timeout)
+
+        return super().result(timeout=0)
+
+
 class SignalHandler:
     """
     The object that will handle signals and stop the worker threads.
@@ -101,6 +737,7 @@ class SignalHandler:
         https://docs.python.org/3/library/signal.html#signal.signal
         """
         self.stopper.set()
+        self.manager.wakeup()
 
         self.manager.join()
 
@@ -109,6 +746,7 @@ class SignalHandler:
     def sendStop(self):
 
         self.stopper.set()
+        self.manager.wakeup()
 
         self.manager.join()
 
@@ -117,6 +755,23 @@ class binhoException(Exception):
     pass
 
 
+# The outcome of one command sent as part of a batch.
+batchResult = collections.namedtuple("batchResult", ["command", "response", "success"])
+
+
+class commandBatch:
+    """Commands collected by binhoComms.batch(), and their results once the batch has been sent."""
+
+    def __init__(self):
+        self.commands = []
+        self.results = []
+
+    @property
+    def succeeded(self):
+        """True if every command in the batch was acknowledged by the device."""
+        return all(result.success for result in self.results)
+
+
 class oneWireCmd(enum.Enum):
     """Enum for exchangeBytes1WIRE"""
 
@@ -126,9 +781,19 @@ class oneWireCmd(enum.Enum):
 
 
 class binhoComms:
-    def __init__(self, serialPort):
+    def __init__(self, serialPort, direct=False):
+        """
+        :param serialPort: The serial port the device is attached to
+        :type serialPort: str
+        :param direct: If True, skip the background transport thread; the calling thread writes each command and
+            reads its reply itself. This gives the lowest single-command latency. Ignored when the port is shared
+            by `binho serve`, in which case the connection always goes through the daemon's socket.
+        :type direct: bool
+        """
 
         self.serialPort = serialPort
+        self.direct = direct
+        self._directPort = False
         self.handler = None
         self.manager = None
         self.interrupts = None
@@ -136,6 +801,25 @@ class binhoComms:
         self._txdQueue = None
         self._rxdQueue = None
         self._intQueue = None
+        self._local = threading.local()
+        self._bridgeDecoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self._pipelineDepth = PIPELINE_DEPTH
+        self._window = threading.BoundedSemaphore(PIPELINE_DEPTH)
+        self._maxBatch = SerialPortManager.MAX_BATCH
+        self._flushDeadline = SerialPortManager.FLUSH_DEADLINE
+        self._stats = None
+        self._recorder = None
+        self._timeouts = responseTimeouts(SERIAL_TIMEOUT)
+
+        # Every interrupt notification, timestamped and in order. Kept across restarts, along with its subscribers.
+        self.events = interruptEvents()
+
+        # The configuration written through the drivers, replayed when a supervised connection is reopened.
+        self.configuration = configurationStore()
+        self.reconnectCount = 0
+        self._reconnect = None
+        self._reconnectLock = threading.RLock()
+
         self._debug = os.getenv("BINHO_NOVA_DEBUG")
 
     # Destructor
@@ -151,24 +835,499 @@ class binhoComms:
 
     def _checkInterrupts(self):
 
+        if self._directPort:
+            self.manager.poll()
+
         while not self._intQueue.empty():
             self.interrupts.add(self._intQueue.get())
 
     # Public functions
 
+    def _pendingReplies(self):
+
+        # Replies owed to this thread, oldest first. Keeping them per thread means that when several threads share
+        # the connection, readResponse() returns the answer to the calling thread's own sendCommand().
+        pending = getattr(self._local, "pending", None)
+
+        if pending is None:
+            pending = self._local.pending = collections.deque()
+
+        return pending
+
     def sendCommand(self, command):
         if self._debug is not None:
             print(command)
-        self._txdQueue.put(command, timeout=SERIAL_TIMEOUT)
+        batch = getattr(self._local, "batch", None)
+        if batch is not None:
+            # Its reply won't exist until the batch is flushed, and the caller is about to read it.
+            if answersWithValue(command):
+                raise binhoException(f'"{command}" returns a value, so it can\'t be sent inside a batch')
+            batch.commands.append(command)
+            return
+
+        future = self.manager.createFuture()
+        self._pendingReplies().append(future)
+
+        self._stampCommand(command, future)
+
+        if self._stats is not None:
+            self._trackCommand(command, future)
+
+        if trace.activeTracer is not None:
+            self._traceCommand(command, future, overlapping=False)
+
+        self._txdQueue.put((command, (future,)), timeout=SERIAL_TIMEOUT)
+        self.manager.wakeup()
+
+    def submit(self, command):
+        """
+        Queues a command without waiting for the device to answer it, so that several commands can be in flight
+        at once. Replies are matched to commands in the order the commands were sent.
+        :param command: The command to send, without the trailing newline
+        :type command: str
+        :raises binhoException: if no pipeline slot frees up within SERIAL_TIMEOUT
+        :return: A Future that resolves to the raw response line, as undecoded bytes
+        :rtype: concurrent.futures.Future
+        """
+
+        # Don't let more than pipelineDepth commands wait for a reply; this bounds how far we can get ahead
+        # of the device's input buffer.
+        window = self._window
+
+        if self._directPort:
+            # Nobody else reads the port in direct mode; slots only free up as we collect replies ourselves.
+            acquired = self.manager.pumpUntil(lambda: window.acquire(blocking=False), SERIAL_TIMEOUT)
+        else:
+            acquired = window.acquire(timeout=SERIAL_TIMEOUT)
+
+        if not acquired:
+            raise binhoException("Timed out waiting for a free pipeline slot")
+
+        future = self.manager.createFuture()
+        future.add_done_callback(lambda _: window.release())
+
+        self._stampCommand(command, future)
+
+        if self._stats is not None:
+            self._trackCommand(command, future)
+
+        if trace.activeTracer is not None:
+            self._traceCommand(command, future, overlapping=True)
+
+        if self._debug is not None:
+            print(command)
+
+        self._txdQueue.put((command, (future,)), timeout=SERIAL_TIMEOUT)
+        self.manager.wakeup()
+
+        return future
+
+    def pipeline(self, commands):
+        """
+        Sends a sequence of commands back-to-back and collects their responses, keeping up to pipelineDepth
+        commands in flight instead of paying a full round trip per command.
+        :param commands: The commands to send
+        :type commands: iterable of str
+        :return: The response to each command, in order. "[ERROR]" marks a command that was never answered.
+        :rtype: list of str
+        """
+
+        futures = [self.submit(command) for command in commands]
+
+        return [self.collect(future).decode("utf-8") for future in futures]
+
+    def collect(self, future, dropConnection=None):
+        """
+        Waits for the reply to a submitted command, treating a missing reply the way readResponse() does.
+
+        A reply that misses a learned deadline, which a stall on the host can cause as easily as the device, fails only
+        this command: the connection is kept, and the reply is matched to the command and dropped if it turns up later.
+        Only once the device has answered nothing for the fixed timeout is it taken to have stopped answering, and the
+        connection closed, or reopened and the command sent again if reconnecting is enabled.
+        :param future: A Future returned by submit()
+        :type future: concurrent.futures.Future
+        :param dropConnection: True to close the connection on any missed deadline, False to never close it, or None
+            to close it once the device has stopped answering
+        :type dropConnection: bool
+        :return: The raw response line, or b"[ERROR]" if it never arrived within the command's deadline
+        :rtype: bytes
+        """
+
+        timeouts = self._timeouts
+        command = getattr(future, "command", None)
+
+        if timeouts is None or command is None:
+            timeout = SERIAL_TIMEOUT
+        else:
+            timeout = timeouts.timeout(command)
+            # A reply that was in before we looked says nothing about how long the device took.
+            waited = not future.done()
+
+        try:
+            if timeouts is None or command is None:
+                result = future.result(timeout=timeout)
+            else:
+                result = self._awaitReply(future, timeout, timeouts)
+        except (FutureTimeoutError, binhoException):
+            if dropConnection is False or dropConnection is None and not self._deviceSilent():
+                if self.manager.is_alive():
+                    return b"[ERROR]"
+
+            if self._reconnect is not None and command is not None:
+                return self._recover(future)
+
+            # print('Connection with Device Lost!')
+            self.handler.sendStop()
+            result = b"[ERROR]"
+        else:
+            if timeouts is not None and command is not None:
+                started = max(future.sent, getattr(future, "startTime", 0.0))
+                timeouts.observe(command, result, time.perf_counter() - started if waited else None)
+
+        if self._debug is not None:
+            print(result.decode("utf-8"))
+
+        return result
+
+    def _deviceSilent(self):
+
+        # Whether the device has been on the oldest command it hasn't answered for as long as the fixed timeout.
+        head, startTime = self.manager.headOfQueue()
+
+        if head is None:
+            return False
+
+        fallback = SERIAL_TIMEOUT if self._timeouts is None else self._timeouts.fallback
+
+        return time.perf_counter() - max(getattr(head, "sent", 0.0), startTime) >= fallback
+
+    def _awaitReply(self, future, timeout, timeouts):
+
+        # A command's deadline runs from when the device can start on it: once it is sent, and the command ahead of it
+        # is answered. Until then the command at the head of the queue, maybe a long transfer from another thread,
+        # sets the pace, so that a quick command queued behind it isn't given up on while the device is still busy.
+        while True:
+            head, startTime = self.manager.headOfQueue()
+            limit = timeout
+
+            if head is not None and head is not future:
+                headCommand = getattr(head, "command", None)
+                limit = max(timeout, timeouts.timeout(headCommand) if headCommand is not None else timeouts.fallback)
+
+            remaining = max(future.sent, startTime) + limit - time.perf_counter()
+
+            if remaining <= 0:
+                return future.result(timeout=0)
+
+            try:
+                return future.result(timeout=remaining)
+            except FutureTimeoutError:
+                # Look again: the device may have moved on in the meantime.
+                continue
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Collects the commands issued by any driver on this thread and sends them to the device in a single write
+        when the with-block exits, instead of waiting out a round trip per command:
+
+            with comms.batch() as batch:
+                spi.clockFrequency = 1000000
+                spi.mode = 0
+                io[0].mode = "DOUT"
+
+            if not batch.succeeded:
+                print([r for r in batch.results if not r.success])
+
+        Replies are not available until the batch is flushed, so only commands whose response is not inspected
+        (setters and actions) can be batched: readResponse() answers "-OK" inside the block, and sending a query or
+        a getter whose setting's value isn't shadowed raises binhoException. If the block raises, nothing is sent.
+        :return: The batch, whose results list is filled in with a batchResult per command on exit
+        :rtype: commandBatch
+        """
+
+        if getattr(self._local, "batch", None) is not None:
+            raise binhoException("Batches cannot be nested")
+
+        batch = commandBatch()
+        self._local.batch = batch
+
+        try:
+            yield batch
+        except BaseException:
+            # The drivers have shadowed settings that will now never be written.
+            self.configuration.invalidate()
+            raise
+        finally:
+            self._local.batch = None
+
+        batch.results = self.sendBatch(batch.commands)
+
+        # The drivers shadowed the settings as if every command had been accepted.
+        if not batch.succeeded:
+            self.configuration.invalidate()
+
+    def sendBatch(self, commands):
+        """
+        Sends a list of commands as one newline-joined write and waits for all of their responses.
+        :param commands: The commands to send
+        :type commands: list of str
+        :return: A batchResult per command, in order
+        :rtype: list of batchResult
+        """
+
+        if not commands:
+            return []
+
+        futures = [self.manager.createFuture() for _ in commands]
+
+        for command, future in zip(commands, futures):
+            self._stampCommand(command, future)
+
+        if self._stats is not None:
+            for command, future in zip(commands, futures):
+                self._trackCommand(command, future)
+
+        if trace.activeTracer is not None:
+            for command, future in zip(commands, futures):
+                self._traceCommand(command, future, overlapping=True)
+
+        if self._debug is not None:
+            for command in commands:
+                print(command)
+
+        self._txdQueue.put(("\n".join(commands), futures), timeout=SERIAL_TIMEOUT)
+        self.manager.wakeup()
+
+        results = []
+
+        for command, future in zip(commands, futures):
+            response = self.collect(future).decode("utf-8")
+            results.append(batchResult(command, response, response.startswith("-") and response != "-NG"))
+
+        return results
+
+    @property
+    def pipelineDepth(self):
+        """The maximum number of submitted commands that may be awaiting a reply at once."""
+        return self._pipelineDepth
+
+    @pipelineDepth.setter
+    def pipelineDepth(self, depth):
+
+        if depth < 1:
+            raise ValueError("pipelineDepth must be at least 1, not " + str(depth))
+
+        self._pipelineDepth = depth
+        self._window = threading.BoundedSemaphore(depth)
+
+    def setWriteCoalescing(self, maxBatch=None, flushDeadline=None):
+        """
+        Tunes how queued commands are combined into writes to the port. The settings are kept across restarts.
+        :param maxBatch: The maximum number of commands per write, or None to leave unchanged
+        :type maxBatch: int
+        :param flushDeadline: Seconds a partial write may be held back waiting for more commands, or None to leave
+            unchanged. Holding writes back only helps when several threads share the device, so this is ignored in
+            direct mode.
+        :type flushDeadline: float
+        """
+
+        if maxBatch is not None:
+            if maxBatch < 1:
+                raise ValueError("maxBatch must be at least 1, not " + str(maxBatch))
+            self._maxBatch = maxBatch
+
+        if flushDeadline is not None:
+            if flushDeadline < 0:
+                raise ValueError("flushDeadline must not be negative, not " + str(flushDeadline))
+            self._flushDeadline = flushDeadline
+
+        if self.manager is not None:
+            self._applyWriteCoalescing()
+
+    def _applyWriteCoalescing(self):
+
+        self.manager.maxBatch = self._maxBatch
+        self.manager.flushDeadline = 0.0 if self._directPort else self._flushDeadline
+
+    @property
+    def commandsPerWrite(self):
+        """The average number of commands sent per write to the port since the connection was started."""
+        return self.manager.commandsPerWrite
+
+    @property
+    def stats(self):
+        """The statistics being collected by enableStats(), or None if collection is off."""
+        return self._stats
+
+    def enableStats(self):
+        """
+        Starts collecting per-verb command counts, bytes on the wire and latency histograms. Collection carries on
+        across restarts until disableStats() is called.
+        :return: The statistics, which fill in as commands are answered
+        :rtype: commsStats
+        """
+
+        if self._stats is None:
+            self._stats = commsStats()
+
+        return self._stats
+
+    def disableStats(self):
+        """Stops collecting statistics. Commands already in flight are still recorded when they are answered."""
+
+        self._stats = None
+
+    def startRecording(self, path):
+        """
+        Starts logging every line written to and received from the device, with its time, to a compact binary file
+        that binho.comms.virtual.replayDevice can play back. Recording carries on across restarts until
+        stopRecording() is called. A recording already in progress is stopped first.
+        :param path: The file to write the log to. An existing file is replaced.
+        :type path: str
+        :return: The recorder
+        :rtype: sessionRecorder
+        """
+
+        self.stopRecording()
+        self._recorder = sessionRecorder(path)
+
+        if self.manager is not None:
+            self.manager.recorder = self._recorder
+
+        return self._recorder
+
+    def stopRecording(self):
+        """Stops the recording started by startRecording(), and closes its file."""
+
+        recorder = self._recorder
+        self._recorder = None
+
+        if self.manager is not None:
+            self.manager.recorder = None
+
+        if recorder is not None:
+            recorder.close()
+
+    @property
+    def timeouts(self):
+        """The model giving each command its response deadline, or None if adaptiveTimeouts is off."""
+        return self._timeouts
+
+    @property
+    def adaptiveTimeouts(self):
+        """
+        Whether each command's reply is waited for as long as its payload, the bus clock and the device's past replies
+        to the same verb call for, rather than a fixed SERIAL_TIMEOUT. On by default.
+        """
+        return self._timeouts is not None
+
+    @adaptiveTimeouts.setter
+    def adaptiveTimeouts(self, enable):
+
+        if not enable:
+            self._timeouts = None
+        elif self._timeouts is None:
+            self._timeouts = responseTimeouts(SERIAL_TIMEOUT)
+
+    def _stampCommand(self, command, future):
+
+        # What collect() needs to set the command's deadline and learn from its reply, and to send it again over a
+        # new connection if this one is lost.
+        future.command = command
+        future.sent = time.perf_counter()
+        future.connection = self.manager
+
+    def _trackCommand(self, command, future):
+
+        stats = self._stats
+        verb = commandVerb(command)
+        sent = time.perf_counter()
+
+        def record(future):
+
+            latency = time.perf_counter() - sent
+
+            if future.cancelled() or future.exception(timeout=0) is not None:
+                stats.record(verb, len(command) + 1, 0, latency, failed=True)
+                return
+
+            # The base class's result(), as that of a direct mode Future would read from the port.
+            response = Future.result(future, timeout=0)
+            stats.record(verb, len(command) + 1, len(response) + 1, latency, failed=response == b"-NG")
+
+        future.add_done_callback(record)
+
+    def _traceCommand(self, command, future, overlapping):
+
+        tracer = trace.activeTracer
+        tid = tracer.currentThread()
+        verb = commandVerb(command)
+        queued = time.perf_counter()
+
+        def record(future):
+
+            answered = time.perf_counter()
+            args = {"command": command[: trace.ARGUMENT_LIMIT]}
+
+            if not future.cancelled() and future.exception(timeout=0) is None:
+                # The base class's result(), as that of a direct mode Future would read from the port.
+                args["reply"] = Future.result(future, timeout=0)[: trace.ARGUMENT_LIMIT].decode("utf-8", "replace")
+
+            # Commands that never reached the port have no write time.
+            written = getattr(future, "writeTime", None)
+
+            if overlapping:
+                spanId = tracer.asyncSpan(verb, "command", queued, answered, args)
+                if written is not None:
+                    tracer.asyncSpan("queued", "command", queued, written, spanId=spanId)
+                    tracer.asyncSpan("wire", "command", written, answered, spanId=spanId)
+            else:
+                tracer.complete(verb, "command", queued, answered, args, tid)
+                if written is not None:
+                    tracer.complete("queued", "command", queued, written, tid=tid)
+                    tracer.complete("wire", "command", written, answered, tid=tid)
+
+        future.add_done_callback(record)
 
     def readResponse(self):
 
-        result = "[ERROR]"
+        return self.readResponseBytes().decode("utf-8")
+
+    def readResponseBytes(self):
+        """
+        Waits for the next response, like readResponse(), but returns the raw line without decoding it. This lets
+        callers that only need part of a long reply (e.g. the hex payload) avoid decoding the whole line.
+        :return: The response line, or b"[ERROR]" if none arrived
+        :rtype: bytes
+        """
+
+        # Inside a batch nothing has been sent yet; acknowledge so that driver setters carry on, and report the
+        # real responses once the batch is flushed.
+        if getattr(self._local, "batch", None) is not None:
+            return b"-OK"
+
+        pending = self._pendingReplies()
+
+        if pending:
+            future = pending.popleft()
+
+            if not self.manager.is_alive():
+                if self._reconnect is not None:
+                    return self._recover(future)
+
+                # print('Connection with Device Lost!')
+                self.handler.sendStop()
+                return b"[ERROR]"
+
+            return self.collect(future)
+
+        result = b"[ERROR]"
 
         if self.manager.is_alive():
             if not self.manager.get_exception():
                 try:
-                    result = self._rxdQueue.get(timeout=SERIAL_TIMEOUT)
+                    result = self._getReceived(SERIAL_TIMEOUT)
                 except queue.Empty:
                     # print('Connection with Device Lost!')
                     self.handler.sendStop()
@@ -177,9 +1336,17 @@ class binhoComms:
             self.handler.sendStop()
 
         if self._debug is not None:
-            print(result)
+            print(result.decode("utf-8"))
         return result
 
+    def _getReceived(self, timeout):
+
+        if self._directPort:
+            self.manager.pumpUntil(lambda: not self._rxdQueue.empty(), timeout)
+            return self._rxdQueue.get_nowait()
+
+        return self._rxdQueue.get(timeout=timeout)
+
     @classmethod
     def checkDeviceSuccess(cls, ret_str):
         if ret_str == "-OK":
@@ -193,6 +1360,15 @@ class binhoComms:
 
     def start(self):
 
+        # Replies still owed from a previous connection will never arrive, and the device may have been reconfigured
+        # since it was last connected.
+        self._local = threading.local()
+        self.configuration.invalidate()
+
+        self._open()
+
+    def _open(self):
+
         self.handler = None
         self.manager = None
         self.interrupts = None
@@ -201,31 +1377,187 @@ class binhoComms:
         self._rxdQueue = None
         self._intQueue = None
 
-        comport = serial.Serial(self.serialPort, baudrate=1000000, timeout=0.025, write_timeout=0.05)
-        comport.close()
+        # If `binho serve` already owns the port, go through its socket instead of competing for the port.
+        daemonSocket = findDaemon(self.serialPort)
+
+        if daemonSocket is None:
+            comport = serial.Serial(self.serialPort, baudrate=1000000, timeout=0.025, write_timeout=0.05)
+            comport.close()
 
         self.interrupts = set()
 
         self._stopper = threading.Event()
-        self._txdQueue = queue.Queue()
+        self._txdQueue = fairQueue()
         self._rxdQueue = queue.Queue()
         self._intQueue = queue.Queue()
 
         # we need to keep track of the workers but not start them yet
         # workers = [StatusChecker(url_queue, result_queue, stopper) for i in range(num_workers)]
-        self.manager = SerialPortManager(
-            self.serialPort, self._txdQueue, self._rxdQueue, self._intQueue, self._stopper,
-        )
+        if daemonSocket is not None:
+            # The daemon needs a reader on its socket anyway, so direct mode doesn't apply.
+            self.manager = SocketPortManager(
+                daemonSocket, self._txdQueue, self._rxdQueue, self._intQueue, self._stopper
+            )
+            self._directPort = False
+        else:
+            managerClass = DirectPortManager if self.direct else SerialPortManager
+            self.manager = managerClass(self.serialPort, self._txdQueue, self._rxdQueue, self._intQueue, self._stopper)
+            self._directPort = self.direct
+        # The daemon's other clients configure the same device, so what this connection last wrote proves nothing.
+        self.configuration.shadowing = daemonSocket is None
+
+        self._applyWriteCoalescing()
+        self.manager.recorder = self._recorder
+        self.manager.events = self.events
 
         # create our signal handler and connect it
         self.handler = SignalHandler(self._stopper, self.manager)
-        signal.signal(signal.SIGINT, self.handler)
+
+        # A reconnect may happen on any thread, but signal handlers can only be installed from the main one.
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.handler)
 
         # start the threads!
         self.manager.daemon = True
 
         self.manager.start()
 
+    @property
+    def autoReconnect(self):
+        """Whether a lost connection is reopened and its configuration replayed; see enableAutoReconnect()."""
+        return self._reconnect is not None
+
+    def enableAutoReconnect(self, deviceID=None, timeout=RECONNECT_TIMEOUT):
+        """
+        Supervises the connection: when a command fails because the device stopped answering or its port went away
+        (e.g. because the adapter re-enumerated), the port is reopened, wherever the device with the same ID now
+        appears, the configuration written through the drivers since the connection was started is replayed, and the
+        command is sent again. Commands still waiting for their replies on other threads are sent again as well.
+        A command that was in flight when the connection was lost may therefore reach the device twice.
+        :param deviceID: The ID of the device, e.g. "0xC59BB495504D5652", or None to ask the connected device for it
+        :type deviceID: str
+        :param timeout: Seconds to keep looking for the device before giving up on a command
+        :type timeout: float
+        :raises binhoException: if the device ID couldn't be read
+        """
+
+        if deviceID is None:
+            try:
+                deviceID = CORE_COMMANDS["deviceID"].execute(self)
+            except Exception as e:
+                raise binhoException("Could not read the ID of the device to reconnect to") from e
+
+        self._reconnect = (deviceID, timeout)
+
+    def disableAutoReconnect(self):
+        """Stops supervising the connection; a lost connection makes every later command fail, as before."""
+
+        self._reconnect = None
+
+    def reconnect(self):
+        """
+        Reopens the supervised connection and replays the configuration written through the drivers. This is done
+        automatically when a command fails; it can also be called after the device has been unplugged on purpose.
+        :raises binhoException: if auto-reconnect isn't enabled
+        :return: True if the device was found and its configuration replayed before the reconnect timeout ran out
+        :rtype: bool
+        """
+
+        if self._reconnect is None:
+            raise binhoException("Auto-reconnect is not enabled")
+
+        deviceID, timeout = self._reconnect
+        deadline = time.monotonic() + timeout
+
+        with self._reconnectLock:
+            # Commands that fail while replaying the configuration mustn't start a reconnect of their own.
+            self._local.reconnecting = True
+
+            try:
+                if self.handler is not None:
+                    self.handler.sendStop()
+
+                while not self._reopen(deviceID):
+                    if time.monotonic() >= deadline:
+                        return False
+
+                    time.sleep(RECONNECT_INTERVAL)
+            finally:
+                self._local.reconnecting = False
+
+            # The replay restored what was written, but not necessarily what was only read.
+            self.configuration.invalidate()
+            self.reconnectCount += 1
+
+        return True
+
+    def _reopen(self, deviceID):
+
+        port = self._findDevice(deviceID)
+
+        if port is None:
+            return False
+
+        self.serialPort = port
+
+        try:
+            self._open()
+        except (OSError, serial.SerialException):
+            return False
+
+        if all(result.success for result in self.sendBatch(self.configuration.commands())):
+            return True
+
+        self.handler.sendStop()
+
+        return False
+
+    def _findDevice(self, deviceID):
+
+        # The device manager imports this module.
+        from .manager import binhoDeviceManager  # pylint: disable=import-outside-toplevel
+
+        expected = ("-ID " + deviceID).upper()
+
+        # The device usually comes back on the port it was on, so that is tried before the others are listed.
+        ports = [self.serialPort]
+        ports += [port for port in binhoDeviceManager.listAvailablePorts() if port != self.serialPort]
+
+        for port in ports:
+            try:
+                if binhoDeviceManager._checkForDeviceID(port).upper() == expected:  # pylint: disable=protected-access
+                    return port
+            except (OSError, serial.SerialException):
+                pass
+
+        return None
+
+    def _recover(self, future):
+
+        # A command that failed again after being resent, or while reconnecting, is given up on.
+        if getattr(future, "resent", False) or getattr(self._local, "reconnecting", False):
+            self.handler.sendStop()
+            return b"[ERROR]"
+
+        with self._reconnectLock:
+            # Unless the connection has already been reopened, by another thread or for an earlier command.
+            if self.manager is future.connection or not self.manager.is_alive():
+                if not self.reconnect():
+                    return b"[ERROR]"
+
+        command = future.command
+        resent = self.manager.createFuture()
+        resent.resent = True
+        self._stampCommand(command, resent)
+
+        if self._stats is not None:
+            self._trackCommand(command, resent)
+
+        self._txdQueue.put((command, (resent,)), timeout=SERIAL_TIMEOUT)
+        self.manager.wakeup()
+
+        return self.collect(resent)
+
     def open(self):
 
         self.interrupts.clear()
@@ -303,10 +1635,9 @@ class binhoComms:
 
     def writeToBuffer(self, bufferIndex, startIndex, data):
 
-        bufferData = ""
-
-        for x in data:
-            bufferData += " " + str(x)
+        bufferData = decimalEncode(data)
+        if bufferData:
+            bufferData = " " + bufferData
 
         self.sendCommand("BUF" + str(bufferIndex) + " WRITE " + str(startIndex) + bufferData)
         result = self.readResponse()
@@ -390,6 +1721,7 @@ class binhoComms:
         self.sendCommand("UART" + str(uartIndex) + " BEGIN")
         result = self.readResponse()
 
+        self._bridgeDecoder = codecs.getincrementaldecoder("utf-8")("replace")
         self.manager.startUartBridge()
 
         return result
@@ -397,19 +1729,20 @@ class binhoComms:
     def stopBridgeUART(self, sequence):
 
         self.manager.stopUartBridge()
-        self._txdQueue.put(sequence, timeout=SERIAL_TIMEOUT)
+        self.sendCommand(sequence)
         result = self.readResponse()
 
         return result
 
     def writeBridgeUART(self, data):
 
-        self._txdQueue.put(data, timeout=SERIAL_TIMEOUT)
+        self._txdQueue.put((data, ()), timeout=SERIAL_TIMEOUT)
+        self.manager.wakeup()
 
     def readBridgeUART(self, timeout=SERIAL_TIMEOUT):
         # Don't raise an exception if there is nothing to read, the other side may hae nothing to say
         # But don't wait forever
-        return self._rxdQueue.get(timeout=timeout)
+        return self._bridgeDecoder.decode(self._getReceived(timeout))
 
     # SWI COMMANDS
 
@@ -533,5 +1866,4 @@ class binhoComms:
 def _to_hex_string(byte_array):
     """Convert a byte array to a hex string."""
 
-    hex_generator = ("{:02x}".format(x) for x in byte_array)
-    return "".join(hex_generator)
+    return hexEncode(byte_array)
@@ -0,0 +1,113 @@
+"""
+The configuration the host has written to a device, kept as the commands that wrote it.
+
+Driver methods for the command table entries flagged as configuration (settings, and actions such as "SPI0 BEGIN")
+record each successful request here under its replay key, e.g. "SPI0 CLK" -> "SPI0 CLK 1000000". After the device has
+been reset or reconnected, sending commands() back in order restores the configuration. Commands sent with
+sendCommand() directly rather than through a driver are not recorded.
+
+The store also shadows the value of each setting, as last written or read back through a driver, in values, e.g.
+"SPI0 CLK" -> 1000000. The drivers answer getters from it and skip writing a value a setting already has. A connection
+through `binho serve` turns shadowing off, since the other clients of the daemon configure the same device. Anything
+else that changes the device's configuration behind the drivers' back (raw commands, a reset button) leaves the shadow
+stale, and should be followed by invalidate().
+"""
+
+import threading
+
+
+class _unshadowedValues(dict):
+    """Stands in for configurationStore.values while shadowing is off: it stays empty, whatever is stored in it."""
+
+    def __setitem__(self, key, value):
+        pass
+
+
+class configurationStore:
+    """The last configuration command written for each replay key, in the order the keys were first written."""
+
+    def __init__(self):
+
+        self._commands = {}
+        self._lock = threading.Lock()
+
+        # The last known value of each setting, as its getter returns it, by key.
+        self.values = {}
+
+    @property
+    def shadowing(self):
+        """Whether setting values are shadowed in values. Turning it off forgets the values shadowed so far."""
+        return not isinstance(self.values, _unshadowedValues)
+
+    @shadowing.setter
+    def shadowing(self, enabled):
+
+        if enabled != self.shadowing:
+            self.values = {} if enabled else _unshadowedValues()
+
+    def __len__(self):
+        return len(self._commands)
+
+    def __contains__(self, key):
+        return key in self._commands
+
+    def record(self, key, command):
+        """
+        Records the command that last configured something.
+        :param key: The replay key, e.g. "SPI0 CLK"
+        :type key: str
+        :param command: The command, e.g. "SPI0 CLK 1000000"
+        :type command: str
+        """
+
+        with self._lock:
+            self._commands[key] = command
+
+    def forget(self, key):
+        """
+        Removes a key, e.g. once "SPI0 END" has undone "SPI0 BEGIN".
+        :param key: The replay key
+        :type key: str
+        """
+
+        with self._lock:
+            self._commands.pop(key, None)
+
+    def get(self, key):
+        """
+        :param key: The replay key
+        :type key: str
+        :return: The command last recorded under the key, or None
+        :rtype: str
+        """
+
+        return self._commands.get(key)
+
+    def commands(self):
+        """
+        :return: The commands that restore the configuration, in the order their keys were first written
+        :rtype: list of str
+        """
+
+        with self._lock:
+            return list(self._commands.values())
+
+    def invalidate(self, key=None):
+        """
+        Forgets shadowed setting values, so that the drivers read them from the device again. The commands to replay
+        are kept.
+        :param key: The key of the setting to forget, e.g. "SPI0 CLK", or None for all of them
+        :type key: str
+        """
+
+        if key is None:
+            self.values.clear()
+        else:
+            self.values.pop(key, None)
+
+    def clear(self):
+        """Forgets everything, e.g. after the device has been reset to its defaults."""
+
+        with self._lock:
+            self._commands = {}
+            self.values.clear()
@@ -0,0 +1,251 @@
+"""
+Daemon that owns a host adapter's serial port and shares it with other processes over a Unix domain socket.
+"""
+
+import os
+import select
+import socket
+import threading
+
+from .comms import DAEMON_PORT_PREFIX, binhoComms, binhoException, daemonSocketPath, findDaemon, peerUid
+from .framer import lineFramer
+
+
+class binhoDaemon:
+    """
+    Owns the serial port of one host adapter and multiplexes the commands of any number of client processes onto
+    it. Clients connect to a Unix socket and speak the device's own line protocol: every command line they send is
+    answered with exactly one response line, in order, and interrupt notifications from the device are forwarded to
+    every client. binhoComms connects through the socket automatically whenever a daemon is serving its port.
+
+    Each client is served by its own thread, so the transport's fair scheduling shares the device evenly between
+    clients, and commands a client pipelines stay pipelined all the way to the device.
+    """
+
+    # How often the accept loop checks for interrupts to forward and for a lost device.
+    POLL_INTERVAL = 0.05
+
+    # Reply sent in place of a response that never arrived, so that the client's replies stay in step.
+    FAILED_RESPONSE = b"-NG"
+
+    def __init__(self, serialPort, socketPath=None):
+        """
+        :param serialPort: The serial port of the host adapter to share
+        :type serialPort: str
+        :param socketPath: Where to create the socket, or None for the default path for serialPort, which is
+            where binhoComms looks for it, in a directory only the user can get into
+        :type socketPath: str
+        """
+
+        self.serialPort = serialPort
+        self.socketPath = socketPath if socketPath is not None else daemonSocketPath(serialPort, create=True)
+        self.comms = None
+        self._listener = None
+        self._clients = {}
+        self._clientsLock = threading.Lock()
+        self._stopper = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def clientCount(self):
+        """The number of client connections currently being served."""
+        return len(self._clients)
+
+    def start(self):
+        """
+        Opens the serial port and starts listening for clients.
+        :raises binhoException: if another daemon is already listening on the socket
+        """
+
+        if findDaemon(DAEMON_PORT_PREFIX + self.socketPath) is not None:
+            raise binhoException(f"Another binho serve daemon is already listening on {self.socketPath}")
+
+        # Whatever is left at the path belongs to a daemon that didn't shut down cleanly.
+        if os.path.exists(self.socketPath):
+            os.unlink(self.socketPath)
+
+        self.comms = binhoComms(self.serialPort)
+        self.comms.start()
+
+        # Clients pipeline independently, so give them room to do so at the same time.
+        self.comms.pipelineDepth = 4 * self.comms.pipelineDepth
+
+        self._stopper.clear()
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        # Only the user may connect, so create the socket with mode 0600 rather than chmod it after the fact.
+        umask = os.umask(0o177)
+
+        try:
+            self._listener.bind(self.socketPath)
+        finally:
+            os.umask(umask)
+
+        self._listener.listen()
+
+    def serveForever(self):
+        """Accepts and serves clients until close() is called or the connection to the device is lost."""
+
+        listener = self._listener
+
+        try:
+            while not self._stopper.is_set():
+
+                if not self.comms.isConnected():
+                    raise binhoException("Connection with device lost")
+
+                try:
+                    readable, _, _ = select.select([listener], [], [], self.POLL_INTERVAL)
+
+                    if readable:
+                        connection, _ = listener.accept()
+
+                        uid = peerUid(connection)
+
+                        if uid is not None and hasattr(os, "getuid") and uid != os.getuid():
+                            connection.close()
+                        else:
+                            self._addClient(connection)
+
+                except (OSError, ValueError):
+                    # close() was called from another thread.
+                    if self._stopper.is_set():
+                        break
+                    raise
+
+                self._forwardInterrupts()
+
+        finally:
+            self.close()
+
+    def close(self):
+        """Disconnects every client, removes the socket and releases the serial port."""
+
+        self._stopper.set()
+
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+            try:
+                os.unlink(self.socketPath)
+            except OSError:
+                pass
+
+        with self._clientsLock:
+            clients = list(self._clients)
+
+        for connection in clients:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+        if self.comms is not None:
+            self.comms.close()
+
+    def _addClient(self, connection):
+
+        with self._clientsLock:
+            self._clients[connection] = threading.Lock()
+
+        thread = threading.Thread(target=self._serveClient, args=(connection,))
+        thread.daemon = True
+        thread.start()
+
+    def _removeClient(self, connection):
+
+        with self._clientsLock:
+            self._clients.pop(connection, None)
+
+        connection.close()
+
+    def _send(self, connection, data):
+
+        sendLock = self._clients.get(connection)
+
+        if sendLock is None:
+            return
+
+        with sendLock:
+            connection.sendall(data)
+
+    def _serveClient(self, connection):
+
+        framer = lineFramer()
+
+        try:
+            while not self._stopper.is_set():
+
+                data = connection.recv(65536)
+                if not data:
+                    break
+
+                framer.feed(data)
+
+                # Submit everything the client has sent before waiting on any of it, then answer in one write.
+                futures = []
+                for line in framer.lines():
+                    command = bytes(line).strip()
+                    if command:
+                        futures.append(self._submit(command.decode("utf-8")))
+
+                if futures:
+                    replies = [self._collect(future) for future in futures]
+                    replies.append(b"")
+                    self._send(connection, b"\n".join(replies))
+
+        except OSError:
+            pass
+
+        finally:
+            self._removeClient(connection)
+
+    def _submit(self, command):
+
+        try:
+            return self.comms.submit(command)
+        except binhoException:
+            return None
+
+    def _collect(self, future):
+
+        if future is None:
+            return self.FAILED_RESPONSE
+
+        # A reply that never arrives fails only the request it belongs to; the other clients carry on.
+        response = self.comms.collect(future, dropConnection=False)
+
+        if not response.startswith(b"-"):
+            return self.FAILED_RESPONSE
+
+        return response
+
+    def _forwardInterrupts(self):
+
+        # Forward every notification in the order it arrived, rather than one per source, so clients can count edges.
+        events = self.comms.events.drain()
+
+        if not events:
+            return
+
+        # Nobody checks the daemon's own interrupt flags; don't let them pile up.
+        if self.comms.interruptCount():
+            self.comms.interruptClearAll()
+
+        notification = "".join(event.source + "\n" for event in events).encode("utf-8")
+
+        with self._clientsLock:
+            clients = list(self._clients)
+
+        for connection in clients:
+            try:
+                self._send(connection, notification)
+            except OSError:
+                pass
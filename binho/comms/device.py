@@ -12,6 +12,7 @@ from .drivers.i2c import binhoI2CDriver
 from .drivers.spi import binhoSPIDriver
 from .drivers.io import binhoIODriver
 from .drivers.onewire import binho1WireDriver
+from .hexcodec import hexEncode
 
 # pylint: disable=too-many-instance-attributes
 class binhoAPI:
@@ -46,7 +47,7 @@ class binhoAPI:
 
         self.name = "Unknown"
         self.serialPort = device_identifiers["port"]
-        self.comms = binhoComms(device_identifiers["port"])
+        self.comms = binhoComms(device_identifiers["port"], direct=device_identifiers.get("direct", False))
 
         self.apis = collections.OrderedDict()
 
@@ -284,9 +285,14 @@ class binhoAPI:
 
         try:
             # see if it's in DAPLink mode
-            self.deviceID  # pylint: disable=pointless-statement
+            deviceID = self.apis.core.deviceID
             self._inDAPLinkMode = False
             self._inBootloader = False
+
+            # binhoHostAdapter(autoReconnect=True) reopens the connection if the device re-enumerates.
+            if self.identifiers.get("autoReconnect"):
+                self.comms.enableAutoReconnect(deviceID)
+
             return True
 
         except BaseException:
@@ -364,8 +370,7 @@ class binhoAPI:
 def _to_hex_string(byte_array):
     """Convert a byte array to a hex string."""
 
-    hex_generator = ("{:02x}".format(x) for x in byte_array)
-    return "".join(hex_generator)
+    return hexEncode(byte_array)
 
 
 # pylint: enable=too-many-instance-attributes
@@ -0,0 +1,283 @@
+"""
+Async counterparts of the core, SPI, I2C, IO and 1-Wire drivers, for use with binhoAsyncComms.
+
+Both sets of drivers are generated from the same command table, so each coroutine sends the same command and checks the
+response the same way as its synchronous counterpart; property getters and setters become get...()/set...()
+coroutines.
+"""
+
+from ..commands import (
+    CORE_COMMANDS,
+    I2C_COMMANDS,
+    IO_COMMANDS,
+    ONEWIRE_COMMANDS,
+    SPI_COMMANDS,
+    asyncCommandMethods,
+)
+from ..events import DEFAULT_CAPACITY
+from ..hexcodec import decimalEncode, hexEncode, hexFill
+
+
+@asyncCommandMethods(CORE_COMMANDS, index="coreIndex")
+class binhoAsyncCoreDriver:
+    def __init__(self, usb, coreIndex=0):
+
+        self.usb = usb
+        self.coreIndex = coreIndex
+
+    async def reset(self):
+
+        result = await CORE_COMMANDS["reset"].executeAsync(self.usb)
+        self.usb.configuration.clear()
+
+        return result
+
+
+@asyncCommandMethods(SPI_COMMANDS, index="spiIndex")
+class binhoAsyncSPIDriver:
+    def __init__(self, usb, spiIndex=0):
+
+        self.usb = usb
+        self.spiIndex = spiIndex
+
+    async def writeToReadFrom(self, write, read, numBytes, data):
+
+        if write:
+            dataPacket = hexEncode(data, numBytes) if numBytes > 0 else "0"
+        else:
+            # read only, keep writing the same value
+            dataPacket = hexFill(data, numBytes)
+
+        if not read:
+            await SPI_COMMANDS["_writeOnly"].executeAsync(self.usb, (self.spiIndex, numBytes, dataPacket))
+            return bytearray()
+
+        return await SPI_COMMANDS["writeToReadFrom"].executeAsync(self.usb, (self.spiIndex, numBytes, dataPacket))
+
+    async def end(self, suppressError=False):
+
+        command = SPI_COMMANDS["end"]
+        args = (self.spiIndex,)
+        result = await self.usb.command(command.format(args))
+
+        if not suppressError:
+            command.parse(result, args)
+
+        command.remember(self.usb.configuration, args, result)
+
+        return True
+
+
+@asyncCommandMethods(I2C_COMMANDS, index="i2cIndex")
+class binhoAsyncI2CDriver:
+    def __init__(self, usb, i2cIndex=0):
+
+        self.usb = usb
+        self.i2cIndex = i2cIndex
+
+    async def getUsePullups(self):
+
+        setting = I2C_COMMANDS["usePullups"]
+        args = (self.i2cIndex,)
+        cached = setting.cachedValue(self.usb.configuration, args)
+
+        if cached is not None:
+            return cached
+
+        result = "ENABLED" in await self.usb.command(setting.query.format(args))
+        setting.cacheValue(self.usb.configuration, args, result)
+
+        return result
+
+    async def setUsePullups(self, pull):
+
+        if pull or pull == 1:
+            val = 1
+        elif pull in (False, 0):
+            val = 0
+        else:
+            raise AttributeError("usePullups can be only be set to a value of True (1) or False (0), not " + str(pull))
+
+        setting = I2C_COMMANDS["usePullups"]
+        args = (self.i2cIndex,)
+
+        if setting.cachedValue(self.usb.configuration, args) == bool(val):
+            return True
+
+        result = await setting.assign.executeAsync(self.usb, args + (val,))
+        setting.cacheValue(self.usb.configuration, args, bool(val))
+
+        return result
+
+    async def setAddressBits(self, bits):
+
+        if not 7 <= bits <= 8:
+            raise AttributeError("AddressBits can be only be set to a value of 7 or 8, not " + str(bits))
+
+        setting = I2C_COMMANDS["addressBits"]
+        args = (self.i2cIndex,)
+
+        if setting.cachedValue(self.usb.configuration, args) == bits:
+            return True
+
+        result = await setting.assign.executeAsync(self.usb, args + (bits,))
+        setting.cacheValue(self.usb.configuration, args, bits)
+
+        return result
+
+    async def scanAddress(self, address):
+
+        result = await I2C_COMMANDS["scanAddress"].executeAsync(self.usb, (self.i2cIndex, address))
+        return "OK" in result
+
+    async def scanAddresses(self, addresses):
+
+        command = I2C_COMMANDS["scanAddress"]
+        addresses = list(addresses)
+        results = await self.usb.pipeline(command.format((self.i2cIndex, address)) for address in addresses)
+
+        return [address for address, result in zip(addresses, results) if "OK" in result]
+
+    async def write(self, address, startingRegister, data):
+
+        dataPacket = decimalEncode(data)
+        if dataPacket:
+            dataPacket = " " + dataPacket
+
+        return await I2C_COMMANDS["write"].executeAsync(
+            self.usb, (self.i2cIndex, address, startingRegister, dataPacket)
+        )
+
+    async def writeToReadFrom(
+        self, address, stop, numReadBytes, numWriteBytes, data
+    ):  # pylint: disable=too-many-arguments
+
+        if numWriteBytes > 0:
+            dataPacket = hexEncode(data, numWriteBytes)
+        else:
+            dataPacket = "00"
+
+        endStop = "1" if stop else "0"
+
+        if numReadBytes == 0:
+            await I2C_COMMANDS["_writeOnly"].executeAsync(
+                self.usb, (self.i2cIndex, address, endStop, numWriteBytes, dataPacket)
+            )
+            return bytearray()
+
+        return await I2C_COMMANDS["writeToReadFrom"].executeAsync(
+            self.usb, (self.i2cIndex, address, endStop, numReadBytes, numWriteBytes, dataPacket)
+        )
+
+    async def end(self, repeat=False):
+
+        command = I2C_COMMANDS["_endRepeat" if repeat else "end"]
+        return await command.executeAsync(self.usb, (self.i2cIndex,))
+
+
+@asyncCommandMethods(IO_COMMANDS, index="ioNumber")
+class binhoAsyncIODriver:
+    def __init__(self, usb, ioNumber):
+
+        self.usb = usb
+        self.ioNumber = ioNumber
+
+    def onInterrupt(self, callback):
+
+        return self.usb.events.subscribe(callback, "!IO" + str(self.ioNumber))
+
+    def interruptEvents(self, capacity=DEFAULT_CAPACITY):
+
+        return self.usb.events.stream("!IO" + str(self.ioNumber), capacity)
+
+
+class binhoAsync1WireDriver:
+    def __init__(self, usb):
+        self.usb = usb
+
+    async def _checkedCommand(self, name, args, description):
+
+        if not self.usb.checkDeviceSuccess(await ONEWIRE_COMMANDS[name].executeAsync(self.usb, args)):
+            raise RuntimeError(f"Error executing 1-Wire {description} received NAK")
+
+    async def begin(self, pin=0, pullup=False, oneWireIndex=0):
+
+        await self._checkedCommand("_beginPullup" if pullup else "begin", (oneWireIndex, pin), "Begin")
+
+    async def reset(self, oneWireIndex=0):
+
+        return self.usb.checkDeviceSuccess(await ONEWIRE_COMMANDS["reset"].executeAsync(self.usb, (oneWireIndex,)))
+
+    async def writeByte(self, data, oneWireIndex=0, powered=True):
+
+        if not 0 <= data <= 255:
+            raise RuntimeError(f"Data byte must be in range 0-255, not {data}")
+
+        await self._checkedCommand("_writeBytePowered" if powered else "writeByte", (oneWireIndex, data), "Write")
+
+    async def readByte(self, oneWireIndex=0):
+
+        command = ONEWIRE_COMMANDS["readByte"]
+        args = (oneWireIndex,)
+        result = await self.usb.command(command.format(args))
+
+        if result == "-NG":
+            raise RuntimeError("Error executing 1-Wire Read received NAK")
+
+        return command.parse(result, args)
+
+    async def exchangeBytes(self, oneWireCmd, bytesToWrite=None, bytesToRead=0, oneWireIndex=0):
+
+        if len(bytesToWrite) > 1024:
+            raise ValueError("WHR command can only write 1024 bytea at a time!")
+
+        if bytesToRead > 1024:
+            raise ValueError("WHR command can only read 1024 bytea at a time!")
+
+        if bytesToRead == 0:
+            await ONEWIRE_COMMANDS["_exchangeWriteOnly"].executeAsync(
+                self.usb, (oneWireIndex, oneWireCmd, len(bytesToWrite), hexEncode(bytesToWrite))
+            )
+            return bytearray()
+
+        return await ONEWIRE_COMMANDS["exchangeBytes"].executeAsync(
+            self.usb, (oneWireIndex, oneWireCmd, bytesToRead, len(bytesToWrite), hexEncode(bytesToWrite))
+        )
+
+    async def select(self, oneWireIndex=0):
+
+        await self._checkedCommand("select", (oneWireIndex,), "Select")
+
+    async def skip(self, oneWireIndex=0):
+
+        await self._checkedCommand("skip", (oneWireIndex,), "Skip")
+
+    async def depower(self, oneWireIndex=0):
+
+        await self._checkedCommand("depower", (oneWireIndex,), "depower")
+
+    async def getAddress(self, oneWireIndex=0):
+
+        command = ONEWIRE_COMMANDS["getAddress"]
+        args = (oneWireIndex,)
+        result = await self.usb.command(command.format(args))
+
+        if result == "-NG":
+            raise RuntimeError("Error executing 1-Wire Read received NAK")
+
+        return command.parse(result, args)
+
+    async def search(self, oneWireIndex=0, normalSearch=True):
+
+        await self._checkedCommand("search" if normalSearch else "_searchAlarming", (oneWireIndex,), "search")
+
+    async def resetSearch(self, oneWireIndex=0):
+
+        await self._checkedCommand("resetSearch", (oneWireIndex,), "search reset")
+
+    async def targetSearch(self, target, oneWireIndex=0):
+
+        if not 0 <= target <= 255:
+            raise RuntimeError(f"Target byte must be in range 0-255, not {target}")
+
+        await self._checkedCommand("targetSearch", (oneWireIndex, target), "target search")
@@ -1,3 +1,17 @@
+from ..commands import I2C_COMMANDS, commandMethods
+from ..hexcodec import decimalEncode, hexEncode
+
+_PULLUPS = I2C_COMMANDS["usePullups"]
+_ADDRESS_BITS = I2C_COMMANDS["addressBits"]
+_SCAN = I2C_COMMANDS["scanAddress"]
+_WRITE = I2C_COMMANDS["write"]
+_WRITE_TO_READ_FROM = I2C_COMMANDS["writeToReadFrom"]
+_WRITE_ONLY = I2C_COMMANDS["_writeOnly"]
+_END = I2C_COMMANDS["end"]
+_END_REPEAT = I2C_COMMANDS["_endRepeat"]
+
+
+@commandMethods(I2C_COMMANDS, index="i2cIndex")
 class binhoI2CDriver:
     def __init__(self, usb, i2cIndex=0):
 
@@ -5,39 +19,20 @@ class binhoI2CDriver:
         self.i2cIndex = i2cIndex
 
     @property
-    def clockFrequency(self):
-
-        self.usb.sendCommand("I2C" + str(self.i2cIndex) + " CLK ?")
-        result = self.usb.readResponse()
-
-        if not result.startswith("-I2C" + str(self.i2cIndex) + " CLK"):
-            raise RuntimeError(
-                f'Error Binho responded with {result}, not the expected "-I2C' + str(self.i2cIndex) + ' CLK"'
-            )
-
-        return int(result[10:])
-
-    @clockFrequency.setter
-    def clockFrequency(self, clock):
-
-        self.usb.sendCommand("I2C" + str(self.i2cIndex) + " CLK " + str(clock))
-        result = self.usb.readResponse()
-
-        if not result.startswith("-OK"):
-            raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
+    def usePullups(self):
 
-        return True
+        args = (self.i2cIndex,)
+        cached = _PULLUPS.cachedValue(self.usb.configuration, args)
 
-    @property
-    def usePullups(self):
+        if cached is not None:
+            return cached
 
-        self.usb.sendCommand("I2C" + str(self.i2cIndex) + " PULL ?")
-        result = self.usb.readResponse()
+        self.usb.sendCommand(_PULLUPS.query.format(args))
+        result = "ENABLED" in self.usb.readResponse()
 
-        if "ENABLED" in result:
-            return True
+        _PULLUPS.cacheValue(self.usb.configuration, args, result)
 
-        return False
+        return result
 
     @usePullups.setter
     def usePullups(self, pull):
@@ -49,192 +44,91 @@ class binhoI2CDriver:
         else:
             raise AttributeError("usePullups can be only be set to a value of True (1) or False (0), not " + str(pull))
 
-        self.usb.sendCommand("I2C" + str(self.i2cIndex) + " PULL " + str(val))
-        result = self.usb.readResponse()
+        args = (self.i2cIndex,)
+
+        if _PULLUPS.cachedValue(self.usb.configuration, args) == bool(val):
+            return True
 
-        if not result.startswith("-OK"):
-            raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
+        result = _PULLUPS.assign.execute(self.usb, args + (val,))
+        _PULLUPS.cacheValue(self.usb.configuration, args, bool(val))
 
-        return True
+        return result
 
     @property
     def addressBits(self):
 
-        self.usb.sendCommand("I2C" + str(self.i2cIndex) + " ADDR ?")
-        result = self.usb.readResponse()
-
-        if not result.startswith("-I2C" + str(self.i2cIndex) + " ADDR"):
-            raise RuntimeError(
-                f'Error Binho responded with {result}, not the expected "-I2C' + str(self.i2cIndex) + ' CLK"'
-            )
+        args = (self.i2cIndex,)
+        cached = _ADDRESS_BITS.cachedValue(self.usb.configuration, args)
 
-        if "8BIT" in result:
-            return 8
-        if "7BIT" in result:
-            return 7
+        if cached is None:
+            cached = _ADDRESS_BITS.query.execute(self.usb, args)
+            _ADDRESS_BITS.cacheValue(self.usb.configuration, args, cached)
 
-        raise RuntimeError(
-            f'Error Binho responded with {result}, not the expected "-I2C' + str(self.i2cIndex) + ' CLK"'
-        )
+        return cached
 
     @addressBits.setter
     def addressBits(self, bits):
 
-        if 7 <= bits <= 8:
-            self.usb.sendCommand("I2C" + str(self.i2cIndex) + " ADDR " + str(bits))
-            result = self.usb.readResponse()
+        if not 7 <= bits <= 8:
+            raise AttributeError("AddressBits can be only be set to a value of 7 or 8, not " + str(bits))
 
-            if not result.startswith("-OK"):
-                raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
+        args = (self.i2cIndex,)
 
+        if _ADDRESS_BITS.cachedValue(self.usb.configuration, args) == bits:
             return True
 
-        raise AttributeError("AddressBits can be only be set to a value of 7 or 8, not " + str(bits))
+        result = _ADDRESS_BITS.assign.execute(self.usb, args + (bits,))
+        _ADDRESS_BITS.cacheValue(self.usb.configuration, args, bits)
+
+        return result
 
     def scanAddress(self, address, i2cIndex=0):
 
-        self.usb.sendCommand("I2C" + str(i2cIndex) + " SCAN " + str(address))
-        result = self.usb.readResponse()
+        result = _SCAN.execute(self.usb, (i2cIndex, address))
 
         if "OK" in result:
             return True
 
         return False
 
-    def write(self, address, startingRegister, data):
-
-        dataPacket = ""
+    def scanAddresses(self, addresses, i2cIndex=0):
 
-        for x in data:
-            dataPacket += " " + str(x)
+        addresses = list(addresses)
+        results = self.usb.pipeline([_SCAN.format((i2cIndex, address)) for address in addresses])
 
-        self.usb.sendCommand(
-            "I2C" + str(self.i2cIndex) + " WRITE " + str(address) + " " + str(startingRegister) + dataPacket
-        )
-        result = self.usb.readResponse()
+        return [address for address, result in zip(addresses, results) if "OK" in result]
 
-        if not result.startswith("-OK"):
-            raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
-
-        return True
-
-    def writeByte(self, data):
-
-        self.usb.sendCommand("I2C" + str(self.i2cIndex) + " WRITE " + str(data))
-        result = self.usb.readResponse()
-
-        if not result.startswith("-OK"):
-            raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
-
-        return True
-
-    def readByte(self, address):
-
-        self.usb.sendCommand("I2C" + str(self.i2cIndex) + " REQ " + str(address) + " 1")
-        result = self.usb.readResponse()
-
-        if not result.startswith("-I2C" + str(self.i2cIndex) + " RXD"):
-            raise RuntimeError(
-                f'Error Binho responded with {result}, not the expected "-I2C' + str(self.i2cIndex) + ' RXD"'
-            )
-
-        return chr(result[10:])
-
-    def readBytes(self, address, numBytes):
-
-        self.usb.sendCommand("I2C" + str(self.i2cIndex) + " REQ " + str(address) + " " + str(numBytes))
-        result = self.usb.readResponse()
+    def write(self, address, startingRegister, data):
 
-        if not result.startswith("-I2C" + str(self.i2cIndex) + " RXD"):
-            raise RuntimeError(
-                f'Error Binho responded with {result}, not the expected "-I2C' + str(self.i2cIndex) + ' RXD"'
-            )
+        dataPacket = decimalEncode(data)
+        if dataPacket:
+            dataPacket = " " + dataPacket
 
-        return bytearray.fromhex(result[10:])
+        return _WRITE.execute(self.usb, (self.i2cIndex, address, startingRegister, dataPacket))
 
     def writeToReadFrom(self, address, stop, numReadBytes, numWriteBytes, data):  # pylint: disable=too-many-arguments
 
-        dataPacket = ""
-        endStop = "1"
-
         if numWriteBytes > 0:
-            for i in range(numWriteBytes):
-                dataPacket += "{:02x}".format(data[i])
+            dataPacket = hexEncode(data, numWriteBytes)
         else:
             dataPacket = "00"
 
-        if not stop:
-            endStop = "0"
-        # print('I2C' + str(self.i2cIndex) + ' WHR ' + str(address) + ' ' + endStop + ' ' + str(numReadBytes) + ' ' \
-        # + str(numWriteBytes) + ' ' + dataPacket)
-
-        self.usb.sendCommand(
-            "I2C"
-            + str(self.i2cIndex)
-            + " WHR "
-            + str(address)
-            + " "
-            + endStop
-            + " "
-            + str(numReadBytes)
-            + " "
-            + str(numWriteBytes)
-            + " "
-            + dataPacket
-        )
-        result = self.usb.readResponse()
-
-        # print(result)
+        endStop = "1" if stop else "0"
 
         if numReadBytes == 0:
-            if not result.startswith("-OK"):
-                raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
-
+            _WRITE_ONLY.execute(self.usb, (self.i2cIndex, address, endStop, numWriteBytes, dataPacket))
             return bytearray()
 
-        if not result.startswith("-I2C" + str(self.i2cIndex) + " RXD "):
-            raise RuntimeError(
-                f'Error Binho responded with {result}, not the expected "-I2C ' + str(self.i2cIndex) + ' RXD ..."'
-            )
-
-        return bytearray.fromhex(result[9:])
-
-    def start(self, address):
-
-        self.usb.sendCommand("I2C" + str(self.i2cIndex) + " START " + str(address))
-        result = self.usb.readResponse()
-
-        if not result.startswith("-OK"):
-            raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
-        return True
+        return _WRITE_TO_READ_FROM.execute(
+            self.usb, (self.i2cIndex, address, endStop, numReadBytes, numWriteBytes, dataPacket)
+        )
 
     def end(self, repeat=False):
 
         if repeat:
-            self.usb.sendCommand("I2C" + str(self.i2cIndex) + " END R")
-        else:
-            self.usb.sendCommand("I2C" + str(self.i2cIndex) + " END")
-
-        result = self.usb.readResponse()
-
-        if not result.startswith("-OK"):
-            raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
+            return _END_REPEAT.execute(self.usb, (self.i2cIndex,))
 
-        return True
-
-    def setSlaveAddressI2C(self, i2cIndex, address):
-
-        self.usb.sendCommand("I2C" + str(i2cIndex) + " SLAVE " + str(address))
-        result = self.usb.readResponse()
-
-        return result
-
-    def getSlaveAddressI2C(self, i2cIndex):
-
-        self.usb.sendCommand("I2C" + str(i2cIndex) + " SLAVE ?")
-        result = self.usb.readResponse()
-
-        return result
+        return _END.execute(self.usb, (self.i2cIndex,))
 
     def getSlaveRequestInterruptI2C(self, i2cIndex):
 
@@ -255,73 +149,3 @@ class binhoI2CDriver:
     def clearSlaveReceiveInterruptI2C(self, i2cIndex):
 
         self.usb.interruptClear("!I2C" + str(i2cIndex) + " SLAVE RX")
-
-    def setSlaveRegisterI2C(self, i2cIndex, register, value):
-
-        self.usb.sendCommand("I2C" + str(i2cIndex) + " SLAVE REG " + str(register) + " " + str(value))
-        result = self.usb.readResponse()
-
-        return result
-
-    def getSlaveRegisterI2C(self, i2cIndex, register):
-
-        self.usb.sendCommand("I2C" + str(i2cIndex) + " SLAVE REG " + str(register) + " ?")
-        result = self.usb.readResponse()
-
-        return result
-
-    def setSlaveReadMaskI2C(self, i2cIndex, register, value):
-
-        self.usb.sendCommand("I2C" + str(i2cIndex) + " SLAVE READMASK " + str(register) + " " + str(value))
-        result = self.usb.readResponse()
-
-        return result
-
-    def getSlaveReadMaskI2C(self, i2cIndex, register):
-
-        self.usb.sendCommand("I2C" + str(i2cIndex) + " SLAVE READMASK " + str(register) + " ?")
-        result = self.usb.readResponse()
-
-        return result
-
-    def setSlaveWriteMaskI2C(self, i2cIndex, register, value):
-
-        self.usb.sendCommand("I2C" + str(i2cIndex) + " SLAVE WRITEMASK " + str(register) + " " + str(value))
-        result = self.usb.readResponse()
-
-        return result
-
-    def getSlaveWriteMaskI2C(self, i2cIndex, register):
-
-        self.usb.sendCommand("I2C" + str(i2cIndex) + " SLAVE WRITEMASK " + str(register) + " ?")
-        result = self.usb.readResponse()
-
-        return result
-
-    def setSlaveModeI2C(self, i2cIndex, mode):
-
-        self.usb.sendCommand("I2C" + str(i2cIndex) + " SLAVE MODE " + str(mode))
-        result = self.usb.readResponse()
-
-        return result
-
-    def getSlaveModeI2C(self, i2cIndex):
-
-        self.usb.sendCommand("I2C" + str(i2cIndex) + " SLAVE MODE " + "?")
-        result = self.usb.readResponse()
-
-        return result
-
-    def setSlaveRegisterCount(self, i2cIndex, registerCount):
-
-        self.usb.sendCommand("I2C" + str(i2cIndex) + " SLAVE REGCNT " + str(registerCount))
-        result = self.usb.readResponse()
-
-        return result
-
-    def getSlaveRegisterCount(self, i2cIndex):
-
-        self.usb.sendCommand("I2C" + str(i2cIndex) + " SLAVE REGCNT " + "?")
-        result = self.usb.readResponse()
-
-        return result
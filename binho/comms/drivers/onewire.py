@@ -1,7 +1,16 @@
+from ..commands import ONEWIRE_COMMANDS
+from ..hexcodec import hexEncode
+
+
 class binho1WireDriver:
     def __init__(self, usb):
         self.usb = usb
 
+    def _checkedCommand(self, name, args, description):
+
+        if not self.usb.checkDeviceSuccess(ONEWIRE_COMMANDS[name].execute(self.usb, args)):
+            raise RuntimeError(f"Error executing 1-Wire {description} received NAK")
+
     def begin(self, pin=0, pullup=False, oneWireIndex=0):
         """
         This function starts the 1-WIRE Master on the given IO pin. The 1-Wire protocol can be used
@@ -18,13 +27,7 @@ class binho1WireDriver:
         :rtype: None
         """
 
-        if pullup:
-            self.usb.sendCommand(f"1WIRE{oneWireIndex} BEGIN {pin} PULL")
-        else:
-            self.usb.sendCommand(f"1WIRE{oneWireIndex} BEGIN {pin}")
-
-        if not self.usb.checkDeviceSuccess(self.usb.readResponse()):
-            raise RuntimeError("Error executing 1-Wire Begin received NAK")
+        self._checkedCommand("_beginPullup" if pullup else "begin", (oneWireIndex, pin), "Begin")
 
     def reset(self, oneWireIndex=0):
         """
@@ -36,9 +39,7 @@ class binho1WireDriver:
         :rtype: bool
         """
 
-        self.usb.sendCommand(f"1WIRE{oneWireIndex} RESET")
-
-        return self.usb.checkDeviceSuccess(self.usb.readResponse())
+        return self.usb.checkDeviceSuccess(ONEWIRE_COMMANDS["reset"].execute(self.usb, (oneWireIndex,)))
 
     def writeByte(self, data, oneWireIndex=0, powered=True):
         """
@@ -57,13 +58,7 @@ class binho1WireDriver:
         if not 0 <= data <= 255:
             raise RuntimeError(f"Data byte must be in range 0-255, not {data}")
 
-        if powered:
-            self.usb.sendCommand(f"1WIRE{oneWireIndex} WRITE {data} POWER")
-        else:
-            self.usb.sendCommand(f"1WIRE{oneWireIndex} WRITE {data}")
-
-        if not self.usb.checkDeviceSuccess(self.usb.readResponse()):
-            raise RuntimeError("Error executing 1-Wire Write received NAK")
+        self._checkedCommand("_writeBytePowered" if powered else "writeByte", (oneWireIndex, data), "Write")
 
     def readByte(self, oneWireIndex=0):
         """
@@ -74,13 +69,16 @@ class binho1WireDriver:
         :return: Received byte
         :rtype: int
         """
-        self.usb.sendCommand(f"1WIRE{oneWireIndex} READ")
+        command = ONEWIRE_COMMANDS["readByte"]
+        args = (oneWireIndex,)
+
+        self.usb.sendCommand(command.format(args))
         result = self.usb.readResponse()
 
         if result == "-NG":
             raise RuntimeError("Error executing 1-Wire Read received NAK")
 
-        return int(result[15:], 16)
+        return command.parse(result, args)
 
     def exchangeBytes(self, oneWireCmd, bytesToWrite=None, bytesToRead=0, oneWireIndex=0):
         """
@@ -108,26 +106,15 @@ class binho1WireDriver:
         if bytesToRead > 1024:
             raise ValueError("WHR command can only read 1024 bytea at a time!")
 
-        self.usb.sendCommand(
-            f"1WIRE{oneWireIndex} "
-            f"WHR {oneWireCmd} "
-            f"{bytesToRead} "
-            f"{len(bytesToWrite)} "
-            f'{"".join(f"{b:02x}" for b in bytesToWrite)}'
-        )
-
-        result = self.usb.readResponse()
-
         if bytesToRead == 0:
-            if not result.startswith("-OK"):
-                raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
-
+            ONEWIRE_COMMANDS["_exchangeWriteOnly"].execute(
+                self.usb, (oneWireIndex, oneWireCmd, len(bytesToWrite), hexEncode(bytesToWrite))
+            )
             return bytearray()
 
-        if not result.startswith("-1WIRE0 RXD "):
-            raise RuntimeError(f'Error Binho responded with {result}, not the expected "-1WIRE0 RXD ..."')
-
-        return bytearray.fromhex(result[12:])
+        return ONEWIRE_COMMANDS["exchangeBytes"].execute(
+            self.usb, (oneWireIndex, oneWireCmd, bytesToRead, len(bytesToWrite), hexEncode(bytesToWrite))
+        )
 
     def select(self, oneWireIndex=0):
         """
@@ -138,10 +125,7 @@ class binho1WireDriver:
         :return: None
         :rtype: None
         """
-        self.usb.sendCommand(f"1WIRE{oneWireIndex} SELECT")
-
-        if not self.usb.checkDeviceSuccess(self.usb.readResponse()):
-            raise RuntimeError("Error executing 1-Wire Select received NAK")
+        self._checkedCommand("select", (oneWireIndex,), "Select")
 
     def skip(self, oneWireIndex=0):
         """
@@ -152,10 +136,7 @@ class binho1WireDriver:
         :return: None
         :rtype: None
         """
-        self.usb.sendCommand(f"1WIRE{oneWireIndex} SKIP")
-
-        if not self.usb.checkDeviceSuccess(self.usb.readResponse()):
-            raise RuntimeError("Error executing 1-Wire Skip received NAK")
+        self._checkedCommand("skip", (oneWireIndex,), "Skip")
 
     def depower(self, oneWireIndex=0):
         """
@@ -166,10 +147,7 @@ class binho1WireDriver:
         :return: None
         :rtype: None
         """
-        self.usb.sendCommand(f"1WIRE{oneWireIndex} DEPOWER")
-
-        if not self.usb.checkDeviceSuccess(self.usb.readResponse()):
-            raise RuntimeError("Error executing 1-Wire depower received NAK")
+        self._checkedCommand("depower", (oneWireIndex,), "depower")
 
     def getAddress(self, oneWireIndex=0):
         """
@@ -180,13 +158,16 @@ class binho1WireDriver:
         :return: Bytearray of the address
         :rtype: bytearray
         """
-        self.usb.sendCommand(f"1WIRE{oneWireIndex} ADDR ?")
+        command = ONEWIRE_COMMANDS["getAddress"]
+        args = (oneWireIndex,)
+
+        self.usb.sendCommand(command.format(args))
         result = self.usb.readResponse()
 
         if result == "-NG":
             raise RuntimeError("Error executing 1-Wire Read received NAK")
 
-        return bytearray.fromhex(result[13:].replace("0x", ""))
+        return command.parse(result, args)
 
     def search(self, oneWireIndex=0, normalSearch=True):
         """
@@ -201,13 +182,7 @@ class binho1WireDriver:
         :return: None
         :rtype: None
         """
-        if normalSearch:
-            self.usb.sendCommand(f"1WIRE{oneWireIndex} SEARCH")
-        else:
-            self.usb.sendCommand(f"1WIRE{oneWireIndex} SEARCH COND")
-
-        if not self.usb.checkDeviceSuccess(self.usb.readResponse()):
-            raise RuntimeError("Error executing 1-Wire search received NAK")
+        self._checkedCommand("search" if normalSearch else "_searchAlarming", (oneWireIndex,), "search")
 
     def resetSearch(self, oneWireIndex=0):
         """
@@ -218,10 +193,7 @@ class binho1WireDriver:
         :return: None
         :rtype: None
         """
-        self.usb.sendCommand(f"1WIRE{oneWireIndex} SEARCH RESET")
-
-        if not self.usb.checkDeviceSuccess(self.usb.readResponse()):
-            raise RuntimeError("Error executing 1-Wire search reset received NAK")
+        self._checkedCommand("resetSearch", (oneWireIndex,), "search reset")
 
     def targetSearch(self, target, oneWireIndex=0):
         """
@@ -237,7 +209,4 @@ class binho1WireDriver:
         if not 0 <= target <= 255:
             raise RuntimeError(f"Target byte must be in range 0-255, not {target}")
 
-        self.usb.sendCommand(f"1WIRE{oneWireIndex} SEARCH {target}")
-
-        if not self.usb.checkDeviceSuccess(self.usb.readResponse()):
-            raise RuntimeError("Error executing 1-Wire target search received NAK")
+        self._checkedCommand("targetSearch", (oneWireIndex, target), "target search")
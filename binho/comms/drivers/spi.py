@@ -1,170 +1,199 @@
-class binhoSPIDriver:
-    def __init__(self, usb, spiIndex=0):
-
-        self.usb = usb
-        self.spiIndex = spiIndex
-
-    @property
-    def clockFrequency(self):
-
-        self.usb.sendCommand("SPI" + str(self.spiIndex) + " CLK ?")
-        result = self.usb.readResponse()
-
-        if not result.startswith("-SPI" + str(self.spiIndex) + " CLK"):
-            raise RuntimeError(
-                f'Error Binho responded with {result}, not the expected "-SPI' + str(self.spiIndex) + ' CLK"'
-            )
-
-        return int(result[10:])
-
-    @clockFrequency.setter
-    def clockFrequency(self, clock):
-
-        self.usb.sendCommand("SPI" + str(self.spiIndex) + " CLK " + str(clock))
-        result = self.usb.readResponse()
-
-        if not result.startswith("-OK"):
-            raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
-
-        return True
-
-    @property
-    def bitOrder(self):
-
-        self.usb.sendCommand("SPI" + str(self.spiIndex) + " ORDER ?")
-        result = self.usb.readResponse()
-
-        if not result.startswith("-SPI" + str(self.spiIndex) + " ORDER"):
-            raise RuntimeError(
-                f'Error Binho responded with {result}, not the expected "-SPI' + str(self.spiIndex) + ' ORDER"'
-            )
-
-        return result[12:]
-
-    @bitOrder.setter
-    def bitOrder(self, order):
-
-        self.usb.sendCommand("SPI" + str(self.spiIndex) + " ORDER " + order)
-        result = self.usb.readResponse()
-
-        if not result.startswith("-OK"):
-            raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
-
-        return True
-
-    @property
-    def mode(self):
-
-        self.usb.sendCommand("SPI" + str(self.spiIndex) + " MODE ?")
-        result = self.usb.readResponse()
-
-        if not result.startswith("-SPI" + str(self.spiIndex) + " MODE"):
-            raise RuntimeError(
-                f'Error Binho responded with {result}, not the expected "-SPI' + str(self.spiIndex) + ' MODE"'
-            )
-
-        return int(result[11:])
-
-    @mode.setter
-    def mode(self, mode):
-
-        self.usb.sendCommand("SPI" + str(self.spiIndex) + " MODE " + str(mode))
-        result = self.usb.readResponse()
+import collections
 
-        if not result.startswith("-OK"):
-            raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
+from ..commands import IO_COMMANDS, SPI_COMMANDS, commandMethods
+from ..hexcodec import asBuffer, hexDecodeInto, hexEncode, hexFill
 
-        return True
-
-    @property
-    def bitsPerTransfer(self):
-
-        self.usb.sendCommand("SPI" + str(self.spiIndex) + " TXBITS ?")
-        result = self.usb.readResponse()
-
-        if not result.startswith("-SPI" + str(self.spiIndex) + " TXBITS"):
-            raise RuntimeError(
-                f'Error Binho responded with {result}, not the expected "-SPI' + str(self.spiIndex) + ' TXBITS"'
-            )
-
-        return int(result[13:])
-
-    @bitsPerTransfer.setter
-    def bitsPerTransfer(self, bits):
-
-        self.usb.sendCommand("SPI" + str(self.spiIndex) + " TXBITS " + str(bits))
-        result = self.usb.readResponse()
+_WRITE_TO_READ_FROM = SPI_COMMANDS["writeToReadFrom"]
+_WRITE_ONLY = SPI_COMMANDS["_writeOnly"]
+_BEGIN = SPI_COMMANDS["begin"]
+_END = SPI_COMMANDS["end"]
+_IO_VALUE = IO_COMMANDS["value"].assign
 
-        if not result.startswith("-OK"):
-            raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
+# The size of the device's SPI transfer buffer, and so of the largest single WHR.
+SPI_BUFFER_SIZE = 1024
 
-        return True
-
-    def begin(self):
-
-        self.usb.sendCommand("SPI" + str(self.spiIndex) + " BEGIN")
-        result = self.usb.readResponse()
-
-        if not result.startswith("-OK"):
-            raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
+# WHR commands streamTransfer() keeps in flight, so that the device is working on the next chunk while the host
+# decodes the reply to the previous one. Each is a line of up to twice the chunk size, so this is kept small enough not
+# to overrun the device's input buffer. framedTransfers() writes at most this many buffers' worth of payload at once.
+STREAM_WINDOW = 2
 
-        return True
-
-    def transfer(self, data):
-
-        self.usb.sendCommand("SPI" + str(self.spiIndex) + " TXRX " + str(data))
-        result = self.usb.readResponse()
 
-        if not result.startswith("-SPI" + str(self.spiIndex) + " RXD"):
-            raise RuntimeError(
-                f'Error Binho responded with {result}, not the expected "-SPI' + str(self.spiIndex) + ' RXD"'
-            )
+@commandMethods(SPI_COMMANDS, index="spiIndex")
+class binhoSPIDriver:
+    def __init__(self, usb, spiIndex=0):
 
-        return bytearray.fromhex(result[9:])
+        self.usb = usb
+        self.spiIndex = spiIndex
 
     def writeToReadFrom(self, write, read, numBytes, data):
 
-        dataPacket = ""
-        writeOnlyFlag = "0"
-
         if write:
             if numBytes > 0:
-                for i in range(numBytes):
-                    dataPacket += "{:02x}".format(data[i])
+                # Payloads shorter than numBytes are padded with zeros.
+                dataPacket = hexEncode(data, numBytes)
             else:
                 dataPacket = "0"
         else:
             # read only, keep writing the same value
-            for i in range(numBytes):
-                dataPacket += "{:02x}".format(data)
+            dataPacket = hexFill(data, numBytes)
 
         if not read:
-            writeOnlyFlag = "1"
+            _WRITE_ONLY.execute(self.usb, (self.spiIndex, numBytes, dataPacket))
+            return bytearray()
 
-        self.usb.sendCommand(
-            "SPI" + str(self.spiIndex) + " WHR " + writeOnlyFlag + " " + str(numBytes) + " " + dataPacket
-        )
+        return _WRITE_TO_READ_FROM.execute(self.usb, (self.spiIndex, numBytes, dataPacket))
+
+    def streamTransfer(self, data, numBytes, out=None, read=True, chunkSize=SPI_BUFFER_SIZE):
+        """
+        Clocks a transfer of any length through the device as a stream of WHR commands of at most chunkSize bytes,
+        pipelined so that the next chunk is in flight while the reply to the previous one is decoded. Chip select is
+        left alone, so a select asserted by the caller stays asserted across every chunk.
+        :param data: The bytes to write; shorter payloads are padded with zeros up to numBytes
+        :type data: bytes-like or iterable of int
+        :param numBytes: The number of bytes to clock
+        :type numBytes: int
+        :param out: A writable buffer of at least numBytes bytes to receive into, or None for a new bytearray
+        :type out: writable bytes-like
+        :param read: If False, the bytes shifted in are discarded by the device, and nothing is received
+        :type read: bool
+        :param chunkSize: The largest number of bytes per command, at most the device's SPI_BUFFER_SIZE
+        :type chunkSize: int
+        :raises RuntimeError: if the device rejects a chunk
+        :return: The buffer received into, or None if read is False
+        :rtype: writable bytes-like
+        """
+
+        view = asBuffer(data)
+        usb = self.usb
+        args = (self.spiIndex,)
+        command = _WRITE_TO_READ_FROM if read else _WRITE_ONLY
+
+        if read:
+            if out is None:
+                out = bytearray(numBytes)
+            target = asBuffer(out)
+            if len(target) < numBytes:
+                raise ValueError(f"The receive buffer holds {len(target)} bytes, not the {numBytes} transferred")
+            prefix = command.expectedPrefix(args, True)
+
+        pending = collections.deque()
+
+        for offset in range(0, numBytes, chunkSize):
+            count = min(chunkSize, numBytes - offset)
+            future = usb.submit(command.format(args + (count, hexEncode(view[offset : offset + count], count))))
+            pending.append((offset, count, future))
+
+            if len(pending) > STREAM_WINDOW:
+                self._finishChunk(pending.popleft(), target if read else None, prefix if read else None)
+
+        while pending:
+            self._finishChunk(pending.popleft(), target if read else None, prefix if read else None)
+
+        return out if read else None
+
+    def _finishChunk(self, chunk, target, prefix):
+
+        offset, count, future = chunk
+        response = self.usb.collect(future)
+
+        if target is None:
+            _WRITE_ONLY.parse(response, (self.spiIndex,))
+            return
+
+        if not response.startswith(prefix):
+            _WRITE_TO_READ_FROM.parse(response, (self.spiIndex,))
+
+        hexDecodeInto(response, target[offset : offset + count], len(prefix) + 1)
+
+    def framedTransfers(self, transfers, csIndex=None, invertCS=False, deassertLast=True):
+        """
+        Runs a list of transfers, each framed by its own assertion and release of a chip select, in as few writes to
+        the device as its input buffer allows: SPI BEGIN, then chip select asserted, WHR and chip select released per
+        transfer, then SPI END. A write carries at most STREAM_WINDOW buffers' worth of payload, so a list of short
+        transfers costs one round trip. All of the replies are checked together once they are in.
+        :param transfers: (data, numBytes, read) per transfer; data shorter than numBytes is padded with zeros, and
+            numBytes may not exceed SPI_BUFFER_SIZE
+        :type transfers: list of tuple
+        :param csIndex: The IO pin used as chip select, or None to leave chip select alone
+        :type csIndex: int
+        :param invertCS: If True, chip select is active high
+        :type invertCS: bool
+        :param deassertLast: If False, chip select is left asserted after the last transfer
+        :type deassertLast: bool
+        :raises ValueError: if a transfer is longer than SPI_BUFFER_SIZE
+        :raises RuntimeError: if the device rejects any of the commands
+        :return: The bytes received by each transfer, empty for those that don't read
+        :rtype: list of bytearray
+        """
+
+        args = (self.spiIndex,)
+
+        # Each command, with the command definition and arguments its reply is checked against.
+        commands = [(_BEGIN, args)]
+
+        if csIndex is not None:
+            selected = (csIndex, 1 if invertCS else 0)
+            released = (csIndex, 0 if invertCS else 1)
+
+            # Start from the released level, so that the first transfer gets an edge to frame it.
+            commands.append((_IO_VALUE, released))
+
+        for number, (data, numBytes, read) in enumerate(transfers):
+            if numBytes > SPI_BUFFER_SIZE:
+                raise ValueError(f"A framed transfer can't exceed {SPI_BUFFER_SIZE} bytes, not {numBytes}")
+
+            if csIndex is not None:
+                commands.append((_IO_VALUE, selected))
+
+            exchange = _WRITE_TO_READ_FROM if read else _WRITE_ONLY
+            commands.append((exchange, args + (numBytes, hexEncode(data, numBytes) if numBytes else "0")))
+
+            if csIndex is not None and (deassertLast or number < len(transfers) - 1):
+                commands.append((_IO_VALUE, released))
 
-        result = self.usb.readResponse()
+        commands.append((_END, args))
 
-        if not read:
-            if not result.startswith("-OK"):
-                raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
+        results = []
+        window = []
+        payload = 0
 
-            return bytearray()
+        for command, commandArgs in commands:
+            if command is _WRITE_TO_READ_FROM or command is _WRITE_ONLY:
+                if window and payload + commandArgs[1] > STREAM_WINDOW * SPI_BUFFER_SIZE:
+                    results.extend(self.usb.sendBatch(window))
+                    window = []
+                    payload = 0
 
-        if not result.startswith("-SPI0 RXD "):
-            raise RuntimeError(f'Error Binho responded with {result}, not the expected "-SPI0 RXD ..."')
+                payload += commandArgs[1]
 
-        return bytearray.fromhex(result[9:])
+            window.append(command.format(commandArgs))
+
+        results.extend(self.usb.sendBatch(window))
+
+        received = []
+
+        for (command, commandArgs), result in zip(commands, results):
+            value = command.parse(result.response, commandArgs)
+
+            if command is _WRITE_TO_READ_FROM:
+                received.append(value)
+            elif command is _WRITE_ONLY:
+                received.append(bytearray())
+
+        _END.remember(self.usb.configuration, args)
+
+        return received
 
     def end(self, suppressError=False):
 
-        self.usb.sendCommand("SPI" + str(self.spiIndex) + " END")
+        args = (self.spiIndex,)
+
+        self.usb.sendCommand(_END.format(args))
         result = self.usb.readResponse()
 
-        if not result.startswith("-OK"):
-            if not suppressError:
-                raise RuntimeError(f'Error Binho responded with {result}, not the expected "-OK"')
+        if not suppressError:
+            _END.parse(result, args)
+
+        _END.remember(self.usb.configuration, args, result)
 
         return True
@@ -0,0 +1,231 @@
+"""
+Interrupt notifications from the device as a stream of timestamped events.
+
+Each notification line the device sends (e.g. "!IO1") becomes an interruptEvent, stamped with the host's monotonic
+clock as soon as the line is read, and is:
+
+- appended to a bounded ring buffer, from which events can be read in order with get() or drain();
+- passed to every callback registered with subscribe();
+- queued on every interruptStream, which delivers events to an `async for` loop.
+
+Nothing is de-duplicated, so every edge is counted and the order they arrived in is kept. When a buffer is full the
+oldest event is dropped to make room, and the drop is counted, so consumers that fall behind can tell.
+
+Callbacks run on the thread that reads the port: the transport thread, or in direct mode whichever thread is reading
+replies (binhoComms.interruptCount() and friends read any waiting lines). They should return quickly.
+"""
+
+import collections
+import threading
+import time
+
+# Events kept by a ring buffer unless told otherwise.
+DEFAULT_CAPACITY = 1024
+
+# One interrupt notification. time is the host's time.monotonic() when the line was read; sequence counts every
+# notification received, from 0, so gaps show where events were dropped.
+interruptEvent = collections.namedtuple("interruptEvent", ["source", "time", "sequence"])
+
+
+class interruptEvents:
+    """The interrupt notifications received over a connection."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        """
+        :param capacity: The number of events kept for get() and drain()
+        :type capacity: int
+        """
+
+        self.capacity = capacity
+        self.received = 0
+        self.dropped = 0
+        self.callbackErrors = 0
+
+        # Notifications received per source, e.g. {"!IO1": 12}.
+        self.counts = collections.Counter()
+
+        self._buffer = collections.deque()
+        self._subscribers = []
+        self._condition = threading.Condition()
+
+    def post(self, source, timestamp=None):
+        """
+        Records a notification and hands it to the subscribers.
+        :param source: The notification line, e.g. "!IO1"
+        :type source: str
+        :param timestamp: When it was received, on the time.monotonic() clock, or None for now
+        :type timestamp: float
+        :return: The event
+        :rtype: interruptEvent
+        """
+
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        with self._condition:
+            event = interruptEvent(source, timestamp, self.received)
+            self.received += 1
+            self.counts[source] += 1
+
+            if len(self._buffer) >= self.capacity:
+                self._buffer.popleft()
+                self.dropped += 1
+
+            self._buffer.append(event)
+            self._condition.notify_all()
+
+            subscribers = self._subscribers
+
+        for callback, wanted in subscribers:
+            if wanted is None or wanted == source:
+                try:
+                    callback(event)
+                except Exception:  # pylint: disable=broad-except
+                    self.callbackErrors += 1
+
+        return event
+
+    def subscribe(self, callback, source=None):
+        """
+        Calls callback(event) with every notification received from now on.
+        :param callback: The function to call
+        :type callback: callable
+        :param source: Only pass on notifications from this source, e.g. "!IO1", or None for all of them
+        :type source: str
+        :return: The callback, for unsubscribe()
+        :rtype: callable
+        """
+
+        with self._condition:
+            # Replaced rather than changed in place, so that post() can go through it without holding the lock.
+            self._subscribers = self._subscribers + [(callback, source)]
+
+        return callback
+
+    def unsubscribe(self, callback):
+        """
+        Stops calling a callback passed to subscribe().
+        :param callback: The callback, or one equal to it, such as the same bound method fetched again
+        :type callback: callable
+        """
+
+        with self._condition:
+            self._subscribers = [entry for entry in self._subscribers if entry[0] != callback]
+
+    def get(self, timeout=None):
+        """
+        Removes and returns the oldest buffered event, waiting for one if there are none.
+        :param timeout: Seconds to wait, or None to wait indefinitely
+        :type timeout: float
+        :return: The event, or None if none arrived in time
+        :rtype: interruptEvent
+        """
+
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._buffer, timeout):
+                return None
+
+            return self._buffer.popleft()
+
+    def drain(self):
+        """
+        Removes and returns every buffered event.
+        :return: The events, oldest first
+        :rtype: list of interruptEvent
+        """
+
+        with self._condition:
+            events = list(self._buffer)
+            self._buffer.clear()
+
+        return events
+
+    def stream(self, source=None, capacity=DEFAULT_CAPACITY):
+        """
+        Starts delivering notifications to an async iterator, for use from a running event loop:
+
+            async with comms.events.stream("!IO1") as edges:
+                async for event in edges:
+                    ...
+
+        :param source: Only deliver notifications from this source, or None for all of them
+        :type source: str
+        :param capacity: The number of events the stream holds for its reader before dropping the oldest
+        :type capacity: int
+        :return: The stream
+        :rtype: interruptStream
+        """
+
+        return interruptStream(self, source, capacity)
+
+    def reset(self):
+        """Discards the buffered events and zeroes the counters. Subscribers stay subscribed."""
+
+        with self._condition:
+            self._buffer.clear()
+            self.received = 0
+            self.dropped = 0
+            self.callbackErrors = 0
+            self.counts = collections.Counter()
+
+
+class interruptStream:
+    """Async iterator over the notifications received after it was created. Its buffer is separate from the ring's."""
+
+    def __init__(self, events, source, capacity):
+
+        # Only needed by those who stream, and slow to import.
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        self.dropped = 0
+
+        self._events = events
+        self._loop = asyncio.get_running_loop()
+        self._buffer = collections.deque(maxlen=capacity)
+        self._ready = asyncio.Event()
+        self._closed = False
+
+        events.subscribe(self._deliver, source)
+
+    def _deliver(self, event):
+
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+
+        self._buffer.append(event)
+        self._loop.call_soon_threadsafe(self._ready.set)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+
+        while not self._buffer:
+            if self._closed:
+                raise StopAsyncIteration
+
+            self._ready.clear()
+
+            # An event may have been delivered between the check and the clear.
+            if not self._buffer:
+                await self._ready.wait()
+
+        return self._buffer.popleft()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Stops delivering notifications; iteration ends once the events already delivered have been read."""
+
+        self._events.unsubscribe(self._deliver)
+        self._closed = True
+
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # The loop has already been closed.
+            pass
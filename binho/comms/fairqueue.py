@@ -0,0 +1,88 @@
+"""
+Transmit queue that shares the device fairly between the threads using it.
+"""
+
+import collections
+import queue
+import threading
+import time
+
+
+class fairQueue:
+    """
+    A drop-in replacement for queue.Queue that keeps a separate FIFO per submitting thread and hands entries out
+    round-robin across those threads. A thread that pipelines hundreds of commands therefore cannot delay another
+    thread's single command by more than one entry per competing thread.
+
+    Only the subset of the queue.Queue interface used by the transport is provided.
+    """
+
+    def __init__(self):
+
+        self._clients = {}
+        self._ready = collections.deque()
+        self._count = 0
+        self._notEmpty = threading.Condition(threading.Lock())
+
+    def put(self, item, block=True, timeout=None):  # pylint: disable=unused-argument
+        """Queues an item on behalf of the calling thread. The queue is unbounded, so this never blocks."""
+
+        client = threading.get_ident()
+
+        with self._notEmpty:
+            entries = self._clients.get(client)
+
+            if entries is None:
+                entries = self._clients[client] = collections.deque()
+
+            if not entries:
+                self._ready.append(client)
+
+            entries.append(item)
+            self._count += 1
+            self._notEmpty.notify()
+
+    def put_nowait(self, item):
+        self.put(item, block=False)
+
+    def get(self, block=True, timeout=None):
+        """
+        Removes and returns the next item, taking one item from each waiting thread in turn.
+        :raises queue.Empty: if no item is available within timeout, or at once if block is False
+        """
+
+        with self._notEmpty:
+            if not block:
+                if not self._count:
+                    raise queue.Empty
+            elif timeout is None:
+                while not self._count:
+                    self._notEmpty.wait()
+            else:
+                deadline = time.monotonic() + timeout
+                while not self._count:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Empty
+                    self._notEmpty.wait(remaining)
+
+            client = self._ready.popleft()
+            entries = self._clients[client]
+            item = entries.popleft()
+            self._count -= 1
+
+            if entries:
+                self._ready.append(client)
+            else:
+                del self._clients[client]
+
+            return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def empty(self):
+        return not self._count
+
+    def qsize(self):
+        return self._count
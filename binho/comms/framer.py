@@ -0,0 +1,110 @@
+"""
+Byte-level line framing for the device's ASCII protocol.
+"""
+
+import os
+
+
+class lineFramer:
+    """
+    Incrementally splits a byte stream into newline-terminated lines.
+
+    Incoming data lands in a single bytearray that is reused for the lifetime of the connection; on POSIX hosts
+    readFrom() reads whatever the descriptor has available straight into its free tail with one syscall. lines()
+    then hands out memoryviews of each complete line without copying or decoding it. A line that is still being
+    received stays in the buffer, and the search for its terminator resumes where the previous one stopped, so a
+    long reply arriving in many small reads is only scanned once.
+    """
+
+    # Initial buffer size; comfortably holds a full 1 KB transfer reply (2 KB of hex plus its header).
+    INITIAL_SIZE = 4096
+
+    def __init__(self, size=INITIAL_SIZE):
+
+        self._buffer = bytearray(size)
+        self._end = 0
+        self._scanFrom = 0
+
+    def __len__(self):
+        """Returns the number of buffered bytes that have not been handed out as a line yet."""
+        return self._end
+
+    def _reserve(self, count):
+
+        needed = self._end + count
+
+        if needed > len(self._buffer):
+            size = len(self._buffer)
+            while size < needed:
+                size *= 2
+            self._buffer.extend(bytes(size - len(self._buffer)))
+
+    def readFrom(self, fd, size=65536):
+        """
+        Reads everything currently available on a non-blocking file descriptor (up to size bytes) into the buffer.
+        :param fd: The file descriptor to read from
+        :type fd: int
+        :param size: The most bytes to read in this call
+        :type size: int
+        :return: The number of bytes read; 0 means the other end has closed, -1 that nothing was available
+        :rtype: int
+        """
+
+        self._reserve(size)
+
+        with memoryview(self._buffer) as view:
+            try:
+                count = os.readv(fd, [view[self._end : self._end + size]])
+            except BlockingIOError:
+                return -1
+
+        self._end += count
+        return count
+
+    def feed(self, data):
+        """
+        Appends received bytes to the buffer.
+        :param data: The received data
+        :type data: bytes-like
+        """
+
+        count = len(data)
+        self._reserve(count)
+        self._buffer[self._end : self._end + count] = data
+        self._end += count
+
+    def lines(self):
+        """
+        Yields a memoryview of each complete line in the buffer, without its terminating newline. The views are
+        only valid until the next item is requested; copy a line (e.g. with bytes()) to keep it.
+        """
+
+        buffer = self._buffer
+        start = 0
+
+        try:
+            while True:
+                end = buffer.find(b"\n", max(start, self._scanFrom), self._end)
+
+                if end < 0:
+                    self._scanFrom = self._end
+                    break
+
+                with memoryview(buffer) as view, view[start:end] as line:
+                    yield line
+
+                start = end + 1
+
+        finally:
+            # Move the unfinished remainder to the front so the buffer never grows from consumed lines.
+            if start:
+                remaining = self._end - start
+                buffer[:remaining] = buffer[start : self._end]
+                self._end = remaining
+                self._scanFrom = max(self._scanFrom - start, 0)
+
+    def clear(self):
+        """Discards any buffered data."""
+
+        self._end = 0
+        self._scanFrom = 0
@@ -0,0 +1,129 @@
+"""
+Conversions between binary payloads and the text encodings used by the device's ASCII protocol.
+
+Every function accepts any object supporting the buffer protocol (bytes, bytearray, memoryview, array, mmap, ...)
+and does the conversion in a single C-level call, without copying the payload first. Lists and other iterables of
+ints are accepted too, at the cost of one conversion to bytes.
+"""
+
+import binascii
+
+
+def asBuffer(data):
+    """
+    Returns a flat memoryview of a payload's bytes without copying it, or of a bytes copy if the payload doesn't
+    support the buffer protocol (e.g. a list of ints).
+    :rtype: memoryview
+    """
+
+    try:
+        view = memoryview(data)
+    except TypeError:
+        return memoryview(bytes(data))
+
+    # Treat multi-byte element types (e.g. array("H")) as their raw bytes.
+    if view.format != "B" or view.ndim != 1:
+        view = view.cast("B")
+
+    return view
+
+
+def hexEncode(data, count=None):
+    """
+    Encodes a payload as the unseparated hex string the device expects, e.g. b"\\x01\\xab" -> "01ab".
+    :param data: The payload
+    :type data: bytes-like or iterable of int
+    :param count: If given, encode exactly this many bytes: longer payloads are truncated, and shorter ones are
+        padded with zero bytes
+    :type count: int
+    :rtype: str
+    """
+
+    view = asBuffer(data)
+
+    if count is None:
+        return view.hex()
+
+    if count <= len(view):
+        return view[:count].hex()
+
+    return view.hex() + "00" * (count - len(view))
+
+
+def hexFill(value, count):
+    """
+    Encodes count copies of one byte, e.g. the dummy byte clocked out during an SPI read.
+    :param value: The byte value
+    :type value: int
+    :param count: Number of bytes
+    :type count: int
+    :rtype: str
+    """
+    return "{:02x}".format(value) * count
+
+
+def hexDecode(text, start=0):
+    """
+    Decodes the hex payload of a response, e.g. the "0102abff" of "-SPI0 RXD 0102abff".
+    :param text: The response, as str or undecoded bytes
+    :type text: str or bytes-like
+    :param start: Offset of the payload within text. A raw response line can be passed with the offset of its
+        payload, so that nothing is copied or decoded before the payload itself.
+    :type start: int
+    :return: The decoded payload
+    :rtype: bytearray
+    """
+
+    if isinstance(text, str):
+        return bytearray.fromhex(text[start:])
+
+    view = asBuffer(text)[start:]
+
+    try:
+        return bytearray(binascii.unhexlify(view))
+    except (binascii.Error, ValueError):
+        # Stray whitespace around the payload; fall back to the lenient parser.
+        return bytearray.fromhex(bytes(view).decode("ascii"))
+
+
+def hexDecodeInto(text, out, start=0):
+    """
+    Decodes the hex payload of a response into a caller's buffer, e.g. a slice of a larger receive buffer.
+    :param text: The response, as str or undecoded bytes
+    :type text: str or bytes-like
+    :param out: Where to write the payload; it must be writable and at least as long as the payload
+    :type out: writable bytes-like
+    :param start: Offset of the payload within text
+    :type start: int
+    :return: The number of bytes decoded
+    :rtype: int
+    """
+
+    if isinstance(text, str):
+        payload = bytes.fromhex(text[start:])
+    else:
+        view = asBuffer(text)[start:]
+
+        try:
+            payload = binascii.unhexlify(view)
+        except (binascii.Error, ValueError):
+            payload = bytes.fromhex(bytes(view).decode("ascii"))
+
+    asBuffer(out)[: len(payload)] = payload
+
+    return len(payload)
+
+
+def decimalEncode(data):
+    """
+    Encodes a payload as space-separated decimal values, as taken by the BUF and I2C WRITE commands.
+    :param data: The payload
+    :type data: bytes-like or iterable of int
+    :rtype: str
+    """
+
+    try:
+        return " ".join(map(str, asBuffer(data)))
+    except ValueError:
+        # Values that don't fit in a byte; let the device reject them as it always has.
+        return " ".join(map(str, data))
@@ -1,8 +1,12 @@
 from __future__ import absolute_import
 
+import socket
+
 import serial
 from serial.tools.list_ports import comports
 
+from .comms import binhoException, findDaemon, isTrustedDaemon
+
 
 class CommsError(IOError):
     """ Generic class for communications errors. """
@@ -15,6 +19,11 @@ class CommandFailureError(CommsError):
 class binhoDeviceManager:
     @classmethod
     def _checkForDeviceID(cls, serialPort):
+        # A port shared by `binho serve` can't be opened; ask the daemon instead.
+        daemonSocket = findDaemon(serialPort)
+        if daemonSocket is not None:
+            return cls._checkForDeviceIDThroughDaemon(daemonSocket)
+
         comport = serial.Serial(serialPort, baudrate=1000000, timeout=0.025, write_timeout=0.05)
         command = "+ID ?\n"
         comport.write(command.encode("utf-8"))
@@ -25,6 +34,21 @@ class binhoDeviceManager:
         comport.close()
         return receivedData
 
+    @classmethod
+    def _checkForDeviceIDThroughDaemon(cls, daemonSocket):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(0.5)
+            connection.connect(daemonSocket)
+            if not isTrustedDaemon(connection, daemonSocket):
+                raise binhoException(f"The binho serve socket {daemonSocket} is served by another user")
+            connection.sendall(b"+ID ?\n")
+            with connection.makefile("rb") as reply:
+                # Skip any interrupt notifications the daemon forwards ahead of the answer.
+                for line in reply:
+                    if line.startswith(b"-"):
+                        return line.strip().decode("utf-8")
+        return ""
+
     @classmethod
     def listAvailablePorts(cls):
 
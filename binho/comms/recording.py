@@ -0,0 +1,130 @@
+"""
+Compact binary logs of the lines exchanged with a device, for reproducing sessions offline.
+
+A log starts with an 8-byte magic number and a version byte, followed by one record per line: a direction byte (TX_LINE
+for lines sent to the device, RX_LINE for lines received from it), the line's time as nanoseconds on the monotonic
+clock since recording started (unsigned 64-bit), the line's length (unsigned 32-bit) and the line itself, without its
+newline. All integers are little-endian.
+
+binhoComms.startRecording() writes a log; readSession() reads one back, and binho.comms.virtual.replayDevice serves
+one to the host stack in place of the device.
+"""
+
+import collections
+import struct
+import threading
+import time
+
+LOG_MAGIC = b"BINHOLOG"
+LOG_VERSION = 1
+
+# Record directions. They are the characters ">" and "<", so that logs read naturally in a hex dump.
+TX_LINE = 0x3E
+RX_LINE = 0x3C
+
+_HEADER = struct.Struct("<8sB")
+_RECORD = struct.Struct("<BQI")
+
+# One line of a recorded session; time is in seconds since recording started.
+sessionRecord = collections.namedtuple("sessionRecord", ["direction", "time", "line"])
+
+
+class sessionRecorder:
+    """Writes a session log. Lines are buffered, and reach the file once the buffer fills up or on close()."""
+
+    def __init__(self, path):
+        """
+        :param path: The file to write the log to. An existing file is replaced.
+        :type path: str
+        """
+
+        self.path = path
+        self.lineCount = 0
+
+        self._file = open(path, "wb")  # pylint: disable=consider-using-with
+        self._file.write(_HEADER.pack(LOG_MAGIC, LOG_VERSION))
+        self._start = time.monotonic_ns()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def record(self, direction, line):
+        """
+        Appends one line to the log, timestamped now.
+        :param direction: TX_LINE or RX_LINE
+        :type direction: int
+        :param line: The line, without its newline
+        :type line: bytes
+        """
+
+        header = _RECORD.pack(direction, time.monotonic_ns() - self._start, len(line))
+
+        with self._lock:
+            if self._file is not None:
+                self._file.write(header)
+                self._file.write(line)
+                self.lineCount += 1
+
+    def recordWrite(self, data):
+        """
+        Appends every line of a write to the device to the log.
+        :param data: The bytes written, one or more newline-terminated lines
+        :type data: bytes
+        """
+
+        for line in data.split(b"\n"):
+            if line:
+                self.record(TX_LINE, line)
+
+    def close(self):
+        """Flushes the log and closes its file."""
+
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def readSession(path):
+    """
+    Reads back a log written by sessionRecorder.
+    :param path: The log file
+    :type path: str
+    :raises ValueError: if the file isn't a session log, or is of a newer version
+    :return: The recorded lines, in the order they were recorded
+    :rtype: list of sessionRecord
+    """
+
+    with open(path, "rb") as logFile:
+        data = logFile.read()
+
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path} is not a session log")
+
+    magic, version = _HEADER.unpack_from(data)
+
+    if magic != LOG_MAGIC:
+        raise ValueError(f"{path} is not a session log")
+
+    if version > LOG_VERSION:
+        raise ValueError(f"{path} is a version {version} session log; only version {LOG_VERSION} is supported")
+
+    records = []
+    offset = _HEADER.size
+
+    # A log cut short by a crash ends with a partial record, which is dropped.
+    while offset + _RECORD.size <= len(data):
+        direction, timestamp, length = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+
+        if offset + length > len(data):
+            break
+
+        records.append(sessionRecord(direction, timestamp / 1e9, data[offset : offset + length]))
+        offset += length
+
+    return records
@@ -0,0 +1,206 @@
+"""
+Per-command statistics for a binhoComms connection: counts, bytes on the wire and latency histograms, per verb.
+
+Collection is off by default; binhoComms.enableStats() switches it on. While it is off, the only cost is a check for
+None when a command is sent.
+"""
+
+import threading
+
+
+class latencyHistogram:
+    """
+    HDR-style histogram of latencies. Values are kept in log-linear buckets with SUB_BUCKET_BITS bits of precision, so
+    every recorded value and every percentile is accurate to within 1 part in 2 ** SUB_BUCKET_BITS, whatever its
+    magnitude, and recording costs a few integer operations.
+    """
+
+    # 7 bits keeps values to within 1%.
+    SUB_BUCKET_BITS = 7
+
+    def __init__(self):
+
+        # Count per bucket, keyed by the lowest value (in ns) the bucket holds.
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = 0
+
+    def record(self, seconds):
+        """
+        :param seconds: The latency
+        :type seconds: float
+        """
+
+        value = int(seconds * 1e9)
+        shift = max(value.bit_length() - self.SUB_BUCKET_BITS, 0)
+        bucket = (value >> shift) << shift
+
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def percentile(self, percent):
+        """
+        :param percent: The percentile, from 0 to 100
+        :type percent: float
+        :return: The latency in seconds that percent of the recorded latencies don't exceed, or None if nothing has
+            been recorded
+        :rtype: float
+        """
+
+        if not self.count:
+            return None
+
+        # The rank of the value asked for, counting from 1.
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+
+            if seen >= rank:
+                # Report the highest value the bucket can hold, as HdrHistogram does, but never more than the max.
+                shift = max(bucket.bit_length() - self.SUB_BUCKET_BITS, 0)
+                return min(bucket + (1 << shift) - 1, self.maximum) / 1e9
+
+        return self.maximum / 1e9
+
+    @property
+    def mean(self):
+        """The mean latency in seconds, or None if nothing has been recorded."""
+        return self.total / self.count / 1e9 if self.count else None
+
+    @property
+    def max(self):
+        """The highest latency in seconds, or None if nothing has been recorded."""
+        return self.maximum / 1e9 if self.count else None
+
+
+class verbStats:
+    """Statistics of one command verb, e.g. "SPI WHR"."""
+
+    def __init__(self, verb):
+
+        self.verb = verb
+        self.count = 0
+        self.errors = 0
+        self.bytesOut = 0
+        self.bytesIn = 0
+        self.latency = latencyHistogram()
+
+    def summary(self):
+        """
+        :return: The statistics as a dict, with latencies in seconds
+        :rtype: dict
+        """
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "bytesOut": self.bytesOut,
+            "bytesIn": self.bytesIn,
+            "p50": self.latency.percentile(50),
+            "p99": self.latency.percentile(99),
+            "max": self.latency.max,
+            "mean": self.latency.mean,
+        }
+
+
+class commsStats:
+    """
+    Statistics of every command sent over a connection, per verb. Latency is measured from when a command is queued
+    to when its reply arrives, so it includes time spent waiting behind other commands.
+    """
+
+    def __init__(self):
+
+        self.verbs = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, verb):
+        return self.verbs[verb]
+
+    def __contains__(self, verb):
+        return verb in self.verbs
+
+    def record(self, verb, bytesOut, bytesIn, latency, failed=False):  # pylint: disable=too-many-arguments
+        """
+        Records one command and its reply.
+        :param verb: The command's verb
+        :type verb: str
+        :param bytesOut: Bytes written for the command
+        :type bytesOut: int
+        :param bytesIn: Bytes received in reply
+        :type bytesIn: int
+        :param latency: Seconds from sending the command to receiving the reply
+        :type latency: float
+        :param failed: True if the device rejected the command or never answered it
+        :type failed: bool
+        """
+
+        with self._lock:
+            stats = self.verbs.get(verb)
+
+            if stats is None:
+                stats = self.verbs[verb] = verbStats(verb)
+
+            stats.count += 1
+            stats.bytesOut += bytesOut
+            stats.bytesIn += bytesIn
+            stats.latency.record(latency)
+
+            if failed:
+                stats.errors += 1
+
+    def reset(self):
+        """Discards everything recorded so far."""
+
+        with self._lock:
+            self.verbs = {}
+
+    def summary(self):
+        """
+        :return: The statistics of each verb as returned by verbStats.summary(), keyed by verb
+        :rtype: dict
+        """
+
+        with self._lock:
+            return {verb: stats.summary() for verb, stats in sorted(self.verbs.items())}
+
+    def report(self):
+        """
+        :return: The statistics as a table, with latencies in microseconds
+        :rtype: str
+        """
+
+        def micros(seconds):
+            return "-" if seconds is None else "{:.1f}".format(seconds * 1e6)
+
+        lines = [
+            "{:<18} {:>8} {:>7} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+                "verb", "count", "errors", "bytes out", "bytes in", "p50 (us)", "p99 (us)", "max (us)"
+            )
+        ]
+
+        for verb, summary in self.summary().items():
+            lines.append(
+                "{:<18} {:>8} {:>7} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+                    verb,
+                    summary["count"],
+                    summary["errors"],
+                    summary["bytesOut"],
+                    summary["bytesIn"],
+                    micros(summary["p50"]),
+                    micros(summary["p99"]),
+                    micros(summary["max"]),
+                )
+            )
+
+        return "\n".join(lines)
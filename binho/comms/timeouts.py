@@ -0,0 +1,233 @@
+"""
+Per-command response deadlines, in place of a single fixed timeout for every command.
+
+A command's deadline is the sum of two parts:
+
+- the time it takes to move the command's payload over the target bus and the USB link, worked out from the number of
+  bytes it transfers and the bus clock last set or read back over the connection;
+- the time the device takes to turn around a command of its verb, learned from the replies seen so far as a smoothed
+  mean plus four smoothed mean deviations, the way TCP sets its retransmission timeout.
+
+Until a verb has been answered LEARNING_SAMPLES times, the fixed timeout stands in for the learned part, so that the
+first commands are never cut short. Once it is learned, a short command that goes unanswered is given up on after
+MIN_TIMEOUT instead of the full fixed timeout, while a long transfer gets as long as its payload needs.
+
+Deadlines run from when the device reaches a command, not from when it was sent: binhoComms.collect() waits out the
+commands ahead of it in the device's queue, each against its own deadline, before starting the clock on it. A missed
+deadline fails only that command, since a stall on the host can cause one; the connection is only given up on once the
+device has answered nothing for the fixed timeout.
+"""
+
+from .commands import commandVerb
+
+# Replies a verb must have had before its learned turnaround time is trusted.
+LEARNING_SAMPLES = 8
+
+# The shortest deadline given to any command once its verb is learned, to ride out scheduling hiccups on the host.
+MIN_TIMEOUT = 0.1
+
+# Headroom on the payload transfer time, for per-byte overhead on the device.
+TRANSFER_MARGIN = 2.0
+
+# Bytes per second assumed for the USB link, well below what it achieves, so that the estimate errs long.
+LINK_BYTES_PER_SECOND = 100000
+
+# Bits clocked per payload byte on each kind of bus, and the clock assumed until one is set or read back. Unknown clocks
+# are taken to be the slowest in common use; 1-Wire runs at about one bit per 70us.
+_BUSES = {"SPI": (8, 500000), "I2C": (9, 100000), "1WIRE": (8, 14000)}
+
+# The number of bytes each transferring verb moves over its bus, from the words of the command.
+_PAYLOAD_BYTES = {
+    "SPI WHR": lambda words: int(words[3]),
+    "SPI TXRX": lambda words: len(words[2]) // 2,
+    "I2C WHR": lambda words: 1 + int(words[4]) + int(words[5]),
+    "I2C REQ": lambda words: 1 + int(words[3]),
+    "I2C WRITE": lambda words: len(words) - 2,
+    "I2C SCAN": lambda words: 1,
+    "1WIRE WHR": lambda words: 1 + int(words[3]) + int(words[4]),
+    "1WIRE WRITE": lambda words: 1,
+    "1WIRE READ": lambda words: 1,
+}
+
+_CLOCK_VERBS = ("SPI CLK", "I2C CLK")
+
+
+class responseTimeouts:
+    """
+    Learns how long the device takes to answer each verb, and the clock of each bus, and gives each command a deadline
+    from them. Updates from several threads may interleave; that only perturbs the estimates slightly.
+    """
+
+    def __init__(self, fallback):
+        """
+        :param fallback: Seconds to wait for a reply to a verb that hasn't been learned yet
+        :type fallback: float
+        """
+
+        self.fallback = fallback
+        self.minimum = MIN_TIMEOUT
+
+        # Bus clocks in Hz, keyed by bus, e.g. "SPI0".
+        self.clocks = {}
+
+        # [replies seen, smoothed turnaround, smoothed mean deviation] per verb, in seconds.
+        self._verbs = {}
+
+        # The last command estimated, with its verb and transfer time: a reply is usually learned from right after
+        # its command's deadline was set.
+        self._last = (None, None, 0.0)
+
+    def transferTime(self, command):
+        """
+        :param command: The command line
+        :type command: str
+        :return: The nominal seconds spent moving the command, its reply and its payload over the USB link and the
+            target bus
+        :rtype: float
+        """
+
+        return self._estimate(command)[2]
+
+    def _estimate(self, command):
+
+        last = self._last
+
+        if last[0] is command:
+            return last
+
+        verb = commandVerb(command)
+        self._last = last = (command, verb, self._transferTime(command, verb))
+
+        return last
+
+    def _transferTime(self, command, verb):
+
+        link = len(command) / LINK_BYTES_PER_SECOND
+        payload = _PAYLOAD_BYTES.get(verb)
+
+        if payload is None:
+            return link
+
+        words = command.split()
+
+        try:
+            count = payload(words)
+        except (IndexError, ValueError):
+            # A malformed command, which the device will reject straight away.
+            return link
+
+        bitsPerByte, defaultClock = _BUSES[words[0].rstrip("0123456789")]
+        clock = self.clocks.get(words[0], defaultClock)
+
+        # The reply carries the bytes read back as two hex digits each.
+        return link + 2 * count / LINK_BYTES_PER_SECOND + count * bitsPerByte / clock
+
+    def _turnaround(self, verb):
+
+        model = self._verbs.get(verb)
+
+        # The mean turnaround, and the longest one allowed for.
+        if model is None or model[0] < LEARNING_SAMPLES:
+            return 0.0, self.fallback
+
+        return model[1], max(self.minimum, model[1] + 4 * model[2])
+
+    def timeout(self, command):
+        """
+        :param command: The command line
+        :type command: str
+        :return: Seconds to wait for the reply to the command before giving up on it
+        :rtype: float
+        """
+
+        _, verb, transfer = self._estimate(command)
+
+        return self._turnaround(verb)[1] + TRANSFER_MARGIN * transfer
+
+    def pipelineTimeout(self, commands):
+        """
+        :param commands: Commands written back-to-back
+        :type commands: list of str
+        :return: Seconds to wait for the reply to the last of the commands, which the device answers only after all of
+            the others
+        :rtype: float
+        """
+
+        total = 0.0
+        longest = 0.0
+
+        for command in commands:
+            verb = commandVerb(command)
+            mean, deadline = self._turnaround(verb)
+            total += mean + TRANSFER_MARGIN * self._transferTime(command, verb)
+            longest = max(longest, deadline - mean)
+
+        # Every command takes its usual time, and any one of them may run as late as its deadline allows.
+        return total + longest
+
+    def observe(self, command, response, latency=None):
+        """
+        Learns from the reply to a command.
+        :param command: The command line
+        :type command: str
+        :param response: The reply
+        :type response: str or bytes
+        :param latency: Seconds from sending the command to receiving the reply, or None if that isn't known
+        :type latency: float
+        """
+
+        _, verb, transfer = self._estimate(command)
+
+        if verb in _CLOCK_VERBS:
+            self._observeClock(command, response)
+
+        if latency is None:
+            return
+
+        sample = max(0.0, latency - transfer)
+        model = self._verbs.get(verb)
+
+        if model is None:
+            self._verbs[verb] = [1, sample, sample / 2]
+            return
+
+        model[0] += 1
+        model[2] += (abs(model[1] - sample) - model[2]) / 4
+        model[1] += (sample - model[1]) / 8
+
+    def _observeClock(self, command, response):
+
+        words = command.split()
+        value = words[2] if len(words) > 2 else "?"
+
+        if value == "?":
+            # A query's reply ends with the clock, e.g. "-SPI0 CLK 2000000".
+            if isinstance(response, (bytes, bytearray)):
+                response = response.decode("utf-8", "replace")
+            value = response.rsplit(" ", 1)[-1]
+        elif not response.startswith("-OK" if isinstance(response, str) else b"-OK"):
+            return
+
+        if value.isdigit() and int(value) > 0:
+            self.clocks[words[0]] = int(value)
+            self._last = (None, None, 0.0)
+
+    def turnaround(self, verb):
+        """
+        :param verb: A command verb, e.g. "SPI WHR"
+        :type verb: str
+        :return: The learned turnaround time of the verb and its mean deviation in seconds, or None if it hasn't been
+            answered yet
+        :rtype: tuple
+        """
+
+        model = self._verbs.get(verb)
+
+        return None if model is None else (model[1], model[2])
+
+    def reset(self):
+        """Forgets everything learned."""
+
+        self.clocks = {}
+        self._verbs = {}
+        self._last = (None, None, 0.0)
@@ -0,0 +1,309 @@
+"""
+Timeline tracing in the Chrome trace-event format, for viewing in Perfetto (ui.perfetto.dev) or chrome://tracing.
+
+Tracing is process-wide and off by default; startTracing() switches it on. While it is on, spans are recorded at three
+levels, each nested in the one above it on the thread that ran it:
+
+- high-level operations, such as SPIFlash.readBytes or I2CBus.scan, marked with the traced decorator or span();
+- every command sent by binhoComms, named by its verb (e.g. "SPI WHR");
+- within each command, the time it spent queued behind other commands ("queued") and the time from being written to
+  the device to its reply arriving ("wire").
+
+Commands that are pipelined with submit() or sent in a batch overlap each other, so they are recorded as async spans,
+which the viewers draw on tracks of their own.
+
+Events are buffered and written out in blocks, so tracing a long job costs little more than building each event. The
+file is a JSON array of events; it is terminated when tracing stops, but the viewers also accept a file cut short by a
+crash. While tracing is off, the only cost is a check for None.
+"""
+
+import contextlib
+import functools
+import itertools
+import json
+import threading
+import time
+from json.encoder import encode_basestring_ascii as _quote
+
+# Events are written out once this many have been buffered.
+FLUSH_EVENTS = 4096
+
+# Command and reply text longer than this is cut short in event arguments, to keep the trace to a sensible size.
+ARGUMENT_LIMIT = 64
+
+# The tracer that spans are recorded to, or None if tracing is off.
+activeTracer = None
+
+
+# Templates for the events written, filled in with JSON-encoded strings and times in microseconds.
+_COMPLETE_EVENT = '{"name":%s,"cat":%s,"ph":"X","pid":0,"tid":%d,"ts":%.3f,"dur":%.3f%s}'
+_ASYNC_EVENT = '{"name":%s,"cat":%s,"ph":"%s","pid":0,"id":%d,"ts":%.3f%s}'
+_METADATA_EVENT = '{"name":%s,"ph":"M","pid":0%s,"args":{"name":%s}}'
+
+
+def _encodeArgs(args):
+
+    if not args:
+        return ""
+
+    # Command and reply text is all this library records itself, so encode plain strings without the json module.
+    if all(isinstance(value, str) for value in args.values()):
+        fields = ",".join(_quote(key) + ":" + _quote(value) for key, value in args.items())
+        return ',"args":{' + fields + "}"
+
+    return ',"args":' + json.dumps(args, separators=(",", ":"), default=str)
+
+
+class commandTracer:
+    """
+    Writes trace events to a file. Times are time.perf_counter() values, in seconds. Events are kept as tuples until
+    they are written out, and only then encoded, a block at a time.
+    """
+
+    def __init__(self, path, flushEvents=FLUSH_EVENTS):
+        """
+        :param path: The file to write the trace to. An existing file is replaced.
+        :type path: str
+        :param flushEvents: The number of events to buffer before writing them out
+        :type flushEvents: int
+        """
+
+        self.path = path
+        self.flushEvents = flushEvents
+        self.eventCount = 0
+
+        self._file = open(path, "w")  # pylint: disable=consider-using-with
+        self._file.write("[")
+        self._separator = "\n"
+        self._origin = time.perf_counter()
+        self._events = []
+        self._threads = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        self._add(("M", "process_name", None, "binho"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _add(self, event):
+
+        with self._lock:
+            if self._file is None:
+                return
+
+            self._events.append(event)
+            self.eventCount += 1
+
+            if len(self._events) >= self.flushEvents:
+                self._flush()
+
+    def _encode(self, event):
+
+        phase = event[0]
+
+        if phase == "X":
+            _, name, category, tid, start, end, args = event
+            return _COMPLETE_EVENT % (
+                _quote(name),
+                _quote(category),
+                tid,
+                (start - self._origin) * 1e6,
+                (end - start) * 1e6,
+                _encodeArgs(args),
+            )
+
+        if phase == "M":
+            _, name, tid, value = event
+            return _METADATA_EVENT % (_quote(name), "" if tid is None else ',"tid":%d' % tid, _quote(value))
+
+        _, name, category, spanId, timestamp, args = event
+        return _ASYNC_EVENT % (
+            _quote(name),
+            _quote(category),
+            phase,
+            spanId,
+            (timestamp - self._origin) * 1e6,
+            _encodeArgs(args),
+        )
+
+    def _flush(self):
+
+        if self._events:
+            self._file.write(self._separator)
+            self._file.write(",\n".join(self._encode(event) for event in self._events))
+            self._separator = ",\n"
+            self._events = []
+
+    def currentThread(self):
+        """
+        :return: The calling thread's ID, for complete(). Its track is named after it the first time it is seen.
+        :rtype: int
+        """
+
+        tid = threading.get_ident()
+
+        if tid not in self._threads:
+            self._threads.add(tid)
+            self._add(("M", "thread_name", tid, threading.current_thread().name))
+
+        return tid
+
+    def complete(self, name, category, start, end, args=None, tid=None):  # pylint: disable=too-many-arguments
+        """
+        Records a span on a thread's track. Spans on the same thread must nest.
+        :param name: The span's name
+        :type name: str
+        :param category: The span's category, e.g. "operation" or "command"
+        :type category: str
+        :param start: When the span started
+        :type start: float
+        :param end: When the span ended
+        :type end: float
+        :param args: Details shown alongside the span, or None
+        :type args: dict
+        :param tid: The thread the span belongs to, as returned by currentThread() on it, or None for the calling
+            thread
+        :type tid: int
+        """
+
+        self._add(("X", name, category, self.currentThread() if tid is None else tid, start, end, args))
+
+    def asyncSpan(self, name, category, start, end, args=None, spanId=None):  # pylint: disable=too-many-arguments
+        """
+        Records a span that may overlap others, on a track of its own.
+        :param name: The span's name
+        :type name: str
+        :param category: The span's category
+        :type category: str
+        :param start: When the span started
+        :type start: float
+        :param end: When the span ended
+        :type end: float
+        :param args: Details shown alongside the span, or None
+        :type args: dict
+        :param spanId: The ID of the span to nest this one in, as returned by newId(), or None for a new one
+        :type spanId: int
+        :return: The span's ID
+        :rtype: int
+        """
+
+        if spanId is None:
+            spanId = self.newId()
+
+        self._add(("b", name, category, spanId, start, args))
+        self._add(("e", name, category, spanId, end, None))
+
+        return spanId
+
+    def newId(self):
+        """
+        :return: A fresh ID for asyncSpan()
+        :rtype: int
+        """
+
+        return next(self._ids)
+
+    def flush(self):
+        """Writes out any buffered events."""
+
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+                self._file.flush()
+
+    def close(self):
+        """Writes out any buffered events, terminates the JSON array and closes the file."""
+
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+                self._file.write("\n]\n")
+                self._file.close()
+                self._file = None
+
+
+def startTracing(path, flushEvents=FLUSH_EVENTS):
+    """
+    Starts tracing every operation and command in the process to a file. Tracing already in progress is stopped first.
+    :param path: The file to write the trace to. An existing file is replaced.
+    :type path: str
+    :param flushEvents: The number of events to buffer before writing them out
+    :type flushEvents: int
+    :return: The tracer
+    :rtype: commandTracer
+    """
+
+    global activeTracer  # pylint: disable=global-statement
+
+    stopTracing()
+    activeTracer = commandTracer(path, flushEvents)
+
+    return activeTracer
+
+
+def stopTracing():
+    """Stops the tracing started by startTracing(), and closes its file."""
+
+    global activeTracer  # pylint: disable=global-statement
+
+    tracer = activeTracer
+    activeTracer = None
+
+    if tracer is not None:
+        tracer.close()
+
+
+@contextlib.contextmanager
+def span(name, category="operation", **args):
+    """
+    Records the with-block as a span, if tracing is on:
+
+        with span("calibrate", channel=2):
+            ...
+
+    :param name: The span's name
+    :type name: str
+    :param category: The span's category
+    :type category: str
+    :param args: Details shown alongside the span
+    """
+
+    tracer = activeTracer
+
+    if tracer is None:
+        yield
+        return
+
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        tracer.complete(name, category, start, time.perf_counter(), args)
+
+
+def traced(function):
+    """Decorator that records each call to a method as an operation span, named after the method, if tracing is on."""
+
+    name = function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+
+        tracer = activeTracer
+
+        if tracer is None:
+            return function(*args, **kwargs)
+
+        start = time.perf_counter()
+
+        try:
+            return function(*args, **kwargs)
+        finally:
+            tracer.complete(name, "operation", start, time.perf_counter())
+
+    return wrapper
@@ -0,0 +1,538 @@
+"""
+Simulated host adapters on a pseudo-terminal, for exercising the host stack without hardware (POSIX only): a
+virtual Nova, and a device that replays a recorded session.
+"""
+
+import collections
+import os
+import pty
+import select
+import threading
+import time
+import tty
+
+from .framer import lineFramer
+from .recording import TX_LINE, readSession
+
+
+class ptyDevice:
+    """
+    A simulated device on a pseudo-terminal. Anything that opens its port, including an unmodified binhoComms, talks to
+    it exactly as it would to a real serial device.
+
+    Each command line is passed to respond(), and the reply is sent back once the simulated device would have
+    finished with it: commands are served one at a time, and each one takes its latency plus the time needed to
+    move the command and its reply over a link of the given bandwidth.
+
+        with virtualNova(latency=50e-6, bandwidth=1e6) as nova:
+            comms = binhoComms(nova.port)
+    """
+
+    def __init__(self, latency=0.0, bandwidth=None):
+        """
+        :param latency: Seconds the device spends on each command, or a dict of seconds by command verb (e.g.
+            "SPI0 WHR", "+ID") whose None entry is the default for verbs not listed
+        :type latency: float or dict
+        :param bandwidth: Link speed in bytes per second, or None for no limit
+        :type bandwidth: float
+        """
+
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.commandCount = 0
+
+        self._master = None
+        self._slave = None
+        self._port = None
+        self._thread = None
+        self._stopper = threading.Event()
+        self._wakeupReader = None
+        self._wakeupWriter = None
+        self._writeLock = threading.Lock()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def port(self):
+        """The device path to open, e.g. /dev/pts/3."""
+        return self._port
+
+    def start(self):
+        """Creates the pseudo-terminal and starts serving commands in a background thread."""
+
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self._port = os.ttyname(self._slave)
+        self._wakeupReader, self._wakeupWriter = os.pipe()
+
+        self._stopper.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stops the device and removes its pseudo-terminal."""
+
+        self._stopper.set()
+
+        if self._thread is not None:
+            os.write(self._wakeupWriter, b"\x00")
+            self._thread.join()
+            self._thread = None
+
+            for fd in (self._master, self._slave, self._wakeupReader, self._wakeupWriter):
+                os.close(fd)
+
+    def respond(self, command):
+        """
+        Returns the reply to one command line, without its newline, or None to send nothing. Subclasses implement
+        the device's protocol here.
+        :param command: The command, stripped of surrounding whitespace
+        :type command: str
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    def commandLatency(self, command):
+        """Returns the number of seconds the device spends on the given command."""
+
+        if not isinstance(self.latency, dict):
+            return self.latency
+
+        words = command.split(" ", 2)
+        verb = words[0] if command.startswith("+") or len(words) < 2 else words[0] + " " + words[1]
+
+        return self.latency.get(verb, self.latency.get(None, 0.0))
+
+    def sendLine(self, line):
+        """Sends an unsolicited line, such as an interrupt notification, to the host at once."""
+
+        with self._writeLock:
+            os.write(self._master, (line + "\n").encode("utf-8"))
+
+    def _run(self):
+
+        framer = lineFramer()
+        pending = []
+        busyUntil = 0.0
+
+        while not self._stopper.is_set():
+
+            timeout = None
+            if pending:
+                timeout = max(0.0, pending[0][0] - time.monotonic())
+
+            readable, _, _ = select.select([self._master, self._wakeupReader], [], [], timeout)
+
+            if self._master in readable:
+                try:
+                    framer.feed(os.read(self._master, 65536))
+                except OSError:
+                    # Linux reports EIO while nothing has the port open.
+                    time.sleep(0.01)
+
+                for line in framer.lines():
+                    command = bytes(line).decode("utf-8", "replace").strip()
+                    if not command:
+                        continue
+
+                    reply = self.respond(command)
+                    self.commandCount += 1
+
+                    # The device handles one command at a time, so each starts when the previous one is done.
+                    cost = self.commandLatency(command)
+                    if self.bandwidth:
+                        cost += (len(line) + 1 + (len(reply) + 1 if reply is not None else 0)) / self.bandwidth
+
+                    busyUntil = max(time.monotonic(), busyUntil) + cost
+                    pending.append((busyUntil, reply))
+
+            now = time.monotonic()
+            due = 0
+            while due < len(pending) and pending[due][0] <= now:
+                due += 1
+
+            replies = [reply for _, reply in pending[:due] if reply is not None]
+            del pending[:due]
+
+            if replies:
+                with self._writeLock:
+                    os.write(self._master, "".join(reply + "\n" for reply in replies).encode("utf-8"))
+
+
+class virtualNova(ptyDevice):
+    """
+    A simulated Binho Nova. It implements the subset of the ASCII protocol used by this package's drivers, keeping
+    enough state that getters return what the setters stored:
+
+    - core commands (+ID, +FWVER, +HWVER, +CMDVER, +MODE, +BASE, +LED, +PING, +RESET)
+    - IOn pin mode, value, PWM frequency and interrupt source
+    - SPI0 configuration, TXRX and WHR, with MISO looped back to MOSI unless spiTransfer() is overridden
+    - I2C0 configuration, SCAN, WRITE, REQ and WHR, against register-file targets in i2cTargets
+    - 1WIRE0 commands, reading back 0xFF from an empty bus
+    - BUFn CLEAR, ADD, READ and WRITE
+
+    Commands it doesn't know are answered with -NG.
+    """
+
+    DEVICE_ID = "0xC59BB495504D5652"
+    FIRMWARE_VERSION = "0.2.8"
+    HARDWARE_VERSION = "1.0"
+    COMMAND_VERSION = "1.0"
+
+    IO_COUNT = 5
+    BUFFER_SIZE = 256
+
+    def __init__(self, latency=0.0, bandwidth=None, i2cTargets=None):
+        """
+        :param latency: Seconds the device spends on each command, or a dict of seconds by command verb
+        :type latency: float or dict
+        :param bandwidth: Link speed in bytes per second, or None for no limit
+        :type bandwidth: float
+        :param i2cTargets: Simulated I2C targets by 7-bit address, each a bytearray register file. Writes set the
+            register pointer from their first byte and store the rest; reads continue from the pointer. By default
+            a 256-byte target sits at 0x50.
+        :type i2cTargets: dict
+        """
+
+        super().__init__(latency, bandwidth)
+
+        self.i2cTargets = i2cTargets if i2cTargets is not None else {0x50: bytearray(256)}
+        self.operationMode = "IO"
+        self.numericalBase = "HEX"
+        self.ioModes = ["DIN"] * self.IO_COUNT
+        self.ioValues = [0] * self.IO_COUNT
+        self.ioPwmFrequencies = [10000] * self.IO_COUNT
+        self.ioInterrupts = ["NONE"] * self.IO_COUNT
+        self.spiConfig = {"CLK": "2000000", "ORDER": "MSBFIRST", "MODE": "0", "TXBITS": "8"}
+        self.i2cConfig = {"CLK": "400000", "PULL": "ENABLED", "ADDR": "7BIT"}
+        self.buffers = [bytearray() for _ in range(3)]
+
+        self._i2cPointers = {}
+        self._i2cAddress = None
+
+    def spiTransfer(self, data):
+        """Returns the bytes the simulated SPI target shifts out while data is shifted in. Loops back by default."""
+        return bytes(data)
+
+    def raiseInterrupt(self, ioNumber):
+        """Sends the interrupt notification for the given IO pin."""
+        self.sendLine("!IO" + str(ioNumber))
+
+    def respond(self, command):
+
+        words = command.split()
+        target = words[0]
+        args = words[1:]
+
+        try:
+            if target.startswith("+"):
+                return self._core(target, args)
+            if target.startswith("IO"):
+                return self._io(int(target[2:]), args)
+            if target == "SPI0":
+                return self._spi(args)
+            if target == "I2C0":
+                return self._i2c(args)
+            if target == "1WIRE0":
+                return self._oneWire(args)
+            if target.startswith("BUF"):
+                return self._buffer(int(target[3:]), args)
+            if target.startswith("UART") or target.startswith("SWI"):
+                return "-OK"
+        except (IndexError, ValueError, KeyError):
+            pass
+
+        return "-NG"
+
+    def _core(self, verb, args):
+
+        if verb == "+ID":
+            return "-ID " + self.DEVICE_ID
+        if verb == "+FWVER":
+            return "-FWVER " + self.FIRMWARE_VERSION
+        if verb == "+HWVER":
+            return "-HWVER " + self.HARDWARE_VERSION
+        if verb == "+CMDVER":
+            return "-CMDVER " + self.COMMAND_VERSION
+        if verb == "+MODE":
+            if args[1] == "?":
+                return "-MODE " + args[0] + " " + self.operationMode
+            self.operationMode = args[1]
+            return "-OK"
+        if verb == "+BASE":
+            if args[0] == "?":
+                return "-BASE " + self.numericalBase
+            self.numericalBase = args[0]
+            return "-OK"
+        if verb in ("+LED", "+PING", "+RESET", "+BTLDR"):
+            return "-OK"
+
+        return "-NG"
+
+    def _io(self, pin, args):
+
+        setting = args[0]
+        query = args[1] == "?"
+        prefix = "-IO" + str(pin) + " " + setting + " "
+
+        if setting == "MODE":
+            if query:
+                return prefix + self.ioModes[pin]
+            self.ioModes[pin] = args[1]
+        elif setting == "VALUE":
+            if query:
+                return prefix + str(self.ioValues[pin])
+            self.ioValues[pin] = int(args[1])
+        elif setting == "PWMFREQ":
+            if query:
+                return prefix + str(self.ioPwmFrequencies[pin])
+            self.ioPwmFrequencies[pin] = int(args[1])
+        elif setting == "INT":
+            if query:
+                return prefix + self.ioInterrupts[pin]
+            self.ioInterrupts[pin] = args[1]
+        else:
+            return "-NG"
+
+        return "-OK"
+
+    def _spi(self, args):
+
+        setting = args[0]
+
+        if setting in self.spiConfig:
+            if args[1] == "?":
+                return "-SPI0 " + setting + " " + self.spiConfig[setting]
+            self.spiConfig[setting] = args[1]
+            return "-OK"
+
+        if setting in ("BEGIN", "END"):
+            return "-OK"
+
+        if setting == "TXRX":
+            return "-SPI0 RXD " + self.spiTransfer(bytes([int(args[1], 0)])).hex().upper()
+
+        if setting == "WHR":
+            writeOnly, count = args[1] == "1", int(args[2])
+            data = bytes.fromhex(args[3]) if count else b""
+            if len(data) == 1 and count > 1:
+                # A read-only transfer sends the same byte throughout.
+                data = data * count
+            received = self.spiTransfer(data[:count])
+            return "-OK" if writeOnly else "-SPI0 RXD " + received.hex().upper()
+
+        return "-NG"
+
+    def _i2cWrite(self, address, data):
+
+        memory = self.i2cTargets.get(address)
+
+        if memory is None:
+            return False
+
+        if data:
+            pointer = data[0] % len(memory)
+            for value in data[1:]:
+                memory[pointer] = value
+                pointer = (pointer + 1) % len(memory)
+            self._i2cPointers[address] = data[0] % len(memory)
+
+        return True
+
+    def _i2cRead(self, address, count):
+
+        memory = self.i2cTargets.get(address)
+
+        if memory is None:
+            return None
+
+        pointer = self._i2cPointers.get(address, 0)
+        data = bytes(memory[(pointer + i) % len(memory)] for i in range(count))
+        self._i2cPointers[address] = (pointer + count) % len(memory)
+
+        return data
+
+    def _i2c(self, args):
+
+        setting = args[0]
+
+        if setting in self.i2cConfig:
+            if args[1] == "?":
+                return "-I2C0 " + setting + " " + self.i2cConfig[setting]
+            if setting == "PULL":
+                self.i2cConfig[setting] = "ENABLED" if args[1] == "1" else "DISABLED"
+            elif setting == "ADDR":
+                self.i2cConfig[setting] = args[1] + "BIT"
+            else:
+                self.i2cConfig[setting] = args[1]
+            return "-OK"
+
+        if setting == "SCAN":
+            return "-OK" if int(args[1], 0) in self.i2cTargets else "-NG"
+
+        if setting == "START":
+            self._i2cAddress = int(args[1], 0)
+            return "-OK" if self._i2cAddress in self.i2cTargets else "-NG"
+
+        if setting == "END":
+            return "-OK"
+
+        if setting == "WRITE":
+            if len(args) == 2:
+                # A single byte queued after START.
+                return "-OK" if self._i2cWrite(self._i2cAddress, bytes([int(args[1], 0)])) else "-NG"
+            data = bytes(int(value, 0) for value in args[2:])
+            return "-OK" if self._i2cWrite(int(args[1], 0), data) else "-NG"
+
+        if setting == "REQ":
+            data = self._i2cRead(int(args[1], 0), int(args[2]))
+            return "-NG" if data is None else "-I2C0 RXD " + data.hex().upper()
+
+        if setting == "WHR":
+            address, readCount, writeCount = int(args[1], 0), int(args[3]), int(args[4])
+            data = bytes.fromhex(args[5])[:writeCount] if writeCount else b""
+            if writeCount and not self._i2cWrite(address, data):
+                return "-NG"
+            if not readCount:
+                return "-OK" if address in self.i2cTargets else "-NG"
+            data = self._i2cRead(address, readCount)
+            return "-NG" if data is None else "-I2C0 RXD " + data.hex().upper()
+
+        return "-NG"
+
+    def _oneWire(self, args):
+
+        setting = args[0]
+
+        if setting == "READ":
+            return "-1WIRE0 READ 0xFF"
+
+        if setting == "ADDR":
+            return "-1WIRE0 ADDR 0x" + "00" * 8
+
+        if setting == "WHR":
+            readCount = int(args[2])
+            return "-1WIRE0 RXD " + "FF" * readCount if readCount else "-OK"
+
+        if setting in ("BEGIN", "RESET", "WRITE", "SELECT", "SKIP", "DEPOWER", "SEARCH"):
+            return "-OK"
+
+        return "-NG"
+
+    def _buffer(self, index, args):
+
+        buffer = self.buffers[index]
+        setting = args[0]
+
+        if setting == "CLEAR":
+            buffer.clear()
+        elif setting == "ADD":
+            if len(buffer) >= self.BUFFER_SIZE:
+                return "-NG"
+            buffer.append(int(args[1], 0))
+        elif setting == "READ":
+            return "-BUF" + str(index) + " " + " ".join("0x{:02X}".format(value) for value in buffer[: int(args[1])])
+        elif setting == "WRITE":
+            start = int(args[1])
+            data = bytes(int(value, 0) for value in args[2:])
+            if len(buffer) < start + len(data):
+                buffer.extend(bytes(start + len(data) - len(buffer)))
+            buffer[start : start + len(data)] = data
+        else:
+            return "-NG"
+
+        return "-OK"
+
+
+class replayDevice(ptyDevice):
+    """
+    Plays a session recorded with binhoComms.startRecording() back to the host stack. Replies are served in the order
+    they were recorded, the n-th reply answering the n-th command, and interrupt notifications follow the reply they
+    were recorded after. This reproduces a session's traffic without the hardware, for debugging timing issues
+    offline or measuring the host side's own overhead:
+
+        with replayDevice("flash-session.binholog", realtime=False) as device:
+            comms = binhoComms(device.port)
+
+    A command that differs from the recorded one is still answered with the recorded reply, as the host is expected
+    to repeat the recorded session, and counted in mismatchCount. Commands beyond the end of the recording are
+    answered with -NG.
+    """
+
+    def __init__(self, path, realtime=True, bandwidth=None):
+        """
+        :param path: The session log
+        :type path: str
+        :param realtime: If True, each reply takes as long to produce as it took to arrive in the recording, so the
+            session runs at least at its recorded speed. If False, replies are sent as fast as possible.
+        :type realtime: bool
+        :param bandwidth: Link speed in bytes per second, or None for no limit
+        :type bandwidth: float
+        """
+
+        super().__init__(0.0, bandwidth)
+
+        self.path = path
+        self.realtime = realtime
+        self.mismatchCount = 0
+
+        # Per recorded command: the command, its reply, the time the device spent on it and the interrupts that
+        # followed the reply.
+        self.exchanges = []
+        self._next = 0
+        self._latency = 0.0
+
+        self._load(readSession(path))
+
+    def _load(self, records):
+
+        commands = collections.deque()
+        previousReply = 0.0
+
+        for record in records:
+            line = record.line.decode("utf-8", "replace")
+
+            if record.direction == TX_LINE:
+                commands.append((line, record.time))
+
+            elif line.startswith("!") and self.exchanges:
+                self.exchanges[-1][3].append(line)
+
+            elif line.startswith("-") and commands:
+                command, sent = commands.popleft()
+
+                # The device serves one command at a time, so it starts on a command once it has both received it
+                # and answered the one before.
+                latency = max(0.0, record.time - max(sent, previousReply))
+                previousReply = record.time
+
+                self.exchanges.append((command, line, latency, []))
+
+    @property
+    def remaining(self):
+        """The number of recorded commands not yet replayed."""
+        return len(self.exchanges) - self._next
+
+    def respond(self, command):
+
+        if self._next >= len(self.exchanges):
+            self._latency = 0.0
+            return "-NG"
+
+        recorded, reply, latency, interrupts = self.exchanges[self._next]
+        self._next += 1
+
+        if command != recorded:
+            self.mismatchCount += 1
+
+        self._latency = latency if self.realtime else 0.0
+
+        return "\n".join([reply] + interrupts)
+
+    def commandLatency(self, command):
+        return self._latency
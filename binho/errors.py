@@ -30,6 +30,10 @@ class ExternalDeviceError(IOError):
     """
 
 
+class PollTimeoutError(ExternalDeviceError):
+    """ Error indicating that an external device didn't finish an operation in the time it was polled for. """
+
+
 BINHO_ERRORS = {
     -2: ValueError,
     -5: NotFoundError,
@@ -1,3 +1,4 @@
+from ..comms.trace import traced
 from ..interface import binhoInterface
 
 
@@ -76,11 +77,8 @@ class I2CBus(binhoInterface):
     @useInternalPullUps.setter
     def useInternalPullUps(self, enable):
 
-        if enable:
-            if not self.api.usePullups:
-                self.api.usePullups = True
-        else:
-            self.api.usePullups = False
+        # The driver skips the write if the pull-ups are already known to be set that way.
+        self.api.usePullups = bool(enable)
 
     def read(self, address, receive_length=0):
         """
@@ -147,14 +145,18 @@ class I2CBus(binhoInterface):
 
         return result, status
 
-    def scan(self):
-
-        responses = []
-
-        for i in range(8, 120):
-            result = self.api.scanAddress(i)
+    def probe(self, address):
+        """
+        Checks whether a device acknowledges its address, with a single command.
+        Args:
+            address -- The 7-bit I2C address to probe.
+        Returns:
+            True if the address was acknowledged.
+        """
+        return self.api.scanAddress(address)
 
-            if result:
-                responses.append(i)
+    @traced
+    def scan(self):
 
-        return responses
+        # Pipeline the probes rather than waiting out a round trip for each address.
+        return self.api.scanAddresses(range(8, 120))
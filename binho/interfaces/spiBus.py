@@ -1,4 +1,24 @@
 from ..interface import binhoInterface
+from ..comms.hexcodec import asBuffer
+
+
+def _numpy():
+    """
+    Imports NumPy for the word-oriented transfers. It is an optional dependency, and is only imported on first use
+    so that it doesn't slow down importing the package.
+    """
+
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ImportError("Word transfers need NumPy; install it with: pip install binho[numpy]") from error
+
+    return numpy
+
+
+def _word_dtype(numpy, width, byteorder):
+    """The NumPy dtype of a word of the given width in bytes [1, 2 or 4] and byte order."""
+    return numpy.dtype(("<" if byteorder == "little" else ">") + "u" + str(width))
 
 
 class SPIBus(binhoInterface):
@@ -40,6 +60,9 @@ class SPIBus(binhoInterface):
         # Store our chip select.
         self._chip_select = chip_select_gpio
 
+        # The SPISession currently open on the bus, if any.
+        self._session = None
+
         # Set up the SPI bus for communications.
         board.operationMode = "SPI"
 
@@ -68,6 +91,10 @@ class SPIBus(binhoInterface):
     @mode.setter
     def mode(self, mode):
 
+        # The driver shadows its settings, so checking for an unchanged one costs no round trip.
+        if mode == self.api.mode:
+            return
+
         # changing the clock frequency will abort any transaction in progress
         self.api.end(True)
         self.api.mode = mode
@@ -79,6 +106,9 @@ class SPIBus(binhoInterface):
     @frequency.setter
     def frequency(self, freq):
 
+        if freq == self.api.clockFrequency:
+            return
+
         # changing the clock frequency will abort any transaction in progress
         self.api.end(True)
         self.api.clockFrequency = freq
@@ -90,6 +120,9 @@ class SPIBus(binhoInterface):
     @bitOrder.setter
     def bitOrder(self, order):
 
+        if order == self.api.bitOrder:
+            return
+
         # changing the bitOrder will abort any transaction in progress
         self.api.end(True)
         self.api.bitOrder = order
@@ -101,10 +134,43 @@ class SPIBus(binhoInterface):
     @bitsPerTransfer.setter
     def bitsPerTransfer(self, bits):
 
+        if bits == self.api.bitsPerTransfer:
+            return
+
         # changing the bitsPerTransfer will abort any transaction in progress
         self.api.end(True)
         self.api.bitsPerTransfer = bits
 
+    @property
+    def active_session(self):
+        """The SPISession currently open on the bus, or None."""
+        return self._session
+
+    def session(self, cs=None, mode=None, freq=None, invert_chip_select=False):
+        """
+        Opens a session on the bus, for use as a context manager:
+
+            with spi.session(cs=pin, mode=0, freq=8000000) as session:
+                for register in registers:
+                    session.transfer([0x80 | register], 2)
+
+        The settings are applied and the bus begun once, and chip select is asserted once, when the session
+        opens; each transfer inside it then sends only its data commands. Chip select is released and the bus
+        ended when the block exits.
+
+        Args:
+            cs                 -- the GPIOPin object to hold asserted for the session, None to use the bus's
+                    default, or False to not set CS.
+            mode               -- the SPI mode number [0-3] to use, or None to keep the current one.
+            freq               -- the clock frequency to use, or None to keep the current one.
+            invert_chip_select -- if set, chip select is active high.
+        """
+
+        if cs is None:
+            cs = self._chip_select
+
+        return SPISession(self, cs, mode, freq, invert_chip_select)
+
     def transfer(
         self,
         data,
@@ -114,6 +180,7 @@ class SPIBus(binhoInterface):
         spi_mode=0,
         invert_chip_select=False,
         frequency=None,
+        out=None,
     ):  # pylint: disable=too-many-arguments, too-many-locals
         """
         Sends (and typically receives) data over the SPI bus.
@@ -127,23 +194,31 @@ class SPIBus(binhoInterface):
             deassert_chip_select -- if set, the chip-select line will be left low after
                     communicating; this allows this transcation to be continued in the future
             spi_mode             -- The SPI mode number [0-3] to use for the communication. Defaults to 0.
+            out                  -- a writable buffer (e.g. a bytearray or memoryview) to receive into,
+                    which is returned in place of a new bytes object.
+
+        Payloads of any length are sent as a stream of buffer-sized chunks, with chip select held
+        asserted across all of them.
         """
 
-        data_to_transmit = bytearray(data)
-        data_received = bytearray()
+        # Work on a view of the caller's buffer; nothing is copied before it is hex encoded.
+        data_to_transmit = asBuffer(data)
 
         # If we weren't provided with a chip-select, use the bus's default.
         if chip_select is None:
             chip_select = self._chip_select
 
-        if receive_length is None:
-            receive_length = len(data)
+        # Inside a session that already holds this chip select with these settings, only the data is sent.
+        session = self._session
+        if session is not None:
+            if session.accepts(chip_select, spi_mode, frequency, invert_chip_select):
+                return session.transfer(data_to_transmit, receive_length, out=out)
 
-        # If we need to receive more than we've transmitted, extend the data
-        # out.
-        if receive_length > len(data):
-            padding = receive_length - len(data)
-            data_to_transmit.extend([0] * padding)
+            # Otherwise the session's device is deselected first; it is selected again on its next transfer.
+            session.release()
+
+        if receive_length is None:
+            receive_length = len(data_to_transmit)
 
         if spi_mode:
             # Set the polarity and phase (the "SPI mode").
@@ -164,25 +239,13 @@ class SPIBus(binhoInterface):
                 chip_select.value = 1
                 chip_select.value = 0
 
-        # Transmit our data in chunks of the buffer size.
-        # Extract a single data chunk from the transmit buffer.
-        chunk = data_to_transmit[0 : self.buffer_size]
-
-        writeFlag = False
-        if len(chunk) > 0:
-            writeFlag = True
-
-        readFlag = False
-        if receive_length > 0:
-            readFlag = True
+        # If we need to receive more than we've transmitted, the driver extends the data out with zeroes.
+        numBytes = max(len(data_to_transmit), receive_length)
 
-        numBytes = len(chunk)
-        if receive_length > numBytes:
-            numBytes = receive_length
-
-        # Finally, exchange the data.
-        response = self.api.writeToReadFrom(writeFlag, readFlag, numBytes, bytes(chunk))
-        data_received.extend(response)
+        # Exchange the data in chunks of the buffer size, with the next chunk in flight while the last is decoded.
+        data_received = self.api.streamTransfer(
+            data_to_transmit, numBytes, out=out, read=receive_length > 0, chunkSize=self.buffer_size
+        )
 
         # Finally, unless the caller has requested we keep chip-select asserted,
         # finish the transaction by releasing chip select.
@@ -195,9 +258,187 @@ class SPIBus(binhoInterface):
         self.api.end()
 
         # Once we're done, return the data received.
+        if out is not None:
+            return out
+
+        if data_received is None:
+            return b""
 
         return bytes(data_received)
 
+    def transfer_words(
+        self,
+        words,
+        bits=16,
+        byteorder="big",
+        receive_length=None,
+        chip_select=None,
+        deassert_chip_select=True,
+        spi_mode=0,
+    ):  # pylint: disable=too-many-arguments, too-many-locals
+        """
+        Sends (and typically receives) words of more than eight bits, packed and unpacked with NumPy rather than
+        one at a time in Python. Needs NumPy, which is an optional dependency.
+        Args:
+            words                -- the words to be sent, as a NumPy array or any sequence of ints.
+            bits                 -- the width of each word, from 1 to 32 bits. Words of 9 to 16 bits are sent as
+                    16-bit transfers, and other widths as 1 to 4 back-to-back bytes. A word narrower than its frame is
+                    sent right-aligned with its unused high bits zero, and those bits are masked off the words
+                    received. The bus's bitsPerTransfer is restored afterwards, and can't be changed inside a session.
+            byteorder            -- "big" to send the most significant byte of each word first, or "little".
+            receive_length       -- the number of words to be read. If more than the number of words sent,
+                    the transmit will automatically be extended with zeroes.
+            chip_select          -- the GPIOPin object that will serve as the chip select
+                    for this transaction, None to use the bus's default, or False to not set CS.
+            deassert_chip_select -- if set, the chip-select line will be left low after
+                    communicating; this allows this transcation to be continued in the future
+            spi_mode             -- The SPI mode number [0-3] to use for the communication. Defaults to 0.
+        Returns:
+            a NumPy array of the words received, of the smallest unsigned type that holds them.
+        """
+
+        numpy = _numpy()
+
+        if not 1 <= bits <= 32:
+            raise ValueError("Words must be between 1 and 32 bits wide, not {}".format(bits))
+
+        if byteorder not in ("big", "little"):
+            raise ValueError('byteorder must be "big" or "little", not {!r}'.format(byteorder))
+
+        width = (bits + 7) // 8
+        container = 4 if width == 3 else width
+
+        words = numpy.asarray(words)
+        if words.size and (words.min() < 0 or int(words.max()) >> bits):
+            raise ValueError("Tried to send a word that doesn't fit in {} bits.".format(bits))
+
+        # Pack each word into its container type in the requested byte order, then drop the padding byte of
+        # three-byte words.
+        packed = words.astype(_word_dtype(numpy, container, byteorder)).reshape(-1, 1).view(numpy.uint8)
+        if container != width:
+            packed = packed[:, 1:] if byteorder == "big" else packed[:, :width]
+        packed = numpy.ascontiguousarray(packed).reshape(-1)
+
+        if receive_length is None:
+            receive_length = words.size
+
+        frame_bits = 16 if width == 2 else 8
+        previous_bits = self.bitsPerTransfer
+
+        if frame_bits != previous_bits:
+            # Changing it ends the bus, which would break the session's begin and chip select.
+            if self._session is not None:
+                raise ValueError(
+                    "Can't send {}-bit words inside a session on a bus set to {} bits per transfer".format(
+                        bits, previous_bits
+                    )
+                )
+
+            self.bitsPerTransfer = frame_bits
+
+        received = numpy.empty(max(words.size, receive_length) * width, dtype=numpy.uint8)
+
+        try:
+            self.transfer(
+                packed,
+                receive_length * width,
+                chip_select=chip_select,
+                deassert_chip_select=deassert_chip_select,
+                spi_mode=spi_mode,
+                out=received,
+            )
+        finally:
+            if frame_bits != previous_bits:
+                self.bitsPerTransfer = previous_bits
+
+        received = received.reshape(-1, width)
+        if container != width:
+            padded = numpy.zeros((received.shape[0], container), dtype=numpy.uint8)
+            if byteorder == "big":
+                padded[:, 1:] = received
+            else:
+                padded[:, :width] = received
+            received = padded
+
+        unpacked = received.view(_word_dtype(numpy, container, byteorder)).reshape(-1)
+        unpacked = unpacked.astype("u" + str(container)) & ((1 << bits) - 1)
+
+        return unpacked[:receive_length]
+
+    def transfer_framed(
+        self,
+        transactions,
+        chip_select=None,
+        deassert_chip_select=True,
+        spi_mode=0,
+        invert_chip_select=False,
+    ):  # pylint: disable=too-many-arguments
+        """
+        Runs a list of transactions, each framed by its own assertion and release of chip select, in one write
+        to the Binho host adapter, and checks all of their replies at once. A register write and read-back, or
+        a poll of several registers, then costs one round trip rather than five or six per transaction.
+        Args:
+            transactions         -- a list of (data, receive_length) pairs, with the same meaning as the
+                    arguments to transfer(); receive_length may be None. Inside a session, or if any of them
+                    moves more than buffer_size bytes, they are sent one at a time with transfer() instead.
+            chip_select          -- the GPIOPin object that will serve as the chip select
+                    for these transactions, None to use the bus's default, or False to not set CS.
+            deassert_chip_select -- if not set, the chip-select line will be left asserted after the last
+                    transaction.
+            spi_mode             -- The SPI mode number [0-3] to use for the communication. Defaults to 0.
+        Returns:
+            a list of the bytes received by each transaction.
+        """
+
+        if chip_select is None:
+            chip_select = self._chip_select
+
+        transfers = []
+
+        for data, receive_length in transactions:
+            data = asBuffer(data)
+
+            if receive_length is None:
+                receive_length = len(data)
+
+            transfers.append((data, max(len(data), receive_length), receive_length))
+
+        # Inside a session, and for transactions too big for one write, each goes out on its own as transfer()
+        # would send it.
+        if self._session is not None or any(numBytes > self.buffer_size for _, numBytes, _ in transfers):
+            last = len(transfers) - 1
+            received = []
+
+            for index, (data, _, receive_length) in enumerate(transfers):
+                reply = self.transfer(
+                    data,
+                    receive_length,
+                    chip_select=chip_select,
+                    deassert_chip_select=deassert_chip_select or index < last,
+                    spi_mode=spi_mode,
+                    invert_chip_select=invert_chip_select,
+                )
+                received.append(bytes(reply))
+
+            return received
+
+        if spi_mode:
+            self.api.mode = spi_mode
+
+        cs_index = None
+        if chip_select:
+            chip_select.mode = "DOUT"
+            cs_index = chip_select.pinNumber
+
+        received = self.api.framedTransfers(
+            [(data, numBytes, receive_length > 0) for data, numBytes, receive_length in transfers],
+            cs_index,
+            invertCS=invert_chip_select,
+            deassertLast=deassert_chip_select,
+        )
+
+        return [bytes(data) for data in received]
+
     def disable_drive(self):
         """ Tristates each of the pins on the given SPI bus. """
         self.api.enable_drive(False)
@@ -205,3 +446,123 @@ class SPIBus(binhoInterface):
     def enable_drive(self):
         """ Enables the bus to drive each of its output pins. """
         self.api.enable_drive(True)
+
+
+class SPISession:
+    """
+    A run of transfers on an SPI bus that share one chip select and one set of bus settings; see SPIBus.session().
+    """
+
+    def __init__(self, bus, chip_select, mode, frequency, invert_chip_select):
+
+        self.bus = bus
+        self.chip_select = chip_select
+        self.mode = mode
+        self.frequency = frequency
+        self.invert_chip_select = invert_chip_select
+
+        # Whether the bus is begun and chip select asserted for this session.
+        self.selected = False
+
+    def __enter__(self):
+
+        bus = self.bus
+
+        if bus._session is not None:  # pylint: disable=protected-access
+            raise ValueError("A session is already open on this SPI bus")
+
+        # Settings are applied before the bus is begun, as changing them ends any transaction in progress.
+        if self.mode is not None:
+            bus.mode = self.mode
+
+        if self.frequency:
+            bus.frequency = self.frequency
+
+        if self.chip_select:
+            self.chip_select.mode = "DOUT"
+
+        bus._session = self  # pylint: disable=protected-access
+        self.select()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.bus._session = None  # pylint: disable=protected-access
+        self.release()
+
+    def accepts(self, chip_select, spi_mode, frequency, invert_chip_select):
+        """Returns true iff a transfer with the given arguments can be sent within this session as it is."""
+
+        api = self.bus.api
+
+        return (
+            (chip_select or None) is (self.chip_select or None)
+            and invert_chip_select == self.invert_chip_select
+            and (not spi_mode or spi_mode == api.mode)
+            and (not frequency or frequency == api.clockFrequency)
+        )
+
+    def select(self):
+        """Begins the bus and asserts chip select, if they aren't already."""
+
+        if self.selected:
+            return
+
+        self.bus.api.begin()
+
+        if self.chip_select:
+            if self.invert_chip_select:
+                self.chip_select.value = 1
+            else:
+                self.chip_select.value = 1
+                self.chip_select.value = 0
+
+        self.selected = True
+
+    def release(self):
+        """
+        Releases chip select and ends the bus, ending the device's transaction. The next transfer in the
+        session asserts chip select again.
+        """
+
+        if not self.selected:
+            return
+
+        self.selected = False
+
+        if self.chip_select:
+            self.chip_select.value = 0 if self.invert_chip_select else 1
+
+        self.bus.api.end()
+
+    def transfer(self, data, receive_length=None, out=None):
+        """
+        Sends (and typically receives) data within the session, sending nothing but the data commands.
+        Args:
+            data           -- the data to be sent to the given device.
+            receive_length -- the total amount of data to be read. If longer than the data length, the transmit
+                    will automatically be extended with zeroes.
+            out            -- a writable buffer to receive into, which is returned in place of a new bytes object.
+        """
+
+        self.select()
+
+        data_to_transmit = asBuffer(data)
+
+        if receive_length is None:
+            receive_length = len(data_to_transmit)
+
+        numBytes = max(len(data_to_transmit), receive_length)
+
+        data_received = self.bus.api.streamTransfer(
+            data_to_transmit, numBytes, out=out, read=receive_length > 0, chunkSize=self.bus.buffer_size
+        )
+
+        if out is not None:
+            return out
+
+        if data_received is None:
+            return b""
+
+        return bytes(data_received)
@@ -32,9 +32,27 @@ class SPIDevice(binhoInterface):
             deassert_chip_select -- if set, the chip-select line will be left low after
                     communicating; this allows this transcation to be continued in the future
         """
-        return self._bus.transfer(
-            data,
-            receive_length,
+        # Outside a session, a transaction that fits the transfer buffer is sent along with its chip select
+        # toggles in a single write.
+        return self._bus.transfer_framed(
+            [(data, receive_length)],
+            spi_mode=self._spi_mode,
+            chip_select=self._chip_select,
+            deassert_chip_select=deassert_chip_select,
+        )[0]
+
+    def _transmit_batch(self, transactions, deassert_chip_select=True):
+        """
+        Runs several transactions with the device, each framed by its own chip select, in a single write to the
+        Binho host adapter.
+        Args:
+            transactions         -- a list of (data, receive_length) pairs, as taken by _transmit().
+            deassert_chip_select -- if not set, the chip-select line will be left low after the last transaction.
+        Returns:
+            a list of the bytes received by each transaction.
+        """
+        return self._bus.transfer_framed(
+            transactions,
             spi_mode=self._spi_mode,
             chip_select=self._chip_select,
             deassert_chip_select=deassert_chip_select,
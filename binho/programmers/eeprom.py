@@ -1,10 +1,12 @@
 import time
-
 from math import floor
 from intelhex import IntelHex
 
+from binho.comms.trace import traced
+from binho.errors import PollTimeoutError
 from binho.interfaces.i2cDevice import I2CDevice
 from binho.programmer import binhoProgrammer
+from binho.util.polling import exponentialBackoff, pollStatistics, poll_until
 
 BASE_DEVICE_ADDRESS = 0x50
 
@@ -206,12 +208,13 @@ class EEPROMDevice(binhoProgrammer):
             page_size           -- The size of a page. All writes are page aligned.
             bitmask             -- String describing the meanings of the lowest three bits of the device address
             slave_address       -- Slave address set on pins A0-A3, if present on package. Defaults to 0b000.
-            write_cycle_length  -- Time to wait for a write cycle, in seconds. Defaults to 5ms.
+            write_cycle_length  -- The longest a write cycle takes, in seconds. Defaults to 5ms.
         """
 
         self.capacity = capacity
         self.page_size = page_size
         self.write_cycle_length = write_cycle_length
+        self.poll_stats = pollStatistics()
         self.bus = i2c_bus
 
         base_address = BASE_DEVICE_ADDRESS
@@ -342,6 +345,7 @@ class EEPROMDevice(binhoProgrammer):
 
         return result
 
+    @traced
     def readBytes(self, start_address, end_address):
         """
         Read bytes sequentially from a specified memory address as a bytestring.
@@ -412,6 +416,7 @@ class EEPROMDevice(binhoProgrammer):
         except BaseException:
             raise RuntimeError("Failed to write from File") from BaseException
 
+    @traced
     def writeBytes(self, word_address, data, write_cycle_length=0.005, attempts=0):  # pylint: disable=unused-argument
         """
         Write bytes sequentially starting at a specified memory address. Will read data back to assure write was
@@ -424,6 +429,10 @@ class EEPROMDevice(binhoProgrammer):
                                   and verify the contents before giving up. Defaults to 2.
                                   A value of 0 forgoes verification step and will just
                                   assume it worked.
+
+        After each page the device is polled until it acknowledges its address again, which it does once its write
+        cycle is over. A device that is still silent after ten write cycles is taken to be one that doesn't answer
+        while idle either, and the rest of the pages wait out write_cycle_length instead.
         """
 
         bytes_to_write = len(data)
@@ -434,6 +443,7 @@ class EEPROMDevice(binhoProgrammer):
         # subsequent bytes being ignored.
         i = 0
         retries = attempts
+        polling = True
 
         while i < bytes_to_write:
 
@@ -450,8 +460,21 @@ class EEPROMDevice(binhoProgrammer):
             # Write out 1 or 2 address bytes, then the current chunk of data
             device.write(self.encode_address(addr) + data[i : i + l])
 
-            # Wait for write cycle to complete
-            time.sleep(self.write_cycle_length)
+            # Wait for the write cycle to complete; the device doesn't acknowledge its address until it has.
+            if polling:
+                try:
+                    poll_until(
+                        lambda: device.bus.probe(device.address),
+                        1,
+                        1,
+                        self.write_cycle_length * 10,
+                        exponentialBackoff(self.write_cycle_length / 2),
+                        self.poll_stats,
+                    )
+                except PollTimeoutError:
+                    polling = False
+            else:
+                time.sleep(self.write_cycle_length)
 
             # If attempts is 0, skip verification step
             if attempts == 0:
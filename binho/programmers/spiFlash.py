@@ -1,4 +1,6 @@
+from ..comms.trace import traced
 from ..programmer import binhoProgrammer
+from ..util.polling import exponentialBackoff, pollStatistics, poll_until
 from ..util.register import register
 
 # from .firmware import DeviceFirmwareManager
@@ -81,6 +83,14 @@ class SPIFlash(binhoProgrammer):
         0x10: 0x010000,
     }
 
+    # The typical and the longest time each operation takes, in seconds, from common serial NOR flash datasheets.
+    # The typical time seeds the backoff between status polls, and the longest, with a margin, is how long they go on.
+    PAGE_PROGRAM_TIME = (0.0007, 0.005)
+    SECTOR_ERASE_TIME = (0.045, 0.4)
+    BLOCK_ERASE_32K_TIME = (0.12, 1.6)
+    BLOCK_ERASE_64K_TIME = (0.15, 2.0)
+    CHIP_ERASE_TIME = (10.0, 200.0)
+
     @property
     def jedecID(self):
 
@@ -407,44 +417,19 @@ class SPIFlash(binhoProgrammer):
 
         return rxData[4]
 
+    @traced
     def readBytes(self, startingAddress, bytesToRead):
 
-        addr = [0x00, 0x00, 0x00]
-        baseAddress = startingAddress
-        bytesRemaining = bytesToRead
-        rxData = []
-
-        while bytesRemaining > 0:
-
-            if bytesRemaining > 1020:
+        addr = [(startingAddress >> 16) & 0xFF, (startingAddress >> 8) & 0xFF, startingAddress & 0xFF]
 
-                addr[0] = (baseAddress >> 16) & 0xFF
-                addr[1] = (baseAddress >> 8) & 0xFF
-                addr[2] = baseAddress & 0xFF
-
-                txData = [0x03] + addr
-
-                data = self.board.spi.transfer(
-                    txData, len(txData) + 1020, chip_select=self.csPin, deassert_chip_select=False,
-                )
-                rxData += data[4:1024]
-                bytesRemaining = bytesRemaining - 1020
-                baseAddress += 1020
-
-            else:
-
-                addr[0] = (baseAddress >> 16) & 0xFF
-                addr[1] = (baseAddress >> 8) & 0xFF
-                addr[2] = baseAddress & 0xFF
-
-                txData = [0x03] + addr
+        txData = [0x03] + addr
 
-                data = self.board.spi.transfer(txData, len(txData) + bytesRemaining, chip_select=self.csPin)
-                rxData += data[4 : bytesRemaining + 4]
-                bytesRemaining = 0
+        # A single READ runs on through the whole range; the bus streams it in buffer-sized chunks under one chip select.
+        data = self.board.spi.transfer(txData, len(txData) + bytesToRead, chip_select=self.csPin)
 
-        return rxData
+        return list(data[len(txData) :])
 
+    @traced
     def pageProgram(self, startingAddress, dataBytes, blockUntilFinished=True):
 
         addr = [0x00, 0x00, 0x00]
@@ -461,7 +446,7 @@ class SPIFlash(binhoProgrammer):
 
         self.board.spi.transfer(txData, len(txData), chip_select=self.csPin)
 
-        self._blockUntilFinished(blockUntilFinished)
+        self._blockUntilFinished(blockUntilFinished, self.PAGE_PROGRAM_TIME)
 
         return True
 
@@ -488,9 +473,10 @@ class SPIFlash(binhoProgrammer):
         else:
             txData = [0x05]
 
-        rxData = self.board.spi.transfer(txData, len(txData), chip_select=self.csPin)
+        # The register is shifted out after the command byte, while the byte received with the command is a dummy.
+        rxData = self.board.spi.transfer(txData, len(txData) + 1, chip_select=self.csPin)
 
-        return rxData[0]
+        return rxData[-1]
 
     def writeStatusRegister(self, value, statusRegister=1):
 
@@ -516,6 +502,7 @@ class SPIFlash(binhoProgrammer):
 
         return True
 
+    @traced
     def eraseBlock(self, blockAddress, blockSizeKB=64, blockUntilFinished=True):
 
         addr = [0x00, 0x00, 0x00]
@@ -525,10 +512,13 @@ class SPIFlash(binhoProgrammer):
 
         if blockSizeKB == 64:
             txData = [0xD8] + addr  # 64KB
+            duration = self.BLOCK_ERASE_64K_TIME
         elif blockSizeKB == 32:
             txData = [0x52] + addr  # 32KB
+            duration = self.BLOCK_ERASE_32K_TIME
         else:
             txData = [0x20] + addr
+            duration = self.SECTOR_ERASE_TIME
 
         if self.isBusy():
             return False
@@ -537,10 +527,11 @@ class SPIFlash(binhoProgrammer):
 
         self.board.spi.transfer(txData, len(txData), chip_select=self.csPin)
 
-        self._blockUntilFinished(blockUntilFinished)
+        self._blockUntilFinished(blockUntilFinished, duration)
 
         return True
 
+    @traced
     def chipErase(self, blockUntilFinished=True):
 
         txData = [0xC7]
@@ -552,16 +543,26 @@ class SPIFlash(binhoProgrammer):
 
         self.board.spi.transfer(txData, len(txData), chip_select=self.csPin)
 
-        self._blockUntilFinished(blockUntilFinished)
+        self._blockUntilFinished(blockUntilFinished, self.CHIP_ERASE_TIME)
 
         return True
 
-    def _blockUntilFinished(self, block=True):
+    def _blockUntilFinished(self, block=True, duration=(0.0, 10.0)):
 
         if block:
-            busy = True
-            while busy:
-                busy = self.isBusy()
+            expected, longest = duration
+            strategy = exponentialBackoff(expected)
+            timeout = 2 * longest
+
+            if not self.fastPolling:
+                poll_until(self.readStatusRegister, 0x01, 0x00, timeout, strategy, self.pollStats)
+                return True
+
+            with self.board.spi.session(cs=self.csPin) as session:
+                # The flash keeps shifting out its status register for as long as chip select is held after the
+                # command, so each poll is a single one-byte read.
+                session.transfer([0x05], 0)
+                poll_until(lambda: session.transfer([0x00], 1)[0], 0x01, 0x00, timeout, strategy, self.pollStats)
 
         return True
 
@@ -621,6 +622,11 @@ class SPIFlash(binhoProgrammer):
         self.board.spi.mode = mode
         self.board.spi.frequency = clocK_frequency
 
+        # Whether busy polls hold chip select and read the status register as it streams out, which takes one
+        # command per poll, rather than sending a full Read Status Register transaction each time.
+        self.fastPolling = True
+        self.pollStats = pollStatistics()
+
         self.mem_manufacturer = None
         self.mem_capacity = None
         self.mem_partNumber = None
@@ -0,0 +1,168 @@
+"""
+Waiting for a device to finish an operation by polling one of its registers, e.g. until a flash's busy bit clears or
+an EEPROM acknowledges its address again at the end of a write cycle.
+
+Each poll costs at least one round trip to the adapter, so rather than polling as fast as it can, poll_until() follows
+a strategy: by default an exponential backoff that waits out the operation's expected duration before the first poll,
+then polls at a short interval that doubles up to a ceiling. Every wait is counted in a pollStatistics, so the polls
+each operation took can be checked and the expected durations tuned.
+"""
+
+import time
+
+from ..errors import PollTimeoutError
+
+
+class exponentialBackoff:
+    """Waits expected seconds before the first poll, then initial seconds, doubling up to maximum seconds."""
+
+    def __init__(self, expected=0.0, initial=None, factor=2.0, maximum=0.05):
+        """
+        :param expected: How long the operation usually takes, in seconds
+        :type expected: float
+        :param initial: The interval after the first poll, or None for an eighth of expected, at most maximum
+        :type initial: float
+        :param factor: How much the interval grows after each poll
+        :type factor: float
+        :param maximum: The longest interval between polls
+        :type maximum: float
+        """
+
+        self.expected = expected
+        self.initial = min(expected / 8, maximum) if initial is None else initial
+        self.factor = factor
+        self.maximum = maximum
+
+    def delays(self):
+        """
+        :return: The seconds to sleep before each poll, starting with the first
+        :rtype: iterator of float
+        """
+
+        yield self.expected
+
+        delay = self.initial
+
+        while True:
+            yield delay
+            delay = min(self.maximum, max(delay, 1e-4) * self.factor)
+
+
+class fixedInterval:
+    """Polls every interval seconds, the first time straight away; an interval of 0 polls back-to-back."""
+
+    def __init__(self, interval=0.0):
+        """
+        :param interval: The seconds between polls
+        :type interval: float
+        """
+
+        self.interval = interval
+
+    def delays(self):
+
+        yield 0.0
+
+        while True:
+            yield self.interval
+
+
+class pollStatistics:
+    """The number of polls, and the time, each wait took."""
+
+    def __init__(self):
+
+        self.waits = 0
+        self.polls = 0
+        self.maxPolls = 0
+        self.timeouts = 0
+        self.totalTime = 0.0
+
+        # The number of polls per completed wait, e.g. {1: 40, 2: 3}.
+        self.histogram = {}
+
+    def record(self, polls, elapsed, timedOut=False):
+        """
+        Counts one wait.
+        :param polls: The polls it took
+        :type polls: int
+        :param elapsed: Its length in seconds
+        :type elapsed: float
+        :param timedOut: Whether it gave up
+        :type timedOut: bool
+        """
+
+        self.waits += 1
+        self.polls += polls
+        self.maxPolls = max(self.maxPolls, polls)
+        self.totalTime += elapsed
+
+        if timedOut:
+            self.timeouts += 1
+        else:
+            self.histogram[polls] = self.histogram.get(polls, 0) + 1
+
+    @property
+    def pollsPerWait(self):
+        """The mean number of polls per wait."""
+        return self.polls / self.waits if self.waits else 0.0
+
+    def reset(self):
+        """Zeroes every count."""
+        self.__init__()
+
+    def __repr__(self):
+        return (
+            f"pollStatistics(waits={self.waits}, pollsPerWait={self.pollsPerWait:.2f}, maxPolls={self.maxPolls}, "
+            f"timeouts={self.timeouts}, totalTime={self.totalTime:.3f})"
+        )
+
+
+def poll_until(read_op, mask, value, timeout=1.0, strategy=None, stats=None):
+    """
+    Calls read_op until the bits of its result selected by mask equal value.
+    :param read_op: Reads the register, e.g. SPIFlash.readStatusRegister
+    :type read_op: callable returning int
+    :param mask: The bits to test
+    :type mask: int
+    :param value: What those bits must be
+    :type value: int
+    :param timeout: Seconds to keep polling for
+    :type timeout: float
+    :param strategy: When to poll, or None for an exponentialBackoff from no expected duration
+    :type strategy: exponentialBackoff or fixedInterval
+    :param stats: Counts the wait, if given
+    :type stats: pollStatistics
+    :raises PollTimeoutError: if the bits don't reach the value within the timeout
+    :return: The last value read
+    :rtype: int
+    """
+
+    if strategy is None:
+        strategy = exponentialBackoff()
+
+    start = time.monotonic()
+    deadline = start + timeout
+    polls = 0
+
+    for delay in strategy.delays():
+        if delay:
+            # Never sleep past the deadline; the last poll is made right on it.
+            time.sleep(max(0.0, min(delay, deadline - time.monotonic())))
+
+        result = read_op()
+        polls += 1
+        now = time.monotonic()
+
+        if result & mask == value:
+            if stats is not None:
+                stats.record(polls, now - start)
+            return result
+
+        if now >= deadline:
+            if stats is not None:
+                stats.record(polls, now - start, timedOut=True)
+            raise PollTimeoutError(
+                f"Register still 0x{result:X} under mask 0x{mask:X}, not 0x{value:X}, after {polls} polls in "
+                f"{now - start:.3f}s"
+            )
@@ -7,6 +7,7 @@ from __future__ import print_function
 from decimal import Decimal
 
 import sys
+import atexit
 import platform
 import ast
 import time
@@ -24,6 +25,7 @@ import requests
 
 from . import _binhoHostAdapterSingletonWrapper
 from . import binhoHostAdapter
+from .comms.trace import startTracing, stopTracing
 from .errors import DeviceNotFoundError
 
 
@@ -492,6 +494,29 @@ class binhoArgumentParser(argparse.ArgumentParser):
                 "-v", "--verbose", dest="verbose", action="store_true", help="Log more details to the console.",
             )
 
+        self.add_argument(
+            "--stats",
+            dest="stats",
+            action="store_true",
+            help="Print per-command counts, bytes and latencies when done.",
+        )
+        self.add_argument(
+            "--record",
+            dest="record",
+            metavar="<file>",
+            type=str,
+            help="Record every line exchanged with the device to a session log, for replaying without it.",
+            default=None,
+        )
+        self.add_argument(
+            "--trace",
+            dest="trace",
+            metavar="<file>",
+            type=str,
+            help="Write a timeline of operations and commands, for viewing in Perfetto or chrome://tracing.",
+            default=None,
+        )
+
         # TODO: specify protocol?
         # TODO: accept comms URI
 
@@ -554,8 +579,27 @@ class binhoArgumentParser(argparse.ArgumentParser):
                 else:
                     time.sleep(1)
 
+        if args.stats:
+            self._report_stats_at_exit(device)
+
+        if args.record:
+            device.comms.startRecording(args.record)
+            atexit.register(device.comms.stopRecording)
+
+        if args.trace:
+            startTracing(args.trace)
+            atexit.register(stopTracing)
+
         return device
 
+    @staticmethod
+    def _report_stats_at_exit(device):
+        """ Collects statistics on the device's commands, and prints them to stderr when the program exits. """
+
+        if device.comms.stats is None:
+            stats = device.comms.enableStats()
+            atexit.register(lambda: print(stats.report(), file=sys.stderr))
+
     def get_singleton_for_specified_device(self):
         """
         Connects to the Binho host adapter specified by the user's command line arguments, but gets a singleton that
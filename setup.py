@@ -49,6 +49,7 @@ setup(
             "binho_dfu = binho.commands.binho_dfu:main",
             "binho_daplink = binho.commands.binho_daplink:main",
             "binho_flasher = binho.commands.binho_flasher:main",
+            "binho_serve = binho.commands.binho_serve:main",
         ],
     },
     author="Binho LLC",
@@ -80,6 +81,6 @@ setup(
         "Operating System :: OS Independent",
         "Topic :: Scientific/Engineering",
     ],
-    extras_require={"dev": ["sphinx", "sphinx_rtd_theme",]},
+    extras_require={"dev": ["sphinx", "sphinx_rtd_theme",], "numpy": ["numpy"]},
     **setup_options,
 )
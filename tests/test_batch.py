@@ -0,0 +1,56 @@
+import pytest
+
+from binho.comms.comms import binhoComms, binhoException
+from binho.comms.drivers.spi import binhoSPIDriver
+
+virtual = pytest.importorskip("binho.comms.virtual")
+
+
+def test_batch_reports_the_failed_command_and_refuses_queries():
+    with virtual.virtualNova() as nova:
+        respond = nova.respond
+        nova.respond = lambda command: "-NG" if command == "SPI0 MODE 3" else respond(command)
+
+        comms = binhoComms(nova.port)
+        comms.start()
+        spi = binhoSPIDriver(comms)
+
+        try:
+            with comms.batch() as batch:
+                spi.clockFrequency = 1000000
+                spi.mode = 3
+
+            assert not batch.succeeded
+            assert [result.success for result in batch.results] == [True, False]
+            assert nova.spiConfig["CLK"] == "1000000"
+
+            # The refused mode was shadowed inside the batch, and is read from the device again.
+            assert spi.mode == 0
+
+            with pytest.raises(binhoException):
+                with comms.batch():
+                    comms.sendCommand("+ID")
+        finally:
+            comms.close()
+
+
+def test_framed_transfers_are_split_into_writes_that_fit_the_device_buffer():
+    with virtual.virtualNova() as nova:
+        comms = binhoComms(nova.port)
+        comms.start()
+        spi = binhoSPIDriver(comms)
+
+        sendBatch = comms.sendBatch
+        writes = []
+        comms.sendBatch = lambda commands: writes.append(len(commands)) or sendBatch(commands)
+
+        try:
+            payloads = [bytes([number]) * 1000 for number in range(5)]
+
+            received = spi.framedTransfers([(data, len(data), True) for data in payloads])
+
+            # BEGIN and END ride along with the first and last of the two-buffer windows.
+            assert writes == [3, 2, 2]
+            assert received == payloads
+        finally:
+            comms.close()
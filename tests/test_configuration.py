@@ -0,0 +1,59 @@
+import os
+import threading
+
+import pytest
+
+from binho.comms.comms import binhoComms
+from binho.comms.daemon import binhoDaemon
+from binho.comms.drivers.spi import binhoSPIDriver
+
+virtual = pytest.importorskip("binho.comms.virtual")
+
+
+def test_daemon_clients_dont_skip_writes_on_each_others_settings(tmp_path, monkeypatch):
+    os.chmod(tmp_path, 0o700)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+
+    with virtual.virtualNova() as nova, binhoDaemon(nova.port) as daemon:
+        threading.Thread(target=daemon.serveForever, daemon=True).start()
+
+        first = binhoComms(nova.port)
+        second = binhoComms(nova.port)
+        first.start()
+        second.start()
+
+        try:
+            assert not first.configuration.shadowing
+
+            binhoSPIDriver(first).mode = 0
+            binhoSPIDriver(second).mode = 3
+            binhoSPIDriver(first).mode = 0
+
+            assert nova.spiConfig["MODE"] == "0"
+            assert binhoSPIDriver(second).mode == 0
+        finally:
+            first.close()
+            second.close()
+
+
+def test_shadowed_settings_skip_the_device_until_invalidated():
+    with virtual.virtualNova() as nova:
+        respond = nova.respond
+        sent = []
+        nova.respond = lambda command: sent.append(command) or respond(command)
+
+        comms = binhoComms(nova.port)
+        comms.start()
+        spi = binhoSPIDriver(comms)
+
+        try:
+            spi.mode = 2
+            assert spi.mode == 2
+            spi.mode = 2
+            assert sent == ["SPI0 MODE 2"]
+
+            comms.configuration.invalidate()
+            assert spi.mode == 2
+            assert sent == ["SPI0 MODE 2", "SPI0 MODE ?"]
+        finally:
+            comms.close()
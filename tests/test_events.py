@@ -0,0 +1,37 @@
+import asyncio
+
+from binho.comms.events import interruptEvents
+
+
+def test_closing_a_stream_unsubscribes_it():
+    events = interruptEvents()
+
+    async def read():
+        async with events.stream() as edges:
+            events.post("!IO1")
+            return await edges.__anext__()
+
+    loop = asyncio.new_event_loop()
+
+    try:
+        event = loop.run_until_complete(read())
+    finally:
+        loop.close()
+
+    assert event.source == "!IO1"
+    assert not events._subscribers
+
+    # With the stream's loop gone, a notification that still reached it would count as a callback error.
+    events.post("!IO1")
+    assert events.callbackErrors == 0
+
+
+def test_unsubscribe_accepts_the_same_bound_method_fetched_again():
+    events = interruptEvents()
+    received = []
+
+    events.subscribe(received.append)
+    events.unsubscribe(received.append)
+    events.post("!IO2")
+
+    assert not received
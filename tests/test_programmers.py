@@ -0,0 +1,52 @@
+import pytest
+
+from binho.devices.nova import binhoNova
+from binho.programmers.eeprom import EEPROMDevice
+from binho.programmers.spiFlash import SPIFlash
+from binho.util.polling import exponentialBackoff
+
+virtual = pytest.importorskip("binho.comms.virtual")
+
+
+@pytest.fixture
+def nova():
+    with virtual.virtualNova() as nova:
+        yield nova
+
+
+@pytest.fixture
+def board(nova):
+    board = binhoNova(port=nova.port)
+    board.initialize_apis()
+
+    try:
+        yield board
+    finally:
+        board.comms.close()
+
+
+def test_flash_status_register_is_the_byte_after_the_command(nova, board):
+    # A flash shifts out a dummy byte with the command, then the register.
+    nova.spiTransfer = lambda data: b"\xff" + b"\x03" * (len(data) - 1)
+    board.operationMode = "SPI"
+    flash = SPIFlash(board, autodetect=False, chip_select_pin=board.gpio.getPin("IO0"))
+
+    assert flash.readStatusRegister() == 0x03
+
+
+def test_backoff_starts_no_slower_than_its_ceiling():
+    delays = exponentialBackoff(1.0).delays()
+
+    assert [next(delays) for _ in range(3)] == [1.0, 0.05, 0.05]
+
+
+def test_eeprom_that_never_acknowledges_falls_back_to_fixed_waits(board):
+    board.operationMode = "I2C"
+    board.i2c.probe = lambda address: False
+    eeprom = EEPROMDevice(board.i2c, 256, 16, write_cycle_length=0.001)
+    data = bytes(range(40))
+
+    eeprom.writeBytes(0, data)
+
+    assert eeprom.poll_stats.timeouts == 1
+    assert bytes(eeprom.readBytes(0, len(data) - 1)) == data
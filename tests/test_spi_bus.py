@@ -0,0 +1,38 @@
+import pytest
+
+from binho.devices.nova import binhoNova
+
+numpy = pytest.importorskip("numpy")
+virtual = pytest.importorskip("binho.comms.virtual")
+
+
+@pytest.fixture
+def board():
+    with virtual.virtualNova() as nova:
+        board = binhoNova(port=nova.port)
+        board.initialize_apis()
+        board.operationMode = "SPI"
+
+        try:
+            yield board
+        finally:
+            board.comms.close()
+
+
+def test_twelve_bit_words_loop_back_and_restore_bits_per_transfer(board):
+    words = numpy.arange(0, 4096, 37)
+
+    received = board.spi.transfer_words(words, bits=12)
+
+    assert (received == words).all()
+    assert board.spi.bitsPerTransfer == 8
+
+
+def test_word_width_change_is_refused_inside_a_session(board):
+    with board.spi.session() as session:
+        session.transfer(b"\x01")
+
+        with pytest.raises(ValueError):
+            board.spi.transfer_words([0x123], bits=12)
+
+        assert session.transfer(b"\x02") == b"\x02"
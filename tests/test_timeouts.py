@@ -0,0 +1,127 @@
+import asyncio
+import threading
+
+import pytest
+
+from binho.comms.aio import binhoAsyncComms
+from binho.comms.comms import binhoComms
+from binho.comms.drivers.spi import binhoSPIDriver
+
+virtual = pytest.importorskip("binho.comms.virtual")
+
+
+def test_quick_command_queued_behind_a_stream_is_not_timed_out():
+    # Each SPI chunk keeps the device busy for 50ms. Once PINGs have been learned to be answered at once, a PING sent
+    # while another thread streams waits behind the chunks in flight, and must still be answered.
+    with virtual.virtualNova(latency={"SPI0 WHR": 0.05, None: 0.0}) as nova:
+        comms = binhoComms(nova.port)
+        comms.start()
+
+        try:
+            spi = binhoSPIDriver(comms)
+            errors = []
+
+            def ping():
+                comms.sendCommand("+PING")
+                return comms.readResponse()
+
+            assert [ping() for _ in range(20)] == ["-OK"] * 20
+
+            def stream():
+                try:
+                    spi.streamTransfer(bytes(8192), 8192)
+                except RuntimeError as e:
+                    errors.append(e)
+
+            streamer = threading.Thread(target=stream)
+            streamer.start()
+
+            replies = []
+            while streamer.is_alive():
+                replies.append(ping())
+            streamer.join()
+
+            assert replies and replies == ["-OK"] * len(replies)
+            assert not errors
+            assert comms.isConnected()
+        finally:
+            comms.close()
+
+
+def test_async_command_queued_behind_transfers_is_not_timed_out():
+    async def run(port):
+        async with binhoAsyncComms(port) as comms:
+            for _ in range(20):
+                assert await comms.command("+PING") == "-OK"
+
+            # Three 1KB transfers from other tasks are ahead of the PING in the device's queue.
+            transfers = [comms.command("SPI0 WHR 0 1024 " + "00" * 1024) for _ in range(3)]
+            replies = await asyncio.gather(*transfers, comms.command("+PING"))
+
+            assert all(reply.startswith("-SPI0 RXD") for reply in replies[:3])
+            assert replies[3] == "-OK"
+            assert comms.isConnected()
+
+    with virtual.virtualNova(latency={"SPI0 WHR": 0.05, None: 0.0}) as nova:
+        asyncio.run(run(nova.port))
+
+
+def test_async_timeout_fails_only_the_late_command():
+    async def run(nova):
+        async with binhoAsyncComms(nova.port) as comms:
+            nova.latency = {"+PING": 0.3, None: 0.0}
+
+            with pytest.raises(Exception, match="Timed out"):
+                await comms.command("+PING", timeout=0.05)
+
+            # The late reply is dropped instead of being taken for the next command's.
+            assert comms.isConnected()
+            assert (await comms.command("+ID ?")).startswith("-ID")
+
+    with virtual.virtualNova() as nova:
+        asyncio.run(run(nova))
+
+
+def test_stall_after_learning_fails_only_the_late_command():
+    with virtual.virtualNova() as nova:
+        comms = binhoComms(nova.port)
+        comms.start()
+
+        try:
+            for _ in range(20):
+                comms.sendCommand("+PING")
+                assert comms.readResponse() == "-OK"
+
+            # A reply held up for longer than the learned deadline, as a stall on the host would hold it up.
+            nova.latency = {"+PING": 0.3, None: 0.0}
+            comms.sendCommand("+PING")
+            assert comms.readResponse() == "[ERROR]"
+            assert comms.isConnected()
+
+            # The late reply is dropped instead of being taken for the next command's.
+            nova.latency = 0.0
+            comms.sendCommand("+ID ?")
+            assert comms.readResponse().startswith("-ID")
+        finally:
+            comms.close()
+
+
+def test_device_that_stops_answering_drops_the_connection():
+    with virtual.virtualNova() as nova:
+        comms = binhoComms(nova.port)
+        comms.start()
+
+        try:
+            for _ in range(20):
+                comms.sendCommand("+PING")
+                assert comms.readResponse() == "-OK"
+
+            nova.latency = 5.0
+            for _ in range(10):
+                comms.sendCommand("+PING")
+                if comms.readResponse() == "[ERROR]" and not comms.isConnected():
+                    break
+
+            assert not comms.isConnected()
+        finally:
+            comms.close()